@@ -1,13 +1,22 @@
-from django.contrib import admin
-from .models import AIConfig, Chat, Message, QueryLog
+from django.contrib import admin, messages
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.template.response import TemplateResponse
+from django.urls import path
+from .models import AIConfig, Chat, Message, MessageJob, ProfileCapture, QueryLog, QueryLogDailyRollup
 from .conf import get_admin_site
+from .services.profiling import top_functions
+from .services.retention import ROLLUP_GROUPS, summarize_rollups
+from .services.timing import format_timings
 
 admin_site = get_admin_site()
 
 
 class AIConfigAdmin(admin.ModelAdmin):
-    list_display = ('provider', 'model', 'updated_at')
-    search_fields = ('model', 'provider')
+    list_display = ('id', 'name', 'provider', 'model', 'is_active', 'weight', 'purposes', 'updated_at')
+    list_editable = ('is_active', 'weight')
+    list_filter = ('is_active', 'provider')
+    search_fields = ('name', 'model', 'provider', 'base_url')
 
 
 class ChatAdmin(admin.ModelAdmin):
@@ -24,10 +33,117 @@ class MessageAdmin(admin.ModelAdmin):
 
 
 class QueryLogAdmin(admin.ModelAdmin):
-    list_display = ('id', 'user', 'chat', 'route', 'intent_label', 'duration_ms', 'rows', 'truncated', 'created_at')
-    search_fields = ('question', 'orm_code', 'error')
+    list_display = (
+        'id', 'user', 'chat', 'route', 'intent_label', 'duration_ms', 'rows', 'truncated',
+        'prompt_tokens', 'completion_tokens', 'cost_usd', 'created_at',
+    )
+    search_fields = ('question', 'orm_code', 'error', '=trace_id')
     list_filter = ('truncated', 'created_at')
-    readonly_fields = ('query_meta',)
+    list_select_related = ('user', 'chat')
+    readonly_fields = ('query_meta', 'stage_timings')
+    # Avoid an unfiltered COUNT(*) over the whole log table on every changelist load.
+    show_full_result_count = False
+    actions = ('download_profile', 'show_profile_top')
+
+    @admin.display(description='Stage timings')
+    def stage_timings(self, obj):
+        return format_timings((obj.query_meta or {}).get('timings')) or '-'
+
+    def _selected_profile(self, request, queryset):
+        trace_ids = [t for t in queryset.values_list('trace_id', flat=True) if t]
+        capture = ProfileCapture.objects.filter(trace_id__in=trace_ids).order_by('-created_at').first()
+        if capture is None:
+            self.message_user(request, 'No profile was captured for the selected queries.', messages.WARNING)
+        return capture
+
+    @admin.action(description='Download profile (.pstats)')
+    def download_profile(self, request, queryset):
+        capture = self._selected_profile(request, queryset)
+        if capture is None:
+            return None
+        response = HttpResponse(bytes(capture.stats), content_type='application/octet-stream')
+        response['Content-Disposition'] = f'attachment; filename="{capture.trace_id}.pstats"'
+        return response
+
+    @admin.action(description='Show top cumulative functions')
+    def show_profile_top(self, request, queryset):
+        capture = self._selected_profile(request, queryset)
+        if capture is None:
+            return None
+        header = f'trace {capture.trace_id} ({capture.reason}, {capture.duration_ms} ms)\n\n'
+        return HttpResponse(header + top_functions(capture), content_type='text/plain; charset=utf-8')
+
+
+class ProfileCaptureAdmin(admin.ModelAdmin):
+    list_display = ('trace_id', 'user', 'chat_id', 'reason', 'duration_ms', 'created_at')
+    search_fields = ('=trace_id',)
+    list_filter = ('reason', 'created_at')
+    list_select_related = ('user',)
+    exclude = ('stats',)
+    readonly_fields = ('trace_id', 'user', 'chat_id', 'reason', 'duration_ms', 'created_at')
+
+
+class MessageJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'chat', 'user', 'status', 'attempts', 'worker', 'status_code', 'created_at', 'finished_at')
+    list_filter = ('status', 'created_at')
+    list_select_related = ('chat', 'user')
+    search_fields = ('=trace_id', 'content')
+    readonly_fields = ('trace_id', 'worker', 'attempts', 'result', 'status_code', 'error', 'started_at', 'finished_at')
+
+
+class QueryLogDailyRollupAdmin(admin.ModelAdmin):
+    list_display = (
+        'day', 'route', 'intent_label', 'user', 'count', 'error_rate', 'p50_duration_ms', 'p95_duration_ms',
+        'prompt_tokens', 'completion_tokens', 'cost_usd',
+    )
+    list_filter = ('route', 'intent_label', 'day')
+    list_select_related = ('user',)
+    search_fields = ('user__username', 'user__email')
+    date_hierarchy = 'day'
+    ordering = ('-day', '-count')
+    change_list_template = 'admin/django_ai_admin/querylogdailyrollup/change_list.html'
+
+    def get_urls(self):
+        info = self.model._meta.app_label, self.model._meta.model_name
+        custom = [
+            path('usage-report/', self.admin_site.admin_view(self.usage_report_view), name='%s_%s_usage_report' % info),
+        ]
+        return custom + super().get_urls()
+
+    def usage_report_view(self, request):
+        try:
+            days = max(1, min(366, int(request.GET.get('days', 30))))
+        except (TypeError, ValueError):
+            days = 30
+        group_by = request.GET.get('group_by', 'user')
+        if group_by not in ROLLUP_GROUPS:
+            group_by = 'user'
+        rows = summarize_rollups(days=days, group_by=group_by)
+        usernames = {}
+        if group_by == 'user':
+            user_ids = [row['user'] for row in rows if row['user'] is not None]
+            user_model = get_user_model()
+            usernames = {u.pk: str(u) for u in user_model._default_manager.filter(pk__in=user_ids)}
+        for row in rows:
+            key = row[group_by]
+            row['label'] = usernames.get(key, key) if group_by == 'user' else (key or '-')
+            if row['label'] is None:
+                row['label'] = '-'
+        totals = {
+            name: sum(row[name] for row in rows)
+            for name in ('count', 'prompt_tokens', 'cached_tokens', 'completion_tokens', 'cost_usd')
+        }
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'LLM usage report',
+            'opts': self.model._meta,
+            'rows': rows,
+            'totals': totals,
+            'days': days,
+            'group_by': group_by,
+            'groups': ROLLUP_GROUPS,
+        }
+        return TemplateResponse(request, 'admin/django_ai_admin/usage_report.html', context)
 
 
 def _safe_register(model, admin_class):
@@ -41,3 +157,6 @@ _safe_register(AIConfig, AIConfigAdmin)
 _safe_register(Chat, ChatAdmin)
 _safe_register(Message, MessageAdmin)
 _safe_register(QueryLog, QueryLogAdmin)
+_safe_register(QueryLogDailyRollup, QueryLogDailyRollupAdmin)
+_safe_register(ProfileCapture, ProfileCaptureAdmin)
+_safe_register(MessageJob, MessageJobAdmin)
@@ -10,6 +10,22 @@ def _get_setting(name: str, default):
     return getattr(settings, f'DJANGO_AI_ADMIN_{name}', default)
 
 
+def _get_int_setting(name: str, default: int, minimum: int = 0) -> int:
+    try:
+        value = int(_get_setting(name, default))
+    except (TypeError, ValueError):
+        value = default
+    return max(minimum, value)
+
+
+def _get_float_setting(name: str, default: float, minimum: float = 0.0) -> float:
+    try:
+        value = float(_get_setting(name, default))
+    except (TypeError, ValueError):
+        value = default
+    return max(minimum, value)
+
+
 def get_url_prefix() -> str:
     raw = str(_get_setting('URL_PREFIX', 'ai-assistant') or '').strip()
     prefix = raw.strip('/')
@@ -29,6 +45,244 @@ def get_openai_chat_completions_url() -> str:
     return f'{get_openai_base_url()}/chat/completions'
 
 
+def get_query_log_mode() -> str:
+    raw = str(_get_setting('QUERY_LOG_MODE', 'sync') or '').strip().lower()
+    return raw if raw in ('sync', 'buffered') else 'sync'
+
+
+def get_query_log_batch_size() -> int:
+    return _get_int_setting('QUERY_LOG_BATCH_SIZE', 200, minimum=1)
+
+
+def get_query_log_queue_size() -> int:
+    return _get_int_setting('QUERY_LOG_QUEUE_SIZE', 10000, minimum=1)
+
+
+def get_query_log_flush_interval_sec() -> float:
+    return _get_float_setting('QUERY_LOG_FLUSH_INTERVAL_SEC', 1.0, minimum=0.05)
+
+
+def get_query_log_retention_days() -> int:
+    return _get_int_setting('QUERY_LOG_RETENTION_DAYS', 90, minimum=1)
+
+
+def get_query_log_archive_dir() -> str:
+    return str(_get_setting('QUERY_LOG_ARCHIVE_DIR', '') or '').strip()
+
+
+def get_debug_meta_enabled() -> bool:
+    return bool(_get_setting('DEBUG_META', settings.DEBUG))
+
+
+def get_model_prices() -> dict[str, dict]:
+    """USD per 1M tokens, e.g. {'gpt-4o-mini': {'input': 0.15, 'cached_input': 0.075, 'output': 0.6}}."""
+    raw = _get_setting('MODEL_PRICES', {}) or {}
+    return raw if isinstance(raw, dict) else {}
+
+
+def get_tracing_enabled() -> bool:
+    return bool(_get_setting('TRACING_ENABLED', False))
+
+
+def get_tracing_exporters() -> list:
+    """Aliases ('log', 'json_file', 'otlp') or dotted paths to SpanExporter classes/instances."""
+    raw = _get_setting('TRACING_EXPORTERS', ['log'])
+    if isinstance(raw, str):
+        raw = [raw]
+    return list(raw or [])
+
+
+def get_tracing_json_file() -> str:
+    return str(_get_setting('TRACING_JSON_FILE', '') or '').strip()
+
+
+def get_tracing_otlp_endpoint() -> str:
+    return str(_get_setting('TRACING_OTLP_ENDPOINT', '') or '').strip()
+
+
+def get_tracing_otlp_hook() -> str:
+    return str(_get_setting('TRACING_OTLP_HOOK', '') or '').strip()
+
+
+def get_tracing_queue_size() -> int:
+    return _get_int_setting('TRACING_QUEUE_SIZE', 1000, minimum=1)
+
+
+def get_profile_sample_rate() -> float:
+    return min(1.0, _get_float_setting('PROFILE_SAMPLE_RATE', 0.0, minimum=0.0))
+
+
+def get_profile_header_enabled() -> bool:
+    return bool(_get_setting('PROFILE_HEADER_ENABLED', True))
+
+
+def get_llm_provider() -> str:
+    """Provider override for every AIConfig; 'mock' answers locally without network."""
+    return str(_get_setting('LLM_PROVIDER', '') or '').strip().lower()
+
+
+def get_mock_llm_latency_ms() -> int:
+    return _get_int_setting('MOCK_LLM_LATENCY_MS', 0, minimum=0)
+
+
+def get_mock_llm_error_rate() -> float:
+    return min(1.0, _get_float_setting('MOCK_LLM_ERROR_RATE', 0.0, minimum=0.0))
+
+
+def get_mock_llm_error_status() -> int:
+    return _get_int_setting('MOCK_LLM_ERROR_STATUS', 503, minimum=400)
+
+
+def get_mock_llm_fixtures() -> str:
+    return str(_get_setting('MOCK_LLM_FIXTURES', '') or '').strip()
+
+
+def get_mock_llm_seed() -> int | None:
+    value = _get_setting('MOCK_LLM_SEED', None)
+    try:
+        return None if value is None else int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def get_generation_candidates() -> int:
+    return min(8, _get_int_setting('GENERATION_CANDIDATES', 1, minimum=1))
+
+
+def get_generation_candidates_mode() -> str:
+    raw = str(_get_setting('GENERATION_CANDIDATES_MODE', 'n') or '').strip().lower()
+    return raw if raw in ('n', 'parallel') else 'n'
+
+
+def get_few_shot_examples() -> int:
+    return min(10, _get_int_setting('FEW_SHOT_EXAMPLES', 0))
+
+
+def get_few_shot_index_size() -> int:
+    return _get_int_setting('FEW_SHOT_INDEX_SIZE', 5000, minimum=1)
+
+
+def get_query_templates_enabled() -> bool:
+    return bool(_get_setting('QUERY_TEMPLATES', False))
+
+
+def get_query_template_cache_size() -> int:
+    return _get_int_setting('QUERY_TEMPLATE_CACHE_SIZE', 1000, minimum=1)
+
+
+def get_combined_routing_enabled() -> bool:
+    return bool(_get_setting('COMBINED_ROUTING', False))
+
+
+def get_speculative_generation_enabled() -> bool:
+    return bool(_get_setting('SPECULATIVE_GENERATION', False))
+
+
+def get_llm_max_workers() -> int:
+    return _get_int_setting('LLM_MAX_WORKERS', 8, minimum=1)
+
+
+def get_async_pipeline_enabled() -> bool:
+    return bool(_get_setting('ASYNC_PIPELINE', False))
+
+
+def get_async_pipeline_threads() -> int:
+    return _get_int_setting('ASYNC_PIPELINE_THREADS', 32, minimum=1)
+
+
+def get_llm_http_pool_size() -> int:
+    return _get_int_setting('LLM_HTTP_POOL_SIZE', 32, minimum=1)
+
+
+def get_background_jobs_enabled() -> bool:
+    return bool(_get_setting('BACKGROUND_JOBS', False))
+
+
+def get_job_poll_timeout_sec() -> float:
+    return _get_float_setting('JOB_POLL_TIMEOUT_SEC', 20.0)
+
+
+def get_job_stale_sec() -> int:
+    return _get_int_setting('JOB_STALE_SEC', 600, minimum=1)
+
+
+def get_job_max_attempts() -> int:
+    return _get_int_setting('JOB_MAX_ATTEMPTS', 2, minimum=1)
+
+
+def get_coalescing_enabled() -> bool:
+    return bool(_get_setting('COALESCING', False))
+
+
+def get_coalescing_cache() -> str:
+    return str(_get_setting('COALESCING_CACHE', '') or '').strip()
+
+
+def get_coalescing_wait_sec() -> float:
+    return _get_float_setting('COALESCING_WAIT_SEC', 60.0)
+
+
+def get_max_concurrent_llm_calls() -> int:
+    return _get_int_setting('MAX_CONCURRENT_LLM_CALLS', 0)
+
+
+def get_max_concurrent_executions() -> int:
+    return _get_int_setting('MAX_CONCURRENT_EXECUTIONS', 0)
+
+
+def get_admission_wait_sec() -> float:
+    return _get_float_setting('ADMISSION_WAIT_SEC', 10.0)
+
+
+def get_admission_cache() -> str:
+    return str(_get_setting('ADMISSION_CACHE', '') or '').strip()
+
+
+def get_admission_lease_sec() -> int:
+    return _get_int_setting('ADMISSION_LEASE_SEC', 120, minimum=1)
+
+
+def get_user_turns_per_minute() -> int:
+    return _get_int_setting('USER_TURNS_PER_MINUTE', 0)
+
+
+def get_user_turn_burst() -> int:
+    return _get_int_setting('USER_TURN_BURST', 0)
+
+
+def get_circuit_failure_threshold() -> int:
+    return _get_int_setting('CIRCUIT_FAILURE_THRESHOLD', 5, minimum=1)
+
+
+def get_circuit_reset_sec() -> float:
+    return _get_float_setting('CIRCUIT_RESET_SEC', 30.0)
+
+
+def get_circuit_half_open_probes() -> int:
+    return _get_int_setting('CIRCUIT_HALF_OPEN_PROBES', 1, minimum=1)
+
+
+def get_backoff_base_sec() -> float:
+    return _get_float_setting('BACKOFF_BASE_SEC', 0.5)
+
+
+def get_backoff_max_sec() -> float:
+    return _get_float_setting('BACKOFF_MAX_SEC', 8.0)
+
+
+DEFAULT_PROMPT_TOKEN_BUDGETS = {'router': 12000, 'route_generate': 12000, 'generation': 12000, 'summary': 2000}
+
+
+def get_prompt_token_budget(purpose: str) -> int:
+    """Estimated prompt tokens allowed per LLM call purpose; 0 disables trimming."""
+    raw = _get_setting('PROMPT_TOKEN_BUDGETS', {}) or {}
+    budgets = {**DEFAULT_PROMPT_TOKEN_BUDGETS, **(raw if isinstance(raw, dict) else {})}
+    try:
+        return max(0, int(budgets.get(purpose, 0) or 0))
+    except (TypeError, ValueError):
+        return DEFAULT_PROMPT_TOKEN_BUDGETS.get(purpose, 0)
+
+
 def get_admin_site() -> AdminSite:
     site_ref = _get_setting('ADMIN_SITE', '')
     if not site_ref:
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from django_ai_admin.services.benchmark import DEFAULT_QUESTIONS, DEFAULT_SIZES, run_benchmark
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the chat message pipeline with the mock LLM over synthetic schemas and write JSON results.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default=','.join(str(s) for s in DEFAULT_SIZES), help='Comma-separated model counts.')
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--question', action='append', dest='questions', help='Question to send (repeatable).')
+        parser.add_argument('--output', default='ai-admin-bench.json', help='Results file; "-" for stdout.')
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(x) for x in options['sizes'].split(',') if x.strip()]
+        except ValueError:
+            raise CommandError('--sizes must be comma-separated integers.')
+        if not sizes or min(sizes) < 1:
+            raise CommandError('--sizes must contain positive integers.')
+
+        results = run_benchmark(
+            sizes=sizes,
+            iterations=max(1, options['iterations']),
+            questions=options['questions'] or DEFAULT_QUESTIONS,
+            progress=lambda size: self.stderr.write(f'Benchmarking {size} synthetic models...'),
+        )
+        payload = json.dumps(results, indent=2, sort_keys=True)
+        if options['output'] == '-':
+            self.stdout.write(payload)
+            return
+        with open(options['output'], 'w', encoding='utf-8') as fh:
+            fh.write(payload + '\n')
+        for size, item in results['sizes'].items():
+            self.stdout.write(
+                f"{size:>6} models  post p50 {item['post_latency_ms']['p50']} ms  "
+                f"p95 {item['post_latency_ms']['p95']} ms  queries {item['post_queries']['p50']}  "
+                f"router prompt {item['router_prompt_chars']} chars"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from django_ai_admin.conf import (
+    get_mock_llm_error_rate,
+    get_mock_llm_error_status,
+    get_mock_llm_fixtures,
+    get_mock_llm_latency_ms,
+    get_mock_llm_seed,
+)
+from django_ai_admin.services.mock_llm import MockLLM, load_fixtures, make_server
+
+
+class Command(BaseCommand):
+    help = 'Serve deterministic OpenAI-compatible chat completions locally (point OPENAI_BASE_URL at it).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--fixtures', default=None, help='JSON transcript file with canned replies.')
+        parser.add_argument('--latency-ms', type=int, default=None, help='Delay added to every reply.')
+        parser.add_argument('--error-rate', type=float, default=None, help='Share of requests answered with an error.')
+        parser.add_argument('--error-status', type=int, default=None, help='HTTP status of injected errors.')
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        def pick(name, default):
+            return default if options[name] is None else options[name]
+
+        llm = MockLLM(
+            fixtures=load_fixtures(pick('fixtures', get_mock_llm_fixtures())),
+            latency_ms=max(0, pick('latency_ms', get_mock_llm_latency_ms())),
+            error_rate=max(0.0, min(1.0, pick('error_rate', get_mock_llm_error_rate()))),
+            error_status=pick('error_status', get_mock_llm_error_status()),
+            seed=pick('seed', get_mock_llm_seed()),
+        )
+        server = make_server(options['host'], options['port'], llm)
+        host, port = server.server_address[:2]
+        self.stdout.write(self.style.SUCCESS(
+            f'Mock LLM listening on http://{host}:{port}/v1/chat/completions '
+            f'(set DJANGO_AI_ADMIN_OPENAI_BASE_URL = "http://{host}:{port}/v1").'
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
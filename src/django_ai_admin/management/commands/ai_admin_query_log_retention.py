@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from django_ai_admin.conf import get_query_log_archive_dir, get_query_log_retention_days
+from django_ai_admin.services.retention import archive_query_logs, refresh_recent_rollups
+
+
+class Command(BaseCommand):
+    help = 'Roll up QueryLog rows per day and archive old rows to compressed NDJSON files.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-days', type=int, default=None, help='Keep this many days of raw rows.')
+        parser.add_argument('--archive-dir', default=None, help='Directory for querylog-YYYY-MM-DD-*.ndjson.gz batch files.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--rollup-only', action='store_true', help='Only refresh rollups of recent days.')
+        parser.add_argument('--rollup-days', type=int, default=2, help='Recent days refreshed with --rollup-only.')
+        parser.add_argument('--no-archive', action='store_true', help='Delete old rows without writing archive files.')
+
+    def handle(self, *args, **options):
+        if options['rollup_only']:
+            count = refresh_recent_rollups(days=options['rollup_days'])
+            self.stdout.write(self.style.SUCCESS(f'Refreshed {count} rollup rows.'))
+            return
+
+        keep_days = options['keep_days'] or get_query_log_retention_days()
+        archive_dir = options['archive_dir'] or get_query_log_archive_dir()
+        if options['no_archive']:
+            archive_dir = None
+        elif not archive_dir:
+            raise CommandError('Set --archive-dir or DJANGO_AI_ADMIN_QUERY_LOG_ARCHIVE_DIR, or pass --no-archive.')
+
+        before_day = timezone.localdate() - timedelta(days=max(1, keep_days))
+        stats = archive_query_logs(before_day, archive_dir=archive_dir, batch_size=max(1, options['batch_size']))
+        for path in stats['files']:
+            self.stdout.write(f'Wrote {path}')
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {stats['archived']} rows from {stats['days']} days "
+            f"(before {before_day.isoformat()}), {stats['rollups']} rollup rows."
+        ))
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from django_ai_admin.services.replay import load_questions, replay
+
+
+class Command(BaseCommand):
+    help = 'Replay historical QueryLog questions through the full pipeline and report throughput and latency.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=200, help='Number of logged questions to replay.')
+        parser.add_argument('--days', type=int, default=30, help='Take questions from the last N days.')
+        parser.add_argument('--route', action='append', dest='routes', help='Only questions logged with this route.')
+        parser.add_argument('--anonymize', action='store_true', help='Mask e-mails, quoted literals and long numbers.')
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--rate', type=float, default=0.0, help='Max turns per second (0 = unthrottled).')
+        parser.add_argument('--real-llm', action='store_true', help='Use the configured provider instead of the mock.')
+        parser.add_argument('--mock-latency-ms', type=int, default=0)
+        parser.add_argument('--keep', action='store_true', help='Keep the chats and query logs created by the replay.')
+        parser.add_argument('--output', default='', help='Also write the JSON report to this file.')
+
+    def handle(self, *args, **options):
+        questions = load_questions(
+            limit=max(1, options['limit']),
+            days=max(1, options['days']),
+            routes=options['routes'],
+            anonymize=options['anonymize'],
+        )
+        if not questions:
+            raise CommandError('No QueryLog questions matched.')
+
+        report = replay(
+            questions,
+            concurrency=max(1, options['concurrency']),
+            rate=max(0.0, options['rate']),
+            use_mock=not options['real_llm'],
+            mock_latency_ms=max(0, options['mock_latency_ms']),
+            keep=options['keep'],
+        )
+        payload = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as fh:
+                fh.write(payload + '\n')
+        self.stdout.write(payload)
+        self.stdout.write(self.style.SUCCESS(
+            f"Replayed {report['questions']} questions in {report['wall_sec']}s "
+            f"({report['throughput_per_sec']}/s), p95 {report['latency_ms']['p95']} ms."
+        ))
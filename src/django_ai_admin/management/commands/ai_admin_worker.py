@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from django_ai_admin.services.jobs import run_worker, worker_name
+
+
+class Command(BaseCommand):
+    help = 'Process queued assistant messages (DJANGO_AI_ADMIN_BACKGROUND_JOBS). Run several to scale.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit when the queue is empty.')
+        parser.add_argument('--sleep', type=float, default=1.0, help='Seconds between polls of an empty queue.')
+        parser.add_argument('--max-jobs', type=int, default=0, help='Exit after this many jobs (0 = no limit).')
+        parser.add_argument('--name', default='', help='Worker name stored on claimed jobs.')
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+
+        def request_stop(signum, frame):
+            # The current job is finished before the worker exits.
+            stop.set()
+
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+        name = options['name'] or worker_name()
+        self.stdout.write(f'Worker {name} waiting for jobs.')
+        processed = run_worker(
+            worker=name,
+            once=options['once'],
+            sleep_sec=max(0.05, options['sleep']),
+            max_jobs=max(0, options['max_jobs']),
+            stop=stop,
+        )
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} jobs.'))
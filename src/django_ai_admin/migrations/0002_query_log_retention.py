@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_ai_admin', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueryLogDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('route', models.CharField(blank=True, default='', max_length=32)),
+                ('intent_label', models.CharField(blank=True, default='', max_length=32)),
+                ('count', models.IntegerField(default=0)),
+                ('error_count', models.IntegerField(default=0)),
+                ('error_rate', models.FloatField(default=0.0)),
+                ('p50_duration_ms', models.IntegerField(default=0)),
+                ('p95_duration_ms', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='querylog',
+            index=models.Index(fields=['created_at'], name='django_ai_a_created_c2e370_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='querylog',
+            index=models.Index(fields=['route', '-created_at'], name='django_ai_a_route_e4431c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='querylog',
+            index=models.Index(fields=['user', '-created_at'], name='django_ai_a_user_id_eee219_idx'),
+        ),
+        migrations.AddField(
+            model_name='querylogdailyrollup',
+            name='user',
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name='ai_query_log_rollups',
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='querylogdailyrollup',
+            index=models.Index(fields=['-day'], name='django_ai_a_day_40245e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='querylogdailyrollup',
+            index=models.Index(fields=['route', '-day'], name='django_ai_a_route_806bc2_idx'),
+        ),
+    ]
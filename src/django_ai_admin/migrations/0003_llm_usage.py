@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_ai_admin', '0002_query_log_retention'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='querylog',
+            name='cached_tokens',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='querylog',
+            name='completion_tokens',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='querylog',
+            name='cost_usd',
+            field=models.DecimalField(decimal_places=6, default=0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='querylog',
+            name='prompt_tokens',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='querylogdailyrollup',
+            name='cached_tokens',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='querylogdailyrollup',
+            name='completion_tokens',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='querylogdailyrollup',
+            name='cost_usd',
+            field=models.DecimalField(decimal_places=6, default=0, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='querylogdailyrollup',
+            name='prompt_tokens',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_ai_admin', '0003_llm_usage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='querylog',
+            name='trace_id',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=64),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:01
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_ai_admin', '0005_profile_capture'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MessageJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content', models.TextField()),
+                (
+                    'status',
+                    models.CharField(
+                        choices=[('queued', 'queued'), ('running', 'running'), ('done', 'done'), ('failed', 'failed')],
+                        default='queued',
+                        max_length=16,
+                    ),
+                ),
+                ('trace_id', models.CharField(blank=True, default='', max_length=64)),
+                ('attempts', models.IntegerField(default=0)),
+                ('worker', models.CharField(blank=True, default='', max_length=128)),
+                (
+                    'result',
+                    models.JSONField(
+                        blank=True,
+                        default=None,
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                        null=True,
+                    ),
+                ),
+                ('status_code', models.IntegerField(default=0)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                (
+                    'chat',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='jobs',
+                        to='django_ai_admin.chat',
+                    ),
+                ),
+                (
+                    'user',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='ai_message_jobs',
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'created_at'], name='django_ai_a_status_b87206_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:11
+
+from django.db import migrations, models
+
+
+def keep_latest_config_active(apps, schema_editor):
+    # Before endpoints only the newest row was used; older keys and models must not join the rotation.
+    AIConfig = apps.get_model('django_ai_admin', 'AIConfig')
+    latest = AIConfig.objects.order_by('-updated_at', '-pk').values_list('pk', flat=True).first()
+    if latest is not None:
+        AIConfig.objects.exclude(pk=latest).update(is_active=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_ai_admin', '0006_message_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aiconfig',
+            name='base_url',
+            field=models.CharField(
+                blank=True, default='', help_text='Empty: DJANGO_AI_ADMIN_OPENAI_BASE_URL.', max_length=512,
+            ),
+        ),
+        migrations.AddField(
+            model_name='aiconfig',
+            name='is_active',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name='aiconfig',
+            name='name',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='aiconfig',
+            name='purposes',
+            field=models.CharField(
+                blank=True,
+                default='',
+                help_text='Comma-separated: router, route_generate, generation, summary, title. Empty: all.',
+                max_length=128,
+            ),
+        ),
+        migrations.AddField(
+            model_name='aiconfig',
+            name='weight',
+            field=models.PositiveIntegerField(
+                default=1, help_text='Share of calls among endpoints serving the same purpose; 0 = failover only.',
+            ),
+        ),
+        migrations.RunPython(keep_latest_config_active, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,5 @@
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 
 
@@ -9,6 +10,18 @@ class AIConfig(models.Model):
     max_tokens = models.IntegerField(default=1024)
     timeout_sec = models.IntegerField(default=30)
     provider = models.CharField(max_length=64, default='openai')
+    name = models.CharField(max_length=64, blank=True, default='')
+    is_active = models.BooleanField(default=True)
+    base_url = models.CharField(
+        max_length=512, blank=True, default='', help_text='Empty: DJANGO_AI_ADMIN_OPENAI_BASE_URL.',
+    )
+    weight = models.PositiveIntegerField(
+        default=1, help_text='Share of calls among endpoints serving the same purpose; 0 = failover only.',
+    )
+    purposes = models.CharField(
+        max_length=128, blank=True, default='',
+        help_text='Comma-separated: router, route_generate, generation, summary, title. Empty: all.',
+    )
     updated_at = models.DateTimeField(auto_now=True)
 
 
@@ -53,4 +66,82 @@ class QueryLog(models.Model):
     error = models.TextField(blank=True, default='')
     intent_label = models.CharField(max_length=32, blank=True, default='')
     intent_confidence = models.FloatField(default=0.0)
+    prompt_tokens = models.IntegerField(default=0)
+    completion_tokens = models.IntegerField(default=0)
+    cached_tokens = models.IntegerField(default=0)
+    cost_usd = models.DecimalField(max_digits=12, decimal_places=6, default=0)
+    trace_id = models.CharField(max_length=64, blank=True, default='', db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at']),
+            models.Index(fields=['route', '-created_at']),
+            models.Index(fields=['user', '-created_at']),
+        ]
+
+
+class QueryLogDailyRollup(models.Model):
+    day = models.DateField()
+    route = models.CharField(max_length=32, blank=True, default='')
+    intent_label = models.CharField(max_length=32, blank=True, default='')
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='ai_query_log_rollups',
+    )
+    count = models.IntegerField(default=0)
+    error_count = models.IntegerField(default=0)
+    error_rate = models.FloatField(default=0.0)
+    p50_duration_ms = models.IntegerField(default=0)
+    p95_duration_ms = models.IntegerField(default=0)
+    prompt_tokens = models.BigIntegerField(default=0)
+    completion_tokens = models.BigIntegerField(default=0)
+    cached_tokens = models.BigIntegerField(default=0)
+    cost_usd = models.DecimalField(max_digits=14, decimal_places=6, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-day']),
+            models.Index(fields=['route', '-day']),
+        ]
+
+
+class ProfileCapture(models.Model):
+    trace_id = models.CharField(max_length=64, unique=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, on_delete=models.SET_NULL, related_name='ai_profiles')
+    chat_id = models.BigIntegerField(null=True, blank=True)
+    reason = models.CharField(max_length=16, blank=True, default='')
+    duration_ms = models.IntegerField(default=0)
+    stats = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+
+class MessageJob(models.Model):
+    STATUS_CHOICES = (
+        ('queued', 'queued'),
+        ('running', 'running'),
+        ('done', 'done'),
+        ('failed', 'failed'),
+    )
+    chat = models.ForeignKey(Chat, on_delete=models.CASCADE, related_name='jobs')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='ai_message_jobs')
+    content = models.TextField()
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default='queued')
+    trace_id = models.CharField(max_length=64, blank=True, default='')
+    attempts = models.IntegerField(default=0)
+    worker = models.CharField(max_length=128, blank=True, default='')
+    result = models.JSONField(null=True, blank=True, default=None, encoder=DjangoJSONEncoder)
+    status_code = models.IntegerField(default=0)
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+from django.core.cache import caches
+
+from ..conf import (
+    get_admission_cache,
+    get_admission_lease_sec,
+    get_admission_wait_sec,
+    get_max_concurrent_executions,
+    get_max_concurrent_llm_calls,
+    get_user_turn_burst,
+    get_user_turns_per_minute,
+)
+from .metrics import ADMISSION_REJECTED, ADMISSION_WAIT
+
+CACHE_PREFIX = 'ai_admin:admission:'
+CAPACITY_ERROR_PREFIX = 'capacity exhausted'
+SHARED_POLL_SEC = 0.05
+BUCKET_SWEEP_SEC = 60.0
+
+
+class CapacityExhausted(RuntimeError):
+    def __init__(self, resource: str):
+        super().__init__(f'{CAPACITY_ERROR_PREFIX}: {resource}')
+        self.resource = resource
+
+
+class FairSemaphore:
+    """Counting semaphore that admits waiters in arrival order, each waiting at most ``timeout``."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._active = 0
+        self._waiters: deque = deque()
+        self._cond = threading.Condition()
+
+    def acquire(self, timeout: float):
+        with self._cond:
+            if self._active < self.limit and not self._waiters:
+                self._active += 1
+                return True
+            ticket = object()
+            self._waiters.append(ticket)
+            deadline = time.monotonic() + timeout
+            try:
+                while not (self._waiters[0] is ticket and self._active < self.limit):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return None
+                    self._cond.wait(remaining)
+                self._active += 1
+                return True
+            finally:
+                self._waiters.remove(ticket)
+                self._cond.notify_all()
+
+    def release(self, token) -> None:
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+
+class CacheSemaphore:
+    """
+    ``limit`` slot keys in a shared cache; ``cache.add`` claims a free one. Slots expire after
+    ``lease_sec`` so a crashed process cannot hold them forever. Waiters poll, so order is not FIFO.
+    """
+
+    def __init__(self, cache, name: str, limit: int, lease_sec: int):
+        self.cache = cache
+        self.keys = [f'{CACHE_PREFIX}{name}:slot:{index}' for index in range(limit)]
+        self.lease_sec = lease_sec
+
+    def acquire(self, timeout: float):
+        deadline = time.monotonic() + timeout
+        token = uuid.uuid4().hex
+        while True:
+            for key in self.keys:
+                if self.cache.add(key, token, timeout=self.lease_sec):
+                    return key, token
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(SHARED_POLL_SEC)
+
+    def release(self, slot) -> None:
+        key, token = slot
+        # After the lease expired the key may belong to another process now; only free our own claim.
+        # Django's cache API has no compare-and-delete, so a claim made between get and delete can still be freed.
+        if self.cache.get(key) == token:
+            self.cache.delete(key)
+
+
+_semaphores: dict[tuple, FairSemaphore] = {}
+_buckets: dict = {}
+_buckets_swept = 0.0
+_lock = threading.Lock()
+
+
+def _shared_cache():
+    alias = get_admission_cache()
+    return caches[alias] if alias else None
+
+
+def _semaphore(resource: str, limit: int):
+    cache = _shared_cache()
+    if cache is not None:
+        return CacheSemaphore(cache, resource, limit, get_admission_lease_sec())
+    with _lock:
+        semaphore = _semaphores.get((resource, limit))
+        if semaphore is None:
+            semaphore = _semaphores[(resource, limit)] = FairSemaphore(limit)
+        return semaphore
+
+
+_LIMITS = {
+    'llm': get_max_concurrent_llm_calls,
+    'execute': get_max_concurrent_executions,
+}
+
+
+@contextmanager
+def admit(resource: str):
+    """Hold one of the ``resource`` slots ('llm' or 'execute'); raises CapacityExhausted after ADMISSION_WAIT_SEC."""
+    limit = _LIMITS[resource]()
+    if not limit:
+        yield
+        return
+    semaphore = _semaphore(resource, limit)
+    t0 = time.perf_counter()
+    token = semaphore.acquire(get_admission_wait_sec())
+    ADMISSION_WAIT.observe(time.perf_counter() - t0, resource=resource)
+    if token is None:
+        ADMISSION_REJECTED.inc(resource=resource)
+        raise CapacityExhausted(resource)
+    try:
+        yield
+    finally:
+        semaphore.release(token)
+
+
+def check_user_rate(user_id) -> float:
+    """
+    Take one turn from the user's token bucket. Returns 0 when admitted, otherwise the seconds
+    until a turn is available. With ADMISSION_CACHE the bucket is a per-minute counter shared
+    by all processes, allowing USER_TURN_BURST (default: the rate) turns per minute.
+    """
+    rate = get_user_turns_per_minute()
+    if not rate:
+        return 0.0
+    burst = get_user_turn_burst() or rate
+    cache = _shared_cache()
+    if cache is not None:
+        retry_after = _take_shared(cache, user_id, burst)
+    else:
+        retry_after = _take_local(user_id, rate, burst)
+    if retry_after:
+        ADMISSION_REJECTED.inc(resource='user_rate')
+    return retry_after
+
+
+def _sweep_full_buckets(now: float, rate: int, burst: int) -> None:
+    """Drop buckets that have refilled: they are the same as no bucket. Caller holds ``_lock``."""
+    global _buckets_swept
+    _buckets_swept = now
+    full = [key for key, (tokens, updated) in _buckets.items() if tokens + (now - updated) * rate / 60 >= burst]
+    for key in full:
+        del _buckets[key]
+
+
+def _take_local(user_id, rate: int, burst: int) -> float:
+    now = time.monotonic()
+    with _lock:
+        if now - _buckets_swept >= BUCKET_SWEEP_SEC:
+            _sweep_full_buckets(now, rate, burst)
+        tokens, updated = _buckets.get(user_id, (float(burst), now))
+        tokens = min(float(burst), tokens + (now - updated) * rate / 60)
+        if tokens >= 1:
+            _buckets[user_id] = (tokens - 1, now)
+            return 0.0
+        _buckets[user_id] = (tokens, now)
+        return (1 - tokens) * 60 / rate
+
+
+def _take_shared(cache, user_id, burst: int) -> float:
+    now = time.time()
+    key = f'{CACHE_PREFIX}user:{user_id}:{int(now // 60)}'
+    cache.add(key, 0, timeout=120)
+    try:
+        used = cache.incr(key)
+    except ValueError:
+        # The window key expired between add and incr.
+        cache.add(key, 1, timeout=120)
+        used = 1
+    if used <= burst:
+        return 0.0
+    return 60 - now % 60
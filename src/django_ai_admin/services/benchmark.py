@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import gc
+import platform
+import statistics
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import django
+from django.apps.registry import Apps
+from django.contrib.auth import get_user_model
+from django.db import connection, models
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from .. import __version__
+from ..models import AIConfig, Chat, QueryLog
+from ..views import ChatMessageView
+from . import manifest as manifest_service
+from .executor import execute
+from .intent_router import _build_router_messages, route_intent
+from .llm_client import _generation_prefix, _turn_prompt
+
+DEFAULT_SIZES = (50, 500, 5000)
+DEFAULT_QUESTIONS = (
+    'How many questions are there?',
+    'Total votes per choice',
+    'List the latest questions',
+)
+SYNTHETIC_APP_LABEL = 'ai_admin_bench'
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return round(ordered[index], 3)
+
+
+def summarize_samples(values: list[float]) -> dict:
+    return {
+        'p50': _percentile(values, 50),
+        'p95': _percentile(values, 95),
+        'mean': round(statistics.fmean(values), 3) if values else 0.0,
+    }
+
+
+def build_synthetic_models(size: int) -> list[type[models.Model]]:
+    """``size`` models of eight fields in an isolated app registry, each pointing at the previous one."""
+    registry = Apps(installed_apps=())
+    for idx in range(size):
+        attrs = {
+            '__module__': __name__,
+            'Meta': type('Meta', (), {'app_label': SYNTHETIC_APP_LABEL, 'apps': registry}),
+            'name': models.CharField(max_length=64),
+            'code': models.CharField(max_length=16),
+            'amount': models.DecimalField(max_digits=12, decimal_places=2),
+            'quantity': models.IntegerField(),
+            'is_active': models.BooleanField(default=True),
+            'created_at': models.DateTimeField(),
+        }
+        if idx:
+            attrs['parent'] = models.ForeignKey(f'Entity{idx - 1:05d}', on_delete=models.CASCADE)
+        type(f'Entity{idx:05d}', (models.Model,), attrs)
+    return list(registry.all_models[SYNTHETIC_APP_LABEL].values())
+
+
+@contextmanager
+def use_manifest(manifest: dict):
+    previous = manifest_service._manifest
+    manifest_service._manifest = manifest
+    try:
+        yield
+    finally:
+        manifest_service._manifest = previous
+
+
+def _timed(fn, iterations: int, clock=time.perf_counter) -> list[float]:
+    samples = []
+    for _ in range(iterations):
+        t0 = clock()
+        fn()
+        samples.append((clock() - t0) * 1000)
+    return samples
+
+
+def bench_execute_overhead(iterations: int) -> dict:
+    try:
+        samples = _timed(lambda: execute('result = 0'), iterations)
+    except Exception as exc:
+        return {'error': f'{type(exc).__name__}: {exc}'[:200]}
+    return {'ms': summarize_samples(samples)}
+
+
+def post_turn(user, chat_id: int, question: str):
+    request = APIRequestFactory().post(f'/api/chats/{chat_id}/message', {'content': question}, format='json')
+    force_authenticate(request, user=user)
+    response = ChatMessageView.as_view()(request, chat_id=chat_id)
+    response.render()
+    return response
+
+
+def bench_size(size: int, iterations: int, questions: tuple[str, ...], user) -> dict:
+    synthetic = build_synthetic_models(size)
+    build_samples = _timed(lambda: manifest_service.build_manifest(synthetic), iterations)
+    project_manifest = manifest_service.build_manifest()
+    manifest = {**manifest_service.build_manifest(synthetic), **project_manifest}
+
+    question = questions[0]
+    route_cpu = _timed(lambda: route_intent(question, manifest), iterations, clock=time.process_time)
+    router_prompt = sum(len(m['content']) for m in _build_router_messages(question, manifest))
+    with use_manifest(manifest):
+        turn_prompt = _turn_prompt(candidate_models=sorted(project_manifest)[:1])
+        generation_prompt = len(_generation_prefix().text) + len(turn_prompt)
+
+        chat = Chat.objects.create(owner=user)
+        latency, queries, statuses = [], [], {}
+        for idx in range(iterations):
+            with CaptureQueriesContext(connection) as captured:
+                t0 = time.perf_counter()
+                response = post_turn(user, chat.pk, questions[idx % len(questions)])
+                latency.append((time.perf_counter() - t0) * 1000)
+            queries.append(len(captured))
+            kind = response.data.get('type', str(response.status_code)) if isinstance(response.data, dict) else ''
+            statuses[kind] = statuses.get(kind, 0) + 1
+
+        gc.collect()
+        tracemalloc.start()
+        try:
+            post_turn(user, chat.pk, question)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return {
+        'models': len(manifest),
+        'manifest_build_ms': summarize_samples(build_samples),
+        'route_intent_cpu_ms': summarize_samples(route_cpu),
+        'router_prompt_chars': router_prompt,
+        'generation_prompt_chars': generation_prompt,
+        'post_latency_ms': summarize_samples(latency),
+        'post_queries': summarize_samples(queries),
+        'post_alloc_peak_kib': round(peak / 1024, 1),
+        'response_types': statuses,
+    }
+
+
+def _delete_bench_rows(user, config: AIConfig) -> None:
+    # Logs only lose their user on delete, so they go first; chats, messages and jobs cascade.
+    QueryLog.objects.filter(user=user).delete()
+    user.delete()
+    config.delete()
+
+
+def run_benchmark(sizes=DEFAULT_SIZES, iterations: int = 20, questions=DEFAULT_QUESTIONS, progress=None) -> dict:
+    """
+    Run the message pipeline against the mock LLM for each synthetic schema size.
+    All rows created here are deleted afterwards. There is no wrapping transaction:
+    ``execute`` makes its own transaction read-only, which would end every later write.
+    """
+    results = {
+        'version': __version__,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'db_vendor': connection.vendor,
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'iterations': iterations,
+        'sizes': {},
+    }
+    overrides = {
+        'DJANGO_AI_ADMIN_LLM_PROVIDER': 'mock',
+        'DJANGO_AI_ADMIN_MOCK_LLM_LATENCY_MS': 0,
+        'DJANGO_AI_ADMIN_MOCK_LLM_ERROR_RATE': 0.0,
+        'DJANGO_AI_ADMIN_QUERY_LOG_MODE': 'sync',
+        'DJANGO_AI_ADMIN_TRACING_ENABLED': False,
+        'DJANGO_AI_ADMIN_PROFILE_SAMPLE_RATE': 0.0,
+    }
+    with override_settings(**overrides):
+        config = AIConfig.objects.create(provider='mock', model='mock', api_key='')
+        user = get_user_model().objects.create_user(f'ai_admin_bench_{int(time.time())}', is_staff=True)
+        try:
+            results['execute_overhead'] = bench_execute_overhead(iterations)
+            for size in sizes:
+                if progress:
+                    progress(size)
+                results['sizes'][str(size)] = bench_size(size, iterations, tuple(questions), user)
+        finally:
+            _delete_bench_rows(user, config)
+    results['finished_at'] = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+    return results
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import ast
+
+
+def validate_candidate(code: str, manifest: dict[str, list[str]]) -> str:
+    """Static checks run before execution; returns the problem or '' when the code looks runnable."""
+    try:
+        tree = ast.parse(code or '')
+    except SyntaxError as exc:
+        return f'syntax error: {exc.msg}'
+    assigns_result = False
+    model_names = {key.split('.', 1)[-1] for key in manifest}
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Assign, ast.AugAssign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            if any(isinstance(t, ast.Name) and t.id == 'result' for t in targets):
+                assigns_result = True
+        elif (
+            isinstance(node, ast.Attribute)
+            and node.attr == 'objects'
+            and isinstance(node.value, ast.Name)
+            and node.value.id not in model_names
+        ):
+            return f'unknown model {node.value.id}'
+    if not assigns_result:
+        return 'result is never assigned'
+    return ''
+
+
+def rank_candidates(
+    candidates: list[dict],
+    manifest: dict[str, list[str]],
+    candidate_models: list[str] | None = None,
+) -> tuple[list[dict], dict]:
+    """
+    Drop duplicate code, validate every candidate and order the valid ones for execution:
+    code using the router's primary model first, then provider order. Invalid candidates are
+    only returned (in order) when none is valid, so execution still reports a real error.
+    Each candidate's ``code`` is the form to validate (already autofixed by the caller).
+    """
+    primary = (candidate_models or [''])[0].split('.', 1)[-1]
+    seen, valid, invalid = set(), [], []
+    for index, item in enumerate(candidates):
+        code = (item.get('code') or '').strip()
+        if code in seen:
+            continue
+        seen.add(code)
+        problem = validate_candidate(code, manifest)
+        item = dict(item, index=index, problem=problem)
+        (invalid if problem else valid).append(item)
+    valid.sort(key=lambda item: (not (primary and f'{primary}.objects' in item['code']), item['index']))
+    stats = {'generated': len(candidates), 'unique': len(seen), 'valid': len(valid)}
+    return (valid or invalid), stats
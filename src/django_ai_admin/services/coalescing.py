@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+
+from django.core.cache import caches
+
+from ..conf import get_coalescing_cache, get_coalescing_enabled, get_coalescing_wait_sec
+from .manifest import get_manifest_hash
+from .metrics import COALESCED
+
+CACHE_PREFIX = 'ai_admin:coalesce:'
+RESULT_TTL_SEC = 30
+POLL_INTERVAL_SEC = 0.1
+
+
+def coalescing_key(question: str, candidate_models: list[str], context: dict | None = None) -> str | None:
+    """
+    Identity of a DATA_QUERY run, or None when coalescing is off. The chat context that goes into
+    the generation prompt is part of it, so follow-ups in different conversations never share a run.
+    """
+    if not get_coalescing_enabled():
+        return None
+    normalized = ' '.join((question or '').lower().split())
+    ctx = context or {}
+    chat_context = [(ctx.get('summary') or '').strip(), (ctx.get('current_topic') or '').strip(), ctx.get('turns') or []]
+    raw = json.dumps([normalized, list(candidate_models or []), get_manifest_hash(), chat_context])
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32]
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.outcome: dict | None = None
+
+
+class SingleFlight:
+    """In-process single-flight: the first caller for a key runs, later ones wait for its outcome."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: dict[str, _Flight] = {}
+
+    def join(self, key: str) -> tuple[_Flight, bool]:
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                return flight, False
+            flight = self._flights[key] = _Flight()
+            return flight, True
+
+    def finish(self, key: str, flight: _Flight) -> None:
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.done.set()
+
+
+_flights = SingleFlight()
+
+
+def run_coalesced(key: str | None, fn, timer) -> tuple[dict, str]:
+    """
+    Run ``fn`` once per key across concurrent callers and return ``(outcome, role)``.
+    ``role`` is 'follower' when the outcome came from another caller's run, '' otherwise.
+    A follower whose leader failed or took longer than COALESCING_WAIT_SEC runs ``fn`` itself.
+    """
+    if key is None:
+        return fn(), ''
+    flight, leader = _flights.join(key)
+    if not leader:
+        with timer.stage('coalesced_wait'):
+            flight.done.wait(get_coalescing_wait_sec())
+        if flight.outcome is not None:
+            COALESCED.inc(role='follower')
+            return flight.outcome, 'follower'
+        COALESCED.inc(role='fallback')
+        return fn(), ''
+    try:
+        flight.outcome, role = _run_shared(key, fn, timer)
+        return flight.outcome, role
+    finally:
+        _flights.finish(key, flight)
+
+
+def _shared_cache():
+    alias = get_coalescing_cache()
+    return caches[alias] if alias else None
+
+
+def _run_shared(key: str, fn, timer) -> tuple[dict, str]:
+    """Cross-process step: ``cache.add`` elects one leader per key among all processes."""
+    cache = _shared_cache()
+    if cache is None:
+        COALESCED.inc(role='leader')
+        return fn(), ''
+    lock_key = f'{CACHE_PREFIX}{key}:lock'
+    result_key = f'{CACHE_PREFIX}{key}:result'
+    wait_sec = get_coalescing_wait_sec()
+    if not cache.add(lock_key, 1, timeout=max(1, int(wait_sec))):
+        with timer.stage('coalesced_wait'):
+            outcome = _wait_for_result(cache, lock_key, result_key, wait_sec)
+        if outcome is not None:
+            COALESCED.inc(role='follower')
+            return outcome, 'follower'
+        COALESCED.inc(role='fallback')
+        return fn(), ''
+    COALESCED.inc(role='leader')
+    try:
+        outcome = fn()
+        cache.set(result_key, outcome, timeout=RESULT_TTL_SEC)
+        return outcome, ''
+    finally:
+        cache.delete(lock_key)
+
+
+def _wait_for_result(cache, lock_key: str, result_key: str, wait_sec: float) -> dict | None:
+    deadline = time.monotonic() + wait_sec
+    while time.monotonic() < deadline:
+        outcome = cache.get(result_key)
+        if outcome is not None:
+            return outcome
+        if cache.get(lock_key) is None:
+            # The leader finished without publishing (it failed): one last look, then run locally.
+            return cache.get(result_key)
+        time.sleep(POLL_INTERVAL_SEC)
+    return None
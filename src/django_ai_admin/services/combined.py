@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import json
+import logging
+
+from django.utils import timezone
+
+from .endpoints import get_llm_config, is_llm_configured
+from .intent_router import IntentDecision, _build_router_messages, _extract_json_object, _normalize_decision
+from .llm_client import ORM_CODE_RULES, _context_snippet, _extract_parts
+from .prompt_budget import PromptBudget, Section
+from .transport import post_chat_completion
+
+logger = logging.getLogger('app')
+
+COMBINED_INSTRUCTIONS = (
+    '\n\nYou also write the ORM code for DATA_QUERY in the same answer. '
+    'For DATA_QUERY add three more keys to the JSON object: '
+    '"summary" (one concise line without hedging), "explanation" (one short paragraph) and '
+    '"code" (Python that assigns a variable named result, without code fences). '
+    'Use model classes directly by name (User.objects...), never app_label.Model. '
+    + ORM_CODE_RULES
+    + ' For other labels leave summary, explanation and code empty.'
+)
+
+
+def _build_combined_messages(
+    question: str,
+    manifest: dict[str, list[str]],
+    pending_clarification: dict | None,
+    current_topic: str,
+    context: dict | None,
+    prompt: PromptBudget | None = None,
+) -> list[dict]:
+    prompt = prompt or PromptBudget('route_generate')
+    messages = _build_router_messages(
+        question=question,
+        manifest=manifest,
+        pending_clarification=pending_clarification,
+        current_topic=current_topic,
+        prompt=prompt,
+    )
+    messages[0]['content'] += COMBINED_INSTRUCTIONS
+    prompt.take(Section('rules', COMBINED_INSTRUCTIONS, required=True))
+    ctx = _context_snippet(context, prompt)
+    if ctx:
+        payload = json.loads(messages[1]['content'])
+        payload['conversation'] = ctx
+        messages[1]['content'] = json.dumps(payload, ensure_ascii=False)
+    return messages
+
+
+def _generation_from(raw: dict) -> dict | None:
+    code = str(raw.get('code') or '').strip()
+    if not code:
+        return None
+    if '```' not in code:
+        code = f'```python\n{code}\n```'
+    content = '\n'.join(part for part in (
+        str(raw.get('summary') or '').strip(),
+        str(raw.get('explanation') or '').strip(),
+        code,
+    ) if part)
+    summary, explanation, code = _extract_parts(content)
+    if not code:
+        return None
+    return {
+        'summary': summary,
+        'explanation': explanation,
+        'code': code,
+        'raw': content,
+        'created_at': timezone.now().isoformat(),
+    }
+
+
+def route_and_generate(
+    question: str,
+    manifest: dict[str, list[str]],
+    pending_clarification: dict | None = None,
+    current_topic: str = '',
+    context: dict | None = None,
+) -> tuple[IntentDecision | None, dict | None]:
+    """
+    Route and, for data queries, generate ORM code in one LLM call.
+    Returns (None, None) when the reply cannot be used, so the caller falls back to
+    ``route_intent`` + ``chat_generate_orm``; a DATA_QUERY without usable code returns (decision, None).
+    """
+    cfg = get_llm_config('route_generate')
+    if not is_llm_configured(cfg):
+        return None, None
+    text = (question or '').strip()
+    prompt = PromptBudget('route_generate')
+    messages = _build_combined_messages(text, manifest, pending_clarification, current_topic, context, prompt)
+    prompt.report()
+    payload = {
+        'model': cfg.model,
+        'temperature': cfg.temperature,
+        'max_tokens': max(cfg.max_tokens, 420),
+        'messages': messages,
+    }
+    try:
+        data = post_chat_completion(payload, cfg, purpose='route_generate', error_prefix='combined llm error')
+    except Exception as exc:
+        logger.warning('ai_admin combined routing failed: %s', exc)
+        return None, None
+    content = data.get('choices', [{}])[0].get('message', {}).get('content', '') or ''
+    raw = _extract_json_object(content)
+    if not raw or not str(raw.get('label') or '').strip():
+        return None, None
+    decision = _normalize_decision(raw, text, manifest)
+    if decision.label != 'DATA_QUERY':
+        return decision, None
+    return decision, _generation_from(raw)
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import contextvars
+import random
+
+from ..conf import get_openai_base_url
+from ..models import AIConfig
+from .mock_llm import MOCK_PROVIDER, is_mock_provider
+from .provider_health import get_endpoint_health
+
+DEFAULT_LATENCY_MS = 1000.0
+LLM_PURPOSES = ('router', 'route_generate', 'generation', 'summary', 'title')
+
+# Active AIConfig rows loaded by the last ``get_llm_config`` in this context; copied into
+# LLM worker threads with the rest of the context, so failover never queries from a worker.
+_active_endpoints: contextvars.ContextVar[list[AIConfig] | None] = contextvars.ContextVar(
+    'ai_admin_active_endpoints', default=None,
+)
+
+
+def is_llm_configured(cfg: AIConfig | None) -> bool:
+    return bool(cfg and cfg.model and (cfg.api_key or is_mock_provider(cfg)))
+
+
+def serves(cfg: AIConfig, purpose: str | None) -> bool:
+    allowed = {item.strip().lower() for item in (cfg.purposes or '').split(',') if item.strip()}
+    return not allowed or not purpose or purpose in allowed
+
+
+def chat_completions_url(cfg: AIConfig) -> str:
+    base = (cfg.base_url or '').strip().rstrip('/') or get_openai_base_url()
+    return f'{base}/chat/completions'
+
+
+def endpoint_key(cfg: AIConfig) -> str:
+    """Circuit breaker and latency key: one per AIConfig row."""
+    target = MOCK_PROVIDER if is_mock_provider(cfg) else chat_completions_url(cfg)
+    return f'{cfg.pk}:{target}' if cfg.pk else target
+
+
+def get_llm_config(purpose: str | None = None) -> AIConfig | None:
+    """
+    Newest active, configured AIConfig serving ``purpose``. Its model and limits shape the
+    payload; ``post_chat_completion`` then spreads calls over every endpoint serving the purpose.
+    """
+    rows = [cfg for cfg in AIConfig.objects.filter(is_active=True).order_by('-updated_at') if is_llm_configured(cfg)]
+    _active_endpoints.set(rows)
+    return next((cfg for cfg in rows if serves(cfg, purpose)), None)
+
+
+def route_endpoints(purpose: str, cfg: AIConfig) -> list[AIConfig]:
+    """
+    Endpoints to try for one call, in order. Endpoints with weight draw their position at random,
+    proportional to weight divided by smoothed latency; weight 0 endpoints are failover only and
+    endpoints with an open circuit go last.
+    """
+    pool = [row for row in (_active_endpoints.get() or []) if serves(row, purpose)]
+    if not any(row.pk == cfg.pk for row in pool):
+        pool.insert(0, cfg)
+    if len(pool) == 1:
+        return pool
+    health = {id(row): get_endpoint_health(endpoint_key(row)) for row in pool}
+    known = [h.latency_ms for h in health.values() if h.latency_ms]
+    fallback_ms = sum(known) / len(known) if known else DEFAULT_LATENCY_MS
+
+    def sort_key(row: AIConfig):
+        h = health[id(row)]
+        score = row.weight * 1000.0 / max(h.latency_ms or fallback_ms, 1.0)
+        # Efraimidis-Spirakis: sorting by u ** (1 / score) is a weighted shuffle.
+        draw = random.random() ** (1.0 / score) if score > 0 else 0.0
+        return (h.retry_in() > 0, row.weight == 0, -draw)
+
+    return sorted(pool, key=sort_key)
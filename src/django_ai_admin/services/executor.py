@@ -1,4 +1,6 @@
 import json
+from contextlib import nullcontext
+from time import perf_counter
 import builtins as _builtins
 from datetime import date, datetime, time, timedelta
 from django.db import connection, transaction
@@ -8,6 +10,10 @@ from django.utils import timezone
 from django.db.models import Q, F, Count
 from django.db.models.functions import TruncMonth, ExtractMonth, ExtractYear
 
+from .admission import admit
+from .metrics import EXECUTE_DURATION, EXECUTE_ROWS
+from .tracing import current_span, is_recording
+
 
 def _safe_builtins():
     return {
@@ -89,6 +95,29 @@ def _to_jsonable(value, max_rows):
 
 
 def execute(code, max_rows=100, statement_timeout_ms=5000):
+    with admit('execute'):
+        t0 = perf_counter()
+        try:
+            res = _execute(code, max_rows=max_rows, statement_timeout_ms=statement_timeout_ms)
+        except Exception:
+            EXECUTE_DURATION.observe(perf_counter() - t0, status='error')
+            raise
+    EXECUTE_DURATION.observe(perf_counter() - t0, status='ok')
+    EXECUTE_ROWS.observe(res['rows'])
+    current_span().set_attributes(rows=res['rows'], truncated=res['truncated'], sql_count=res.get('sql_count', 0))
+    return res
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def _execute(code, max_rows=100, statement_timeout_ms=5000):
     safe_globals = {'__builtins__': _safe_builtins()}
     safe_globals.update(_model_globals())
     safe_globals.update({
@@ -103,16 +132,22 @@ def execute(code, max_rows=100, statement_timeout_ms=5000):
         'ExtractYear': ExtractYear,
     })
     safe_locals = {}
-    with transaction.atomic():
-        with connection.cursor() as cur:
-            cur.execute('SET LOCAL transaction_read_only = on')
-            cur.execute(f'SET LOCAL statement_timeout = {int(statement_timeout_ms)}')
-        exec(code, safe_globals, safe_locals)
-    result = safe_locals.get('result')
-    jsonable, truncated = _to_jsonable(result, max_rows)
+    counter = _QueryCounter() if is_recording() else None
+    with connection.execute_wrapper(counter) if counter else nullcontext():
+        with transaction.atomic():
+            with connection.cursor() as cur:
+                cur.execute('SET LOCAL transaction_read_only = on')
+                cur.execute(f'SET LOCAL statement_timeout = {int(statement_timeout_ms)}')
+            exec(code, safe_globals, safe_locals)
+        result = safe_locals.get('result')
+        jsonable, truncated = _to_jsonable(result, max_rows)
     rows = 1
     if isinstance(jsonable, list):
         rows = len(jsonable)
     if isinstance(jsonable, dict):
         rows = len(jsonable)
-    return {'result': jsonable, 'rows': rows, 'truncated': truncated}
+    res = {'result': jsonable, 'rows': rows, 'truncated': truncated}
+    if counter:
+        # The two SET LOCAL statements are setup, not generated queries.
+        res['sql_count'] = max(0, counter.count - 2)
+    return res
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import logging
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+
+from ..conf import get_few_shot_examples, get_few_shot_index_size
+from ..models import QueryLog
+from .manifest import get_manifest_hash
+from .metrics import record_cache
+from .prompt_budget import PromptBudget, Section, estimate_tokens
+from .tracing import start_span
+
+logger = logging.getLogger('app')
+
+_TERM_RE = re.compile(r'[^\W_]+')
+# BM25 saturation and length normalization.
+K1 = 1.2
+B = 0.75
+
+
+def _terms(text: str) -> list[str]:
+    terms = []
+    for word in _TERM_RE.findall((text or '').lower()):
+        if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+@dataclass(frozen=True)
+class Example:
+    id: int
+    question: str
+    code: str
+    models: tuple[str, ...]
+    manifest_hash: str
+    terms: Counter
+    length: int
+
+
+class FewShotIndex:
+    """
+    In-process BM25 index over successful ``(question, orm_code)`` pairs from ``QueryLog``.
+    ``refresh`` pulls rows newer than the last indexed id, so the index grows incrementally;
+    past ``max_size`` the oldest examples are evicted. A newer log of the same question and
+    code replaces the older one.
+    """
+
+    def __init__(self, max_size: int = 5000):
+        self.max_size = max(1, int(max_size))
+        self._docs: OrderedDict[int, Example] = OrderedDict()
+        self._postings: dict[str, set[int]] = {}
+        self._by_pair: dict[tuple[str, str], int] = {}
+        self._total_length = 0
+        self._last_id = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, log_id: int, question: str, code: str, models=(), manifest_hash: str = '') -> None:
+        terms = Counter(_terms(question))
+        if not terms or not code.strip():
+            return
+        example = Example(log_id, question, code, tuple(models), manifest_hash, terms, sum(terms.values()))
+        pair = (' '.join(_terms(question)), code.strip())
+        with self._lock:
+            self._last_id = max(self._last_id, log_id)
+            if log_id in self._docs:
+                return
+            previous = self._by_pair.get(pair)
+            if previous is not None:
+                self._remove(previous)
+            self._docs[log_id] = example
+            self._by_pair[pair] = log_id
+            self._total_length += example.length
+            for term in terms:
+                self._postings.setdefault(term, set()).add(log_id)
+            while len(self._docs) > self.max_size:
+                self._remove(next(iter(self._docs)))
+
+    def _remove(self, log_id: int) -> None:
+        example = self._docs.pop(log_id)
+        self._by_pair.pop((' '.join(_terms(example.question)), example.code.strip()), None)
+        self._total_length -= example.length
+        for term in example.terms:
+            ids = self._postings.get(term)
+            if ids is not None:
+                ids.discard(log_id)
+                if not ids:
+                    del self._postings[term]
+
+    def refresh(self) -> int:
+        """Index successful DATA_QUERY logs written since the last refresh; returns how many were read."""
+        rows = list(
+            QueryLog.objects.filter(id__gt=self._last_id, route='DATA_QUERY', error='')
+            .exclude(orm_code='')
+            .order_by('-id')
+            .values_list('id', 'question', 'orm_code', 'query_meta')[: self.max_size]
+        )
+        for log_id, question, code, meta in reversed(rows):
+            meta = meta if isinstance(meta, dict) else {}
+            self.add(log_id, question, code, meta.get('candidate_models') or (), str(meta.get('manifest_hash') or ''))
+        return len(rows)
+
+    def search(
+        self,
+        question: str,
+        candidate_models: list[str] | None = None,
+        manifest_hash: str = '',
+        k: int = 3,
+    ) -> list[Example]:
+        """
+        Top ``k`` examples by BM25 score of their question against ``question``. Only examples
+        logged under ``manifest_hash`` and, when ``candidate_models`` are given, routed to one of
+        them are eligible. Examples repeating already chosen code are skipped.
+        """
+        query = set(_terms(question))
+        wanted = set(candidate_models or ())
+        with self._lock:
+            count = len(self._docs)
+            if not count or not query:
+                return []
+            avg_length = self._total_length / count
+            scores: Counter = Counter()
+            for term in query:
+                ids = self._postings.get(term)
+                if not ids:
+                    continue
+                idf = math.log(1 + (count - len(ids) + 0.5) / (len(ids) + 0.5))
+                for log_id in ids:
+                    example = self._docs[log_id]
+                    if manifest_hash and example.manifest_hash != manifest_hash:
+                        continue
+                    if wanted and not wanted.intersection(example.models):
+                        continue
+                    tf = example.terms[term]
+                    scores[log_id] += idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * example.length / avg_length))
+            ranked = [self._docs[log_id] for log_id, _ in sorted(scores.items(), key=lambda item: (-item[1], -item[0]))]
+        chosen, codes = [], set()
+        for example in ranked:
+            if example.code in codes:
+                continue
+            chosen.append(example)
+            codes.add(example.code)
+            if len(chosen) >= k:
+                break
+        return chosen
+
+
+_index: FewShotIndex | None = None
+_index_lock = threading.Lock()
+
+
+def get_few_shot_index() -> FewShotIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = FewShotIndex(max_size=get_few_shot_index_size())
+    return _index
+
+
+def few_shot_examples(question: str, candidate_models: list[str] | None = None) -> list[Example]:
+    """Past successful queries similar to ``question`` for the generation prompt; empty when disabled."""
+    k = get_few_shot_examples()
+    if not k:
+        return []
+    with start_span('few_shot.search', k=k) as span:
+        index = get_few_shot_index()
+        try:
+            index.refresh()
+        except Exception:
+            logger.exception('ai_admin few-shot index refresh failed')
+        examples = index.search(question, candidate_models, get_manifest_hash(), k)
+        span.set_attributes(indexed=len(index), found=len(examples))
+    record_cache('few_shot', bool(examples))
+    return examples
+
+
+def render_examples(examples: list[Example], prompt: PromptBudget) -> str:
+    """Whole examples, best first, as many as fit what the budget has left; never cut mid-code."""
+    header = 'Similar questions answered successfully before (adapt, do not copy blindly):'
+    blocks = []
+    used = estimate_tokens(header) + 1
+    remaining = prompt.remaining
+    for example in examples:
+        block = f'Q: {example.question}\n```python\n{example.code}\n```'
+        cost = estimate_tokens(block) + 1
+        if remaining is not None and used + cost > remaining:
+            break
+        blocks.append(block)
+        used += cost
+    if len(blocks) < len(examples):
+        prompt.trimmed.append({'section': 'examples', 'dropped_lines': len(examples) - len(blocks), 'kept_tokens': used})
+    if not blocks:
+        return ''
+    return prompt.take(Section('examples', '\n'.join([header, *blocks]), required=True))
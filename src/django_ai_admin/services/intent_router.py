@@ -4,10 +4,11 @@ import json
 import re
 from dataclasses import dataclass, field
 
-import requests
-
-from ..conf import get_openai_chat_completions_url
 from ..models import AIConfig
+from .endpoints import get_llm_config, is_llm_configured
+from .manifest import manifest_hash_for
+from .prompt_budget import TURN_SHARE, PromptBudget, Section, estimate_tokens
+from .transport import post_chat_completion
 
 
 VALID_LABELS = {'DATA_QUERY', 'CLARIFICATION', 'OUT_OF_SCOPE', 'GENERAL_HELP'}
@@ -25,9 +26,9 @@ class IntentDecision:
     normalized_query: str = ''
 
 
-def _manifest_snippet(manifest: dict[str, list[str]], max_models: int = 200, max_fields: int = 30) -> str:
+def _manifest_snippet(manifest: dict[str, list[str]], max_fields: int = 30) -> str:
     lines = []
-    for model_key in sorted(manifest.keys())[:max_models]:
+    for model_key in sorted(manifest.keys()):
         fields = manifest.get(model_key) or []
         lines.append(f"{model_key}: {', '.join(fields[:max_fields])}")
     return '\n'.join(lines)
@@ -205,6 +206,11 @@ def _prioritize_candidate_models(question: str, candidate_models: list[str], man
     return ordered[:limit]
 
 
+def prerank_candidate_models(question: str, manifest: dict[str, list[str]], limit: int = 4) -> list[str]:
+    """Models the question names directly, ranked locally without an LLM call."""
+    return _prioritize_candidate_models((question or '').strip(), [], manifest, limit=limit)
+
+
 def _prioritize_options(options: list[dict], candidate_models: list[str], limit: int = 4) -> list[dict]:
     if not options:
         options = []
@@ -253,19 +259,13 @@ def _post_router_completion(cfg: AIConfig, messages: list[dict]) -> str:
         'max_tokens': min(420, max(180, cfg.max_tokens)),
         'messages': messages,
     }
-    headers = {
-        'Authorization': f'Bearer {cfg.api_key}',
-        'Content-Type': 'application/json',
-    }
-    response = requests.post(
-        get_openai_chat_completions_url(),
-        headers=headers,
-        data=json.dumps(payload),
+    data = post_chat_completion(
+        payload,
+        cfg,
+        purpose='router',
         timeout=min(cfg.timeout_sec, 20),
+        error_prefix='router llm error',
     )
-    if response.status_code != 200:
-        raise RuntimeError(f'router llm error {response.status_code}')
-    data = response.json()
     return data.get('choices', [{}])[0].get('message', {}).get('content', '') or ''
 
 
@@ -274,6 +274,7 @@ def _build_router_messages(
     manifest: dict[str, list[str]],
     pending_clarification: dict | None = None,
     current_topic: str = '',
+    prompt: PromptBudget | None = None,
 ) -> list[dict]:
     internal_app_label = INTERNAL_APP_LABEL
     system = (
@@ -301,21 +302,50 @@ def _build_router_messages(
         '"normalized_query":"..."'
         '}\n'
         'If no clarification is needed, use empty clarification_question/options.\n'
-        'If normalized_query is not needed, repeat the original question.'
+        'If normalized_query is not needed, repeat the original question.\n\n'
+        'Manifest (30 fields per model at most):\n'
     )
+    prompt = prompt or PromptBudget('router')
+    # The manifest lives in the system message so the prefix is byte-stable across questions.
+    system += _router_manifest(manifest, prompt, estimate_tokens(system))
     user_payload = {
         'question': (question or '').strip(),
         'current_topic': current_topic or '',
         'pending_clarification': pending_clarification or None,
-        'manifest_note': 'Manifest is clipped to 200 models and 30 fields per model.',
-        'manifest': _manifest_snippet(manifest, max_models=200, max_fields=30),
     }
+    user_content = json.dumps(user_payload, ensure_ascii=False)
+    prompt.take(Section('question', user_content, required=True))
     return [
         {'role': 'system', 'content': system},
-        {'role': 'user', 'content': json.dumps(user_payload, ensure_ascii=False)},
+        {'role': 'user', 'content': user_content},
     ]
 
 
+_router_manifest_cache: tuple = (None, None)
+
+
+def _router_manifest(manifest: dict[str, list[str]], prompt: PromptBudget, rules_tokens: int) -> str:
+    """
+    Manifest part of the router prefix, clipped to a fixed share of the budget. Memoized by
+    manifest hash and budget so the (large) snippet is not rebuilt and re-estimated on every turn.
+    """
+    global _router_manifest_cache
+    cached_key, cached = _router_manifest_cache
+    key = (manifest_hash_for(manifest), prompt.budget, rules_tokens)
+    if cached_key != key:
+        sizing = PromptBudget(prompt.purpose, prompt.budget)
+        sizing.charge(rules_tokens)
+        limit = max(0, int(prompt.budget * (1 - TURN_SHARE)) - rules_tokens) if prompt.budget else None
+        text = sizing.take(Section('manifest', _manifest_snippet(manifest, max_fields=30)), limit=limit)
+        if sizing.trimmed:
+            text += '\n(more models omitted to fit the prompt budget)'
+        cached = (text, estimate_tokens(text) + rules_tokens, tuple(sizing.trimmed))
+        _router_manifest_cache = (key, cached)
+    text, tokens, trimmed = cached
+    prompt.charge(tokens, trimmed)
+    return text
+
+
 def _normalize_decision(raw: dict, question: str, manifest: dict[str, list[str]]) -> IntentDecision:
     manifest_keys = set(manifest.keys())
     label = str(raw.get('label') or '').strip().upper()
@@ -358,19 +388,67 @@ def _classify_with_ai(
     pending_clarification: dict | None = None,
     current_topic: str = '',
 ) -> dict:
-    cfg = AIConfig.objects.order_by('-updated_at').first()
-    if not cfg or not cfg.api_key or not cfg.model:
+    cfg = get_llm_config('router')
+    if not is_llm_configured(cfg):
         raise RuntimeError('router ai not configured')
+    prompt = PromptBudget('router')
     messages = _build_router_messages(
         question=question,
         manifest=manifest,
         pending_clarification=pending_clarification,
         current_topic=current_topic,
+        prompt=prompt,
     )
+    prompt.report()
     content = _post_router_completion(cfg, messages)
     return _extract_json_object(content)
 
 
+_OPTION_PREFIX_RE = re.compile(r'^(?:option|choice|number|no\.?|#)\s*', re.I)
+
+
+def _reply_key(value: str) -> str:
+    text = (value or '').strip().strip('`"\'').rstrip('.,;:!?)').strip()
+    return _OPTION_PREFIX_RE.sub('', text).strip().lower()
+
+
+def resolve_clarification_reply(
+    question: str,
+    pending_clarification: dict | None,
+    manifest: dict[str, list[str]],
+) -> IntentDecision | None:
+    """
+    Match a reply to a pending clarification ("1", "option 2", "app.Payment", "Payment") against its
+    options by id, label, model key or unique model name. A match becomes a DATA_QUERY for the
+    original question on the chosen model without calling the router; anything else returns None.
+    """
+    if not isinstance(pending_clarification, dict):
+        return None
+    options = [o for o in pending_clarification.get('options') or [] if isinstance(o, dict) and o.get('model')]
+    base_question = str(pending_clarification.get('base_question') or '').strip()
+    reply = _reply_key(question)
+    if not options or not base_question or not reply:
+        return None
+    chosen = None
+    for option in options:
+        keys = {_reply_key(str(option.get(field) or '')) for field in ('id', 'label', 'model')}
+        if reply in keys:
+            chosen = option
+            break
+    if chosen is None:
+        by_name = [o for o in options if _split_model_key(str(o['model']))[1].lower() == reply]
+        chosen = by_name[0] if len(by_name) == 1 else None
+    if chosen is None or chosen['model'] not in manifest:
+        return None
+    return IntentDecision(
+        label='DATA_QUERY',
+        confidence=1.0,
+        reason='clarification_resolved',
+        candidate_models=[chosen['model']],
+        normalized_query=base_question,
+    )
+
+
 def route_intent(
     question: str,
     manifest: dict[str, list[str]],
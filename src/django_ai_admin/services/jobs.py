@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import timedelta
+
+from django.db import connection, connections
+from django.db.models import F
+from django.utils import timezone
+
+from ..conf import get_job_max_attempts, get_job_stale_sec
+from ..models import MessageJob
+from .response_contract import build_envelope
+from .timing import StageTimer
+from .tracing import start_trace
+from .usage import collect_usage
+
+logger = logging.getLogger('app')
+
+FINISHED_STATUSES = ('done', 'failed')
+POLL_INTERVAL_SEC = 0.25
+
+
+def enqueue_message_job(chat, user, content: str, trace_id: str) -> MessageJob:
+    return MessageJob.objects.create(chat=chat, user=user, content=content, trace_id=trace_id)
+
+
+def job_envelope(job: MessageJob) -> tuple[dict, int]:
+    """The stored turn response for finished jobs, otherwise a 202 progress envelope."""
+    if job.status in FINISHED_STATUSES and job.result is not None:
+        return job.result, job.status_code or 200
+    return build_envelope(
+        job.status,
+        '',
+        data={'job_id': job.id, 'status': job.status},
+        meta={'chat_id': job.chat_id, 'trace_id': job.trace_id},
+    ), 202
+
+
+def wait_for_job(job_id: int, user, timeout: float) -> MessageJob | None:
+    """Long-poll: re-read the job until it finishes or ``timeout`` seconds pass."""
+    deadline = time.monotonic() + max(0.0, timeout)
+    while True:
+        job = MessageJob.objects.filter(pk=job_id, user=user).first()
+        remaining = deadline - time.monotonic()
+        if job is None or job.status in FINISHED_STATUSES or remaining <= 0:
+            return job
+        time.sleep(min(POLL_INTERVAL_SEC, remaining))
+
+
+def worker_name() -> str:
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim_next_job(worker: str) -> MessageJob | None:
+    """
+    Take the oldest queued job. The conditional UPDATE is the lock: when several workers
+    race for a job only one update matches, and the others move on to the next candidate.
+    """
+    candidates = MessageJob.objects.filter(status='queued').order_by('created_at', 'id').values_list('id', flat=True)
+    for job_id in candidates[:10]:
+        claimed = MessageJob.objects.filter(pk=job_id, status='queued').update(
+            status='running',
+            worker=worker,
+            started_at=timezone.now(),
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return MessageJob.objects.select_related('chat', 'user').get(pk=job_id)
+    return None
+
+
+def requeue_stale_jobs() -> int:
+    """
+    Jobs left running by a worker that died are queued again, or failed after JOB_MAX_ATTEMPTS.
+    A live worker refreshes ``started_at`` while its job runs, so only jobs without a recent
+    heartbeat count as stale.
+    """
+    now = timezone.now()
+    stale = MessageJob.objects.filter(status='running', started_at__lt=now - timedelta(seconds=get_job_stale_sec()))
+    max_attempts = get_job_max_attempts()
+    failed = 0
+    for job in stale.filter(attempts__gte=max_attempts):
+        _fail(job, 'worker lost')
+        failed += 1
+    return failed + stale.filter(attempts__lt=max_attempts).update(status='queued', worker='')
+
+
+class _Heartbeat(threading.Thread):
+    """Refreshes ``started_at`` of a running job every third of JOB_STALE_SEC until stopped."""
+
+    def __init__(self, job: MessageJob):
+        super().__init__(name=f'ai-admin-job-{job.pk}-heartbeat', daemon=True)
+        self.job = job
+        self.interval = max(1.0, get_job_stale_sec() / 3)
+        self._done = threading.Event()
+
+    def beat(self) -> bool:
+        return bool(
+            MessageJob.objects.filter(pk=self.job.pk, status='running', worker=self.job.worker)
+            .update(started_at=timezone.now())
+        )
+
+    def run(self) -> None:
+        beaten = False
+        try:
+            while not self._done.wait(self.interval):
+                beaten = True
+                try:
+                    if not self.beat():
+                        break
+                except Exception:
+                    logger.exception('ai_admin job %s heartbeat failed', self.job.pk)
+        finally:
+            # Only this thread's own connection, and only when a beat opened it.
+            if beaten:
+                connection.close()
+
+    def stop(self) -> None:
+        self._done.set()
+        self.join()
+
+
+def _save_result(job: MessageJob, fields: list[str]) -> bool:
+    """
+    Store the outcome only while the job is still ours: a job requeued to another worker
+    keeps that worker's result.
+    """
+    saved = MessageJob.objects.filter(pk=job.pk, status='running', worker=job.worker).update(
+        **{field: getattr(job, field) for field in fields}
+    )
+    if not saved:
+        logger.warning('ai_admin job %s was taken over before worker %s finished it', job.pk, job.worker)
+    return bool(saved)
+
+
+def _fail(job: MessageJob, error: str) -> None:
+    job.status = 'failed'
+    job.error = error
+    job.status_code = 500
+    job.result = build_envelope(
+        'error',
+        'Something went wrong while processing the message. Please try again.',
+        data={'error_code': 'job_failed'},
+        meta={'chat_id': job.chat_id, 'trace_id': job.trace_id},
+    )
+    job.finished_at = timezone.now()
+    _save_result(job, ['status', 'error', 'status_code', 'result', 'finished_at'])
+
+
+def run_job(job: MessageJob) -> MessageJob:
+    from ..views import ChatMessageView
+
+    timer = StageTimer()
+    timer.record('queue_wait', (job.started_at - job.created_at).total_seconds() * 1000)
+    heartbeat = _Heartbeat(job)
+    heartbeat.start()
+    try:
+        with collect_usage() as usage, start_trace(job.trace_id, chat_id=job.chat_id, user_id=job.user_id):
+            response = ChatMessageView().run_turn(
+                job.user, job.chat, job.content, usage, job.trace_id, timezone.now(), timer,
+            )
+    except Exception as exc:
+        logger.exception('ai_admin job %s failed', job.pk)
+        _fail(job, str(exc) or type(exc).__name__)
+        return job
+    finally:
+        heartbeat.stop()
+    job.status = 'done'
+    job.result = response.data
+    job.status_code = response.status_code
+    job.finished_at = timezone.now()
+    _save_result(job, ['status', 'result', 'status_code', 'finished_at'])
+    return job
+
+
+def _recycle_connections() -> None:
+    """
+    ``close_old_connections`` for a loop outside the request cycle, except that a connection
+    inside an atomic block is left open: closing it would break the caller's transaction.
+    """
+    for conn in connections.all(initialized_only=True):
+        if not conn.in_atomic_block:
+            conn.close_if_unusable_or_obsolete()
+
+
+def run_worker(worker: str = '', once: bool = False, sleep_sec: float = 1.0, max_jobs: int = 0, stop=None) -> int:
+    """
+    Process queued jobs one at a time; run more worker processes to scale.
+    ``once`` exits when the queue is empty, ``stop`` is an Event checked between jobs.
+    """
+    worker = worker or worker_name()
+    processed = 0
+    while not (stop is not None and stop.is_set()):
+        _recycle_connections()
+        requeue_stale_jobs()
+        job = claim_next_job(worker)
+        if job is None:
+            if once:
+                break
+            if stop is not None:
+                stop.wait(sleep_sec)
+            else:
+                time.sleep(sleep_sec)
+            continue
+        run_job(job)
+        processed += 1
+        if max_jobs and processed >= max_jobs:
+            break
+    _recycle_connections()
+    return processed
@@ -1,39 +1,54 @@
 import json
 import re
+from dataclasses import dataclass
+from functools import lru_cache
 
-import requests
 from django.utils import timezone
 
-from ..conf import get_openai_chat_completions_url
+from ..conf import get_generation_candidates_mode
 from ..models import AIConfig
-from .manifest import get_manifest
+from .endpoints import get_llm_config, is_llm_configured
+from .few_shot import few_shot_examples, render_examples
+from .manifest import get_manifest, get_manifest_hash
+from .prompt_budget import TURN_SHARE, PromptBudget, Section
+from .result_digest import build_result_digest, dumps_digest
+from .transport import post_chat_completion
+from .workers import submit_in_context
+
+
+MAX_FIELDS_PER_MODEL = 30
 
 
 def _manifest_snippet() -> str:
     manifest = get_manifest()
-    lines = []
-    for model_key, fields in sorted(manifest.items()):
-        lines.append(f"{model_key}: {', '.join(fields[:30])}")
-    # Important: currently clipped to 200 models / 30 fields per model.
-    return '\n'.join(lines[:200])
+    return '\n'.join(
+        f"{model_key}: {', '.join(fields[:MAX_FIELDS_PER_MODEL])}" for model_key, fields in sorted(manifest.items())
+    )
 
 
-def _context_snippet(context: dict | None) -> str:
+def _context_sections(context: dict | None) -> list[Section]:
+    """Conversation context by priority: topic and recent turns before the rolling summary."""
     if not context:
-        return ''
+        return []
     summary = (context.get('summary') or '').strip()
     turns = context.get('turns') or []
     current_topic = (context.get('current_topic') or '').strip()
-    parts = []
+    sections = []
     if summary:
-        parts.append(f"Conversation summary: {summary}")
+        sections.append(Section('summary', f"Conversation summary: {summary}", priority=3, keep='tail'))
     if current_topic:
-        parts.append(f"Current topic hint: {current_topic}")
+        sections.append(Section('current_topic', f"Current topic hint: {current_topic}", priority=2))
     if turns:
         tail = turns[-6:]
         rendered = '\n'.join(f"- {t.get('role')}: {t.get('content')}" for t in tail)
-        parts.append(f"Recent turns:\n{rendered}")
-    return '\n'.join(parts).strip()
+        sections.append(Section('recent_turns', f"Recent turns:\n{rendered}", priority=2, keep='tail'))
+    return sections
+
+
+def _context_snippet(context: dict | None, prompt: PromptBudget | None = None) -> str:
+    sections = _context_sections(context)
+    fitted = (prompt or PromptBudget('generation', 0)).fit(sections)
+    return '\n'.join(fitted[section.name] for section in sections if fitted[section.name]).strip()
 
 
 def _plan_snippet(plan: dict | None) -> str:
@@ -46,30 +61,89 @@ def _plan_snippet(plan: dict | None) -> str:
     return f"Execution plan:\n{payload}"
 
 
-def _system_prompt(context: dict | None = None, plan: dict | None = None, candidate_models: list[str] | None = None) -> str:
-    rules = (
-        'You are a Python/Django ORM expert. '
-        'Answer in three parts: first line is a concise summary without hedging, then an explanation paragraph, then a fenced Python code block that assigns a variable named result. '
-        'Use read-only ORM operations only (filter, annotate, aggregate, values, values_list, count). '
-        'Never write to the database. '
-        'Use only model and field names that exist in the manifest exactly; never invent fields. '
-        'For categorical fields, derive categories from data using distinct/annotate rather than inventing values. '
-        'Limit rows to 100 by default.'
-    )
-    focus = ''
+ORM_CODE_RULES = (
+    'Use read-only ORM operations only (filter, annotate, aggregate, values, values_list, count). '
+    'Never write to the database. '
+    'Use only model and field names that exist in the manifest exactly; never invent fields. '
+    'For categorical fields, derive categories from data using distinct/annotate rather than inventing values. '
+    'Limit rows to 100 by default.'
+)
+
+GENERATION_RULES = (
+    'You are a Python/Django ORM expert. '
+    'Answer in three parts: first line is a concise summary without hedging, then an explanation paragraph, then a fenced Python code block that assigns a variable named result. '
+    + ORM_CODE_RULES
+)
+
+
+@dataclass(frozen=True)
+class _Prefix:
+    text: str
+    tokens: int
+    trimmed: tuple
+    listed: frozenset
+
+
+@lru_cache(maxsize=4)
+def _prefix_for(manifest_hash: str, budget: int) -> _Prefix:
+    prompt = PromptBudget('generation', budget)
+    rules = prompt.take(Section('rules', GENERATION_RULES, required=True))
+    # Sized against a fixed share of the budget, never against the turn, so the prefix stays stable.
+    limit = max(0, int(budget * (1 - TURN_SHARE)) - prompt.used) if budget else None
+    manifest_text = prompt.take(Section('manifest', _manifest_snippet()), limit=limit)
+    text = rules + '\n\nModels and fields available:\n' + manifest_text
+    listed = frozenset(line.split(':', 1)[0] for line in manifest_text.split('\n') if line)
+    return _Prefix(text, prompt.used, tuple(prompt.trimmed), listed)
+
+
+def _generation_prefix(prompt: PromptBudget | None = None) -> _Prefix:
+    """
+    Static head of every generation prompt: rules and as much of the manifest as the budget allows.
+    It stays byte-identical across turns and users (and provider prompt caches can reuse it)
+    until the manifest or the budget changes.
+    """
+    prompt = prompt or PromptBudget('generation')
+    prefix = _prefix_for(get_manifest_hash(), prompt.budget)
+    prompt.charge(prefix.tokens, prefix.trimmed)
+    return prefix
+
+
+def _candidate_schema(candidate_models: list[str], listed: frozenset) -> str:
+    """Field lists of preferred models the prefix left out or clipped."""
+    manifest = get_manifest()
+    lines = []
+    for key in candidate_models:
+        fields = manifest.get(key)
+        if fields and (key not in listed or len(fields) > MAX_FIELDS_PER_MODEL):
+            lines.append(f"{key}: {', '.join(fields)}")
+    return '\n'.join(lines)
+
+
+def _turn_prompt(
+    context: dict | None = None,
+    plan: dict | None = None,
+    candidate_models: list[str] | None = None,
+    prompt: PromptBudget | None = None,
+    listed: frozenset = frozenset(),
+    examples: list | None = None,
+) -> str:
+    """Per-turn part of the generation prompt, sent after the static prefix and fitted into what it left."""
+    prompt = prompt or PromptBudget('generation', 0)
+    sections = []
     if candidate_models:
-        focus = f"\nPreferred models based on routing: {', '.join(candidate_models[:5])}"
-    manifest_text = _manifest_snippet()
-    ctx = _context_snippet(context)
+        focus = f"Preferred models based on routing: {', '.join(candidate_models[:5])}"
+        schema = _candidate_schema(candidate_models[:5], listed)
+        sections.append(Section('candidate_schema', f'{focus}\n{schema}' if schema else focus, priority=1))
+    sections.extend(_context_sections(context))
     plan_text = _plan_snippet(plan)
-    parts = [
-        rules + focus,
-        'Models and fields available:\n' + manifest_text,
-    ]
-    if ctx:
-        parts.append(ctx)
     if plan_text:
-        parts.append(plan_text)
+        sections.append(Section('plan', plan_text, priority=1))
+    fitted = prompt.fit(sections)
+    parts = [fitted[section.name] for section in sections if fitted[section.name]]
+    # Lowest priority: only whole examples, in what the schema and context left.
+    examples_text = render_examples(examples or [], prompt)
+    if examples_text:
+        parts.append(examples_text)
     return '\n\n'.join(parts)
 
 
@@ -91,36 +165,20 @@ def _extract_parts(content: str) -> tuple[str, str, str]:
     return summary, explanation, code
 
 
-def _post_chat_completion(payload: dict, cfg: AIConfig) -> dict:
-    headers = {
-        'Authorization': f'Bearer {cfg.api_key}',
-        'Content-Type': 'application/json',
-    }
-    response = requests.post(
-        get_openai_chat_completions_url(),
-        headers=headers,
-        data=json.dumps(payload),
-        timeout=cfg.timeout_sec,
-    )
-    if response.status_code != 200:
-        raise RuntimeError(f'LLM error {response.status_code}')
-    return response.json()
-
-
-def chat_generate_orm(
+def _generation_payload(
     question: str,
-    prev_code: str | None = None,
-    prev_error: str | None = None,
-    *,
-    context: dict | None = None,
-    plan: dict | None = None,
-    candidate_models: list[str] | None = None,
+    prev_code: str | None,
+    prev_error: str | None,
+    context: dict | None,
+    plan: dict | None,
+    candidate_models: list[str] | None,
+    cfg: AIConfig,
+    examples: list | None = None,
 ) -> dict:
-    cfg = AIConfig.objects.order_by('-updated_at').first()
-    if not cfg or not cfg.api_key or not cfg.model:
-        raise RuntimeError('AI not configured')
-
-    messages = [{'role': 'system', 'content': _system_prompt(context=context, plan=plan, candidate_models=candidate_models)}]
+    prompt = PromptBudget('generation')
+    prefix = _generation_prefix(prompt)
+    messages = [{'role': 'system', 'content': prefix.text}]
+    turn_at = len(messages)
 
     if prev_error or prev_code:
         hint = 'Previous attempt failed. Fix the issue and regenerate.\n'
@@ -144,17 +202,26 @@ def chat_generate_orm(
         messages.append({'role': 'user', 'content': hint})
 
     messages.append({'role': 'user', 'content': question})
-    payload = {
+    for message in messages[turn_at:]:
+        prompt.take(Section('question', message['content'], required=True))
+    if examples is None:
+        examples = few_shot_examples(question, candidate_models)
+    turn = _turn_prompt(context, plan, candidate_models, prompt, prefix.listed, examples)
+    if turn:
+        messages.insert(turn_at, {'role': 'system', 'content': turn})
+    prompt.report()
+    return {
         'model': cfg.model,
         'temperature': cfg.temperature,
         'max_tokens': cfg.max_tokens,
         'messages': messages,
     }
-    data = _post_chat_completion(payload, cfg)
-    content = data.get('choices', [{}])[0].get('message', {}).get('content', '')
+
+
+def _parse_generation(content: str) -> dict | None:
     summary, explanation, code = _extract_parts(content)
     if not code:
-        raise RuntimeError('No code produced')
+        return None
     return {
         'summary': summary,
         'explanation': explanation,
@@ -164,21 +231,111 @@ def chat_generate_orm(
     }
 
 
+def chat_generate_orm(
+    question: str,
+    prev_code: str | None = None,
+    prev_error: str | None = None,
+    *,
+    context: dict | None = None,
+    plan: dict | None = None,
+    candidate_models: list[str] | None = None,
+    cfg: AIConfig | None = None,
+    examples: list | None = None,
+) -> dict:
+    cfg = cfg or get_llm_config('generation')
+    if not is_llm_configured(cfg):
+        raise RuntimeError('AI not configured')
+
+    payload = _generation_payload(question, prev_code, prev_error, context, plan, candidate_models, cfg, examples)
+    data = post_chat_completion(payload, cfg, purpose='generation')
+    content = data.get('choices', [{}])[0].get('message', {}).get('content', '')
+    generated = _parse_generation(content)
+    if generated is None:
+        raise RuntimeError('No code produced')
+    return generated
+
+
+def chat_generate_orm_candidates(
+    question: str,
+    n: int,
+    prev_code: str | None = None,
+    prev_error: str | None = None,
+    *,
+    context: dict | None = None,
+    plan: dict | None = None,
+    candidate_models: list[str] | None = None,
+    cfg: AIConfig | None = None,
+) -> list[dict]:
+    """
+    Up to ``n`` generations for the same prompt, in provider order: one request with the
+    provider's ``n`` parameter, or ``n`` parallel requests (GENERATION_CANDIDATES_MODE).
+    """
+    # Retrieved once, on this thread: parallel requests share the examples and workers stay off the database.
+    examples = few_shot_examples(question, candidate_models)
+    kwargs = {'context': context, 'plan': plan, 'candidate_models': candidate_models, 'examples': examples}
+    if n <= 1:
+        return [chat_generate_orm(question, prev_code, prev_error, cfg=cfg, **kwargs)]
+    cfg = cfg or get_llm_config('generation')
+    if not is_llm_configured(cfg):
+        raise RuntimeError('AI not configured')
+
+    if get_generation_candidates_mode() == 'parallel':
+        futures = [
+            submit_in_context(chat_generate_orm, question, prev_code, prev_error, cfg=cfg, **kwargs)
+            for _ in range(n)
+        ]
+        generated, errors = [], []
+        for future in futures:
+            try:
+                generated.append(future.result())
+            except Exception as exc:
+                errors.append(exc)
+        if not generated:
+            raise errors[0]
+        return generated
+
+    payload = _generation_payload(question, prev_code, prev_error, context, plan, candidate_models, cfg, examples)
+    payload['n'] = n
+    data = post_chat_completion(payload, cfg, purpose='generation')
+    generated = []
+    for choice in data.get('choices') or []:
+        item = _parse_generation((choice.get('message') or {}).get('content', ''))
+        if item is not None:
+            generated.append(item)
+    if not generated:
+        raise RuntimeError('No code produced')
+    return generated
+
+
 def answer_with_data(question, result, truncated=False):
-    cfg = AIConfig.objects.order_by('-updated_at').first()
-    if not cfg or not cfg.api_key or not cfg.model:
+    cfg = get_llm_config('summary')
+    if not is_llm_configured(cfg):
         raise RuntimeError('AI not configured')
     sys = (
         'You are an analytics summarizer. '
-        'Given a user question and JSON data, produce a concise, confident answer in plain language. '
+        'Given a user question and a JSON digest of the query result, '
+        'produce a concise, confident answer in plain language. '
+        'The digest has row_count, per-column stats (min, max, sum, distinct, top values) '
+        'computed over every returned row, and head/tail sample rows; '
+        'use the stats for totals and ranges rather than the samples. '
         'Do not invent fields; rely only on provided data. '
         'If data is truncated, mention that totals may be limited. '
         'Return only the final short answer, no code.'
     )
-    try:
-        data_str = json.dumps(result, ensure_ascii=False)[:6000]
-    except Exception:
-        data_str = str(result)[:6000]
+    prompt = PromptBudget('summary')
+    prompt.take(Section('rules', sys, required=True))
+    prompt.take(Section('question', f'Question: {question}\nTruncated: {bool(truncated)}', required=True))
+    digest = build_result_digest(result, truncated, max_tokens=prompt.remaining or 0)
+    if digest.get('omitted_rows') or digest.get('columns_omitted') or digest.get('data_cut'):
+        prompt.trimmed.append({
+            'section': 'data', 'dropped_lines': digest.get('omitted_rows', 0), 'kept_tokens': prompt.remaining,
+        })
+    if digest.get('columns_omitted') or digest.get('data_cut'):
+        # Omitted sample rows are still covered by the column stats; lost columns or a cut value are not.
+        truncated = digest['truncated'] = True
+    # The digest already fits the budget, so it is charged whole and stays valid JSON.
+    data_str = prompt.take(Section('data', dumps_digest(digest).replace('\n', ' '), required=True))
+    prompt.report()
     payload = {
         'model': cfg.model,
         'temperature': max(0.0, min(0.5, cfg.temperature)),
@@ -188,7 +345,7 @@ def answer_with_data(question, result, truncated=False):
             {'role': 'user', 'content': f'Question: {question}\nData: {data_str}\nTruncated: {bool(truncated)}'},
         ],
     }
-    data = _post_chat_completion(payload, cfg)
+    data = post_chat_completion(payload, cfg, purpose='summary')
     content = data.get('choices', [{}])[0].get('message', {}).get('content', '')
     return content.strip()
 
@@ -208,8 +365,8 @@ def _normalize_title(value: str, max_len: int = 80) -> str:
 
 
 def suggest_chat_title(first_user_message: str) -> str:
-    cfg = AIConfig.objects.order_by('-updated_at').first()
-    if not cfg or not cfg.api_key or not cfg.model:
+    cfg = get_llm_config('title')
+    if not is_llm_configured(cfg):
         return ''
     system = (
         'Generate a concise English chat title for analytics conversation. '
@@ -226,7 +383,7 @@ def suggest_chat_title(first_user_message: str) -> str:
         ],
     }
     try:
-        data = _post_chat_completion(payload, cfg)
+        data = post_chat_completion(payload, cfg, purpose='title')
     except Exception:
         return ''
     content = data.get('choices', [{}])[0].get('message', {}).get('content', '')
@@ -1,11 +1,17 @@
+import hashlib
+import json
+
 from django.apps import apps
 
+from .metrics import record_cache
+
 _manifest = {}
+_manifest_hash = ('', None)
 
 
-def build_manifest():
+def build_manifest(model_classes=None):
     m = {}
-    for model in apps.get_models():
+    for model in apps.get_models() if model_classes is None else model_classes:
         app_label = model._meta.app_label
         model_name = model.__name__
         fields = [
@@ -24,9 +30,32 @@ def refresh_manifest():
 
 def get_manifest():
     global _manifest
+    record_cache('manifest', bool(_manifest))
     if not _manifest:
         try:
             refresh_manifest()
         except Exception:
             return {}
     return dict(_manifest)
+
+
+def hash_manifest(manifest) -> str:
+    return hashlib.sha256(json.dumps(manifest, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+def get_manifest_hash() -> str:
+    """Short content hash of the cached manifest; recomputed only after the manifest is rebuilt or replaced."""
+    global _manifest_hash
+    if not _manifest:
+        get_manifest()
+    current = _manifest
+    if _manifest_hash[1] is not current:
+        _manifest_hash = (hash_manifest(current), current)
+    return _manifest_hash[0]
+
+
+def manifest_hash_for(manifest) -> str:
+    """``get_manifest_hash()`` for a copy of the cached manifest, a fresh hash for any other manifest."""
+    if _manifest and manifest == _manifest:
+        return get_manifest_hash()
+    return hash_manifest(manifest)
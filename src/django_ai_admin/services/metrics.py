@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import bisect
+import threading
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+ROW_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 1000)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: tuple[tuple[str, str], ...] = ()) -> str:
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def header(self) -> list[str]:
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def snapshot(self) -> dict[tuple, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}' for key, value in items]
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values: dict[tuple, dict] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0}
+            state['counts'][idx] += 1
+            state['sum'] += value
+            state['count'] += 1
+
+    def count(self, **labels) -> int:
+        state = self._values.get(self._key(labels))
+        return state['count'] if state else 0
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted((key, {'counts': list(v['counts']), 'sum': v['sum'], 'count': v['count']}) for key, v in self._values.items())
+        lines = []
+        for key, state in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), state['counts']):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, (('le', _format_value(bound)),))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(state["sum"])}')
+            lines.append(f'{self.name}_count{labels} {state["count"]}')
+        return lines
+
+
+class MetricsRegistry:
+    """Process-local registry rendered in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.header())
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+TURNS = REGISTRY.counter('ai_admin_turns_total', 'Assistant turns by final route.', ('route',))
+TURN_DURATION = REGISTRY.histogram('ai_admin_turn_duration_seconds', 'End-to-end assistant turn latency.', ('route',))
+LLM_REQUEST_DURATION = REGISTRY.histogram(
+    'ai_admin_llm_request_duration_seconds', 'LLM call latency by purpose and outcome.', ('purpose', 'status')
+)
+LLM_TOKENS = REGISTRY.counter('ai_admin_llm_tokens_total', 'LLM tokens by purpose and kind.', ('purpose', 'kind'))
+GENERATION_RETRIES = REGISTRY.counter('ai_admin_generation_retries_total', 'Code generation retries after a failed attempt.')
+EXECUTE_DURATION = REGISTRY.histogram('ai_admin_execute_duration_seconds', 'Generated ORM code execution time.', ('status',))
+EXECUTE_ROWS = REGISTRY.histogram('ai_admin_execute_rows', 'Rows returned by executed ORM code.', buckets=ROW_BUCKETS)
+CACHE_REQUESTS = REGISTRY.counter('ai_admin_cache_requests_total', 'Cache lookups by cache and result.', ('cache', 'result'))
+SPECULATION = REGISTRY.counter('ai_admin_speculation_total', 'Speculative generations by outcome.', ('result',))
+SPECULATION_SAVED = REGISTRY.histogram('ai_admin_speculation_saved_seconds', 'Latency saved by speculative generation hits.')
+COALESCED = REGISTRY.counter('ai_admin_coalesced_total', 'Coalesced DATA_QUERY runs by role.', ('role',))
+ADMISSION_WAIT = REGISTRY.histogram(
+    'ai_admin_admission_wait_seconds', 'Time spent waiting for an LLM or execute slot.', ('resource',)
+)
+ADMISSION_REJECTED = REGISTRY.counter(
+    'ai_admin_admission_rejected_total', 'Work rejected by admission control.', ('resource',)
+)
+CIRCUIT_TRANSITIONS = REGISTRY.counter(
+    'ai_admin_llm_circuit_transitions_total', 'LLM circuit breaker state changes by new state.', ('state',)
+)
+LLM_PROMPT_CACHE = REGISTRY.counter(
+    'ai_admin_llm_prompt_cache_total', 'LLM calls by purpose and whether the provider reused a cached prompt prefix.',
+    ('purpose', 'result'),
+)
+PROMPT_TRIMMED = REGISTRY.counter(
+    'ai_admin_prompt_trimmed_total', 'Prompt sections cut to fit the token budget.', ('purpose', 'section')
+)
+LLM_FAILOVERS = REGISTRY.counter(
+    'ai_admin_llm_failovers_total', 'LLM calls moved to another endpoint after a failure.', ('purpose',)
+)
+ERRORS = REGISTRY.counter('ai_admin_errors_total', 'Errors by code.', ('code',))
+TRACES_DROPPED = REGISTRY.counter(
+    'ai_admin_traces_dropped_total', 'Finished traces not exported because the export queue was full.'
+)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(cache=cache, result='hit' if hit else 'miss')
@@ -0,0 +1,300 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ..conf import (
+    get_llm_provider,
+    get_mock_llm_error_rate,
+    get_mock_llm_error_status,
+    get_mock_llm_fixtures,
+    get_mock_llm_latency_ms,
+    get_mock_llm_seed,
+)
+
+MOCK_PROVIDER = 'mock'
+PURPOSE_MARKERS = (
+    ('route_generate', 'also write the ORM code'),
+    ('router', 'intent router'),
+    ('generation', 'ORM expert'),
+    ('summary', 'analytics summarizer'),
+    ('title', 'chat title'),
+)
+
+
+class MockLLMError(Exception):
+    def __init__(self, status_code: int, retry_after: float | None = None):
+        super().__init__(f'mock llm error {status_code}')
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+def is_mock_provider(cfg) -> bool:
+    provider = get_llm_provider() or (getattr(cfg, 'provider', '') or '').strip().lower()
+    return provider == MOCK_PROVIDER
+
+
+def infer_purpose(messages: list[dict]) -> str:
+    system = next((m.get('content') or '' for m in messages if m.get('role') == 'system'), '')
+    for purpose, marker in PURPOSE_MARKERS:
+        if marker in system:
+            return purpose
+    return 'unknown'
+
+
+def _last_user_content(messages: list[dict]) -> str:
+    for message in reversed(messages):
+        if message.get('role') == 'user':
+            return message.get('content') or ''
+    return ''
+
+
+def _system_content(messages: list[dict]) -> str:
+    return '\n\n'.join(m.get('content') or '' for m in messages if m.get('role') == 'system')
+
+
+def _approx_tokens(text: str) -> int:
+    return max(1, len(text) // 4) if text else 0
+
+
+def _manifest_keys(text: str) -> list[str]:
+    return re.findall(r'^([A-Za-z_][\w]*\.[A-Za-z_]\w*):', text or '', flags=re.M)
+
+
+def _words(text: str) -> set[str]:
+    return {w.rstrip('s') for w in re.findall(r'[a-z0-9]+', (text or '').lower()) if len(w) > 2}
+
+
+def _rank_models(question: str, keys: list[str]) -> list[str]:
+    words = _words(question)
+    scored = []
+    for key in keys:
+        app_label, model_name = key.split('.', 1)
+        score = len(words & _words(re.sub(r'(?<!^)(?=[A-Z])', ' ', model_name))) * 2
+        score += len(words & _words(app_label))
+        if score:
+            scored.append((-score, key))
+    return [key for _, key in sorted(scored)]
+
+
+def _reply_router(messages: list[dict]) -> str:
+    try:
+        payload = json.loads(_last_user_content(messages))
+    except ValueError:
+        payload = {}
+    question = str(payload.get('question') or '')
+    keys = _manifest_keys(str(payload.get('manifest') or '') or _system_content(messages))
+    ranked = _rank_models(question, keys)
+    if not ranked:
+        ranked = [key for key in keys if not key.startswith('django_ai_admin.')][:1] or keys[:1]
+    return json.dumps({
+        'label': 'DATA_QUERY',
+        'confidence': 0.9 if ranked else 0.55,
+        'reason': 'mock',
+        'candidate_models': ranked[:4],
+        'clarification_question': '',
+        'options': [],
+        'normalized_query': question,
+    })
+
+
+def _reply_generation(messages: list[dict], choice: int = 0) -> str:
+    system = _system_content(messages)
+    preferred = re.search(r'Preferred models based on routing: ([^\n]+)', system)
+    keys = [k.strip() for k in preferred.group(1).split(',')] if preferred else _manifest_keys(system)
+    # Extra choices (payload ``n``) walk down the preferred models.
+    model_name = keys[choice % len(keys)].split('.', 1)[-1] if keys else 'User'
+    return (
+        f'Count of {model_name} records.\n'
+        f'Counts every {model_name} row.\n'
+        f'```python\nresult = {model_name}.objects.count()\n```'
+    )
+
+
+def _reply_route_generate(messages: list[dict]) -> str:
+    decision = json.loads(_reply_router(messages))
+    models = decision['candidate_models']
+    model_name = models[0].split('.', 1)[-1] if models else 'User'
+    decision.update({
+        'summary': f'Count of {model_name} records.',
+        'explanation': f'Counts every {model_name} row.',
+        'code': f'result = {model_name}.objects.count()',
+    })
+    return json.dumps(decision)
+
+
+def _reply_summary(messages: list[dict]) -> str:
+    content = _last_user_content(messages)
+    data = re.search(r'^Data: (.*)$', content, flags=re.M)
+    return f"Result: {(data.group(1) if data else '')[:200]}"
+
+
+def _reply_title(messages: list[dict]) -> str:
+    content = _last_user_content(messages).replace('First user message:', '', 1)
+    return ' '.join(content.split()[:5]).title() or 'Mock Chat'
+
+
+BUILTIN_REPLIES = {
+    'router': _reply_router,
+    'route_generate': _reply_route_generate,
+    'generation': _reply_generation,
+    'summary': _reply_summary,
+    'title': _reply_title,
+}
+
+
+@lru_cache(maxsize=8)
+def load_fixtures(path: str) -> tuple[dict, ...]:
+    """
+    Recorded transcripts: a JSON list of ``{"purpose", "match", "content"}`` objects,
+    optionally with ``latency_ms`` or ``status`` (plus ``retry_after``) to inject delay or an error.
+    """
+    if not path:
+        return ()
+    with open(path, encoding='utf-8') as fh:
+        data = json.load(fh)
+    return tuple(item for item in data if isinstance(item, dict))
+
+
+class MockLLM:
+    """Deterministic OpenAI-compatible chat completions for benchmarks and tests."""
+
+    def __init__(self, fixtures=(), latency_ms: int = 0, error_rate: float = 0.0, error_status: int = 503, seed=None):
+        self.fixtures = tuple(fixtures)
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._prefixes: set[str] = set()
+
+    def _match_fixture(self, purpose: str, messages: list[dict]) -> dict | None:
+        text = _last_user_content(messages).lower()
+        for item in self.fixtures:
+            if item.get('purpose') not in (None, '', purpose):
+                continue
+            if str(item.get('match') or '').lower() in text:
+                return item
+        return None
+
+    def _cached_prefix_tokens(self, messages: list[dict]) -> int:
+        # Emulates provider prompt caching: a first message seen before counts as cached.
+        prefix = str(messages[0].get('content') or '') if messages else ''
+        digest = hashlib.sha1(prefix.encode('utf-8')).hexdigest()
+        with self._lock:
+            if digest in self._prefixes:
+                return _approx_tokens(prefix)
+            if len(self._prefixes) >= 1024:
+                self._prefixes.clear()
+            self._prefixes.add(digest)
+        return 0
+
+    def complete(self, payload: dict, purpose: str = '') -> dict:
+        messages = payload.get('messages') or []
+        purpose = purpose or infer_purpose(messages)
+        fixture = self._match_fixture(purpose, messages)
+        latency_ms = self.latency_ms if fixture is None else int(fixture.get('latency_ms', self.latency_ms))
+        if latency_ms:
+            time.sleep(latency_ms / 1000)
+        if fixture is not None and fixture.get('status'):
+            raise MockLLMError(int(fixture['status']), fixture.get('retry_after'))
+        if self.error_rate:
+            with self._lock:
+                failed = self._random.random() < self.error_rate
+            if failed:
+                raise MockLLMError(self.error_status)
+
+        n = max(1, int(payload.get('n') or 1))
+        if fixture is not None:
+            contents = [str(fixture.get('content') or '')] * n
+        elif purpose == 'generation':
+            contents = [_reply_generation(messages, choice) for choice in range(n)]
+        else:
+            contents = [BUILTIN_REPLIES.get(purpose, lambda _: 'OK')(messages)] * n
+        prompt_text = ''.join(str(m.get('content') or '') for m in messages)
+        completion_tokens = sum(_approx_tokens(content) for content in contents)
+        cached_tokens = self._cached_prefix_tokens(messages)
+        return {
+            'id': 'mock-' + hashlib.sha1((prompt_text + contents[0]).encode('utf-8')).hexdigest()[:16],
+            'object': 'chat.completion',
+            'model': payload.get('model') or MOCK_PROVIDER,
+            'choices': [
+                {'index': index, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}
+                for index, content in enumerate(contents)
+            ],
+            'usage': {
+                'prompt_tokens': _approx_tokens(prompt_text),
+                'completion_tokens': completion_tokens,
+                'total_tokens': _approx_tokens(prompt_text) + completion_tokens,
+                'prompt_tokens_details': {'cached_tokens': cached_tokens},
+            },
+        }
+
+
+_mock: MockLLM | None = None
+_mock_key: tuple | None = None
+_mock_lock = threading.Lock()
+
+
+def get_mock_llm() -> MockLLM:
+    global _mock, _mock_key
+    key = (
+        get_mock_llm_fixtures(),
+        get_mock_llm_latency_ms(),
+        get_mock_llm_error_rate(),
+        get_mock_llm_error_status(),
+        get_mock_llm_seed(),
+    )
+    with _mock_lock:
+        if _mock is None or key != _mock_key:
+            fixtures_path, latency_ms, error_rate, error_status, seed = key
+            _mock = MockLLM(load_fixtures(fixtures_path), latency_ms, error_rate, error_status, seed)
+            _mock_key = key
+        return _mock
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    llm: MockLLM
+
+    def do_POST(self):
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._reply(404, {'error': {'message': 'not found'}})
+            return
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._reply(400, {'error': {'message': 'invalid json'}})
+            return
+        try:
+            self._reply(200, self.llm.complete(payload))
+        except MockLLMError as exc:
+            headers = {} if exc.retry_after is None else {'Retry-After': str(exc.retry_after)}
+            self._reply(exc.status_code, {'error': {'message': str(exc), 'type': 'mock_error'}}, headers)
+
+    def _reply(self, status_code: int, body: dict, headers: dict | None = None):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status_code)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(host: str, port: int, llm: MockLLM) -> ThreadingHTTPServer:
+    """HTTP stand-in for ``{OPENAI_BASE_URL}/chat/completions`` backed by ``llm``."""
+    handler = type('MockHandler', (_MockHandler,), {'llm': llm})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import cProfile
+import io
+import logging
+import marshal
+import pstats
+import random
+import threading
+import time
+
+from ..conf import get_profile_header_enabled, get_profile_sample_rate
+from ..models import ProfileCapture
+
+logger = logging.getLogger('app')
+
+PROFILE_HEADER = 'HTTP_X_AI_ADMIN_PROFILE'
+# Since Python 3.12 only one cProfile profiler can be active per process.
+_profile_lock = threading.Lock()
+
+
+def profile_reason(request) -> str:
+    """Return why this request should be profiled ('header' or 'sampled'), or ''."""
+    user = getattr(request, 'user', None)
+    if not (user and user.is_authenticated and user.is_staff):
+        return ''
+    if get_profile_header_enabled() and request.META.get(PROFILE_HEADER, '').strip().lower() in ('1', 'true', 'yes'):
+        return 'header'
+    rate = get_profile_sample_rate()
+    if rate and random.random() < rate:
+        return 'sampled'
+    return ''
+
+
+def profile_call(trace_id: str, reason: str, fn, *args, user=None, chat_id=None, **kwargs):
+    """Run ``fn`` under cProfile and store the capture; while another turn is being profiled it runs unprofiled."""
+    if not _profile_lock.acquire(blocking=False):
+        logger.info('ai_admin profile skipped for trace %s: another turn is being profiled', trace_id)
+        return fn(*args, **kwargs)
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    try:
+        return profiler.runcall(fn, *args, **kwargs)
+    finally:
+        _profile_lock.release()
+        duration_ms = int((time.perf_counter() - started) * 1000)
+        try:
+            save_profile(profiler, trace_id, reason, duration_ms, user=user, chat_id=chat_id)
+        except Exception:
+            logger.exception('ai_admin profile capture failed for trace %s', trace_id)
+
+
+def save_profile(profiler: cProfile.Profile, trace_id: str, reason: str, duration_ms: int, user=None, chat_id=None):
+    profiler.create_stats()
+    return ProfileCapture.objects.create(
+        trace_id=trace_id,
+        user=user if getattr(user, 'pk', None) else None,
+        chat_id=chat_id,
+        reason=reason,
+        duration_ms=duration_ms,
+        # marshal of the stats dict is exactly the .pstats file format.
+        stats=marshal.dumps(profiler.stats),
+    )
+
+
+class _LoadedStats:
+    def __init__(self, data: bytes):
+        self.stats = marshal.loads(bytes(data))
+
+    def create_stats(self):
+        pass
+
+
+def top_functions(capture: ProfileCapture, limit: int = 30, sort: str = 'cumulative') -> str:
+    out = io.StringIO()
+    stats = pstats.Stats(_LoadedStats(capture.stats), stream=out)
+    stats.sort_stats(sort).print_stats(limit)
+    return out.getvalue()
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import math
+import re
+from dataclasses import dataclass
+
+from ..conf import get_prompt_token_budget
+from .metrics import PROMPT_TRIMMED
+from .tracing import start_span
+
+_PIECE_RE = re.compile(r'[^\W\d_]+|\d+|\S')
+CHARS_PER_TOKEN = 4
+TRIM_MARKER = '…'
+# Share of the budget kept free for per-turn content when the static prefix is sized.
+TURN_SHARE = 0.25
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Local estimate of BPE tokens: ASCII words cost a token per 4 letters, other scripts per 2,
+    numbers per 3 digits, every other character one. Close enough to budget prompts without a tokenizer.
+    """
+    tokens = 0
+    for piece in _PIECE_RE.findall(text or ''):
+        if piece[0].isdigit():
+            tokens += math.ceil(len(piece) / 3)
+        elif piece[0].isalpha():
+            tokens += math.ceil(len(piece) / (CHARS_PER_TOKEN if piece.isascii() else 2))
+        else:
+            tokens += 1
+    return tokens
+
+
+@dataclass
+class Section:
+    name: str
+    text: str
+    priority: int = 0
+    keep: str = 'head'
+    required: bool = False
+
+
+class PromptBudget:
+    """
+    Fills prompt sections by priority (lower first) within a token budget. Sections that do not
+    fit are cut line by line from the end (``keep='head'``) or the start (``keep='tail'``);
+    ``required`` ones are never cut. A budget of 0 keeps everything.
+    """
+
+    def __init__(self, purpose: str, budget: int | None = None):
+        self.purpose = purpose
+        self.budget = get_prompt_token_budget(purpose) if budget is None else budget
+        self.used = 0
+        self.trimmed: list[dict] = []
+
+    @property
+    def remaining(self) -> int | None:
+        if not self.budget:
+            return None
+        return max(0, self.budget - self.used)
+
+    def take(self, section: Section, limit: int | None = None) -> str:
+        """Fit one section into what is left (or into ``limit``, if smaller) and charge it."""
+        remaining = self.remaining
+        if limit is not None:
+            remaining = limit if remaining is None else min(remaining, limit)
+        if section.required or remaining is None:
+            text, tokens = section.text, estimate_tokens(section.text)
+        else:
+            text, tokens = self._trim(section, remaining)
+        self.used += tokens
+        return text
+
+    def charge(self, tokens: int, trimmed=()) -> None:
+        """Account for text sized elsewhere, such as a cached prompt prefix, and its trimming."""
+        self.used += tokens
+        self.trimmed.extend(trimmed)
+
+    def fit(self, sections: list[Section]) -> dict[str, str]:
+        return {section.name: self.take(section) for section in sorted(sections, key=lambda s: s.priority)}
+
+    def _trim(self, section: Section, remaining: int) -> tuple[str, int]:
+        lines = section.text.split('\n')
+        if section.keep == 'tail':
+            lines.reverse()
+        kept, used = [], 0
+        for line in lines:
+            cost = estimate_tokens(line) + 1
+            if used + cost > remaining:
+                break
+            kept.append(line)
+            used += cost
+        if len(kept) == len(lines):
+            return section.text, used
+        if not kept and remaining > 1:
+            # A single long line (JSON data, a summary paragraph): cut it by characters instead.
+            chars = remaining * CHARS_PER_TOKEN
+            while True:
+                if section.keep == 'head':
+                    text = section.text[:chars] + TRIM_MARKER
+                else:
+                    text = TRIM_MARKER + section.text[-chars:]
+                used = estimate_tokens(text)
+                if used <= remaining or chars <= 1:
+                    break
+                # Punctuation-heavy text (JSON) costs more than CHARS_PER_TOKEN: shrink proportionally.
+                chars = max(1, min(chars - 1, chars * remaining // used))
+        else:
+            if section.keep == 'tail':
+                kept.reverse()
+            text = '\n'.join(kept)
+        self.trimmed.append({'section': section.name, 'dropped_lines': len(lines) - len(kept), 'kept_tokens': used})
+        return text, used
+
+    def report(self) -> None:
+        """Count trimmed sections and attach them to the trace as an ``llm.prompt`` span."""
+        for item in self.trimmed:
+            PROMPT_TRIMMED.inc(purpose=self.purpose, section=item['section'])
+        with start_span('llm.prompt', purpose=self.purpose, budget=self.budget, estimated_tokens=self.used) as span:
+            if self.trimmed:
+                span.set_attribute(
+                    'trimmed',
+                    ', '.join(f"{item['section']}:-{item['dropped_lines']} lines" for item in self.trimmed),
+                )
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+
+from ..conf import (
+    get_backoff_base_sec,
+    get_backoff_max_sec,
+    get_circuit_failure_threshold,
+    get_circuit_half_open_probes,
+    get_circuit_reset_sec,
+)
+from .metrics import CIRCUIT_TRANSITIONS
+
+CIRCUIT_OPEN_MARKER = 'llm circuit open'
+LATENCY_SMOOTHING = 0.2
+
+
+class LLMHTTPError(RuntimeError):
+    """Non-200 provider reply; the message keeps the ``'<prefix> <status>'`` form callers match on."""
+
+    def __init__(self, message: str, status_code: int, retry_after: float | None = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class CircuitOpen(RuntimeError):
+    def __init__(self, endpoint: str, retry_after: float):
+        super().__init__(f'{CIRCUIT_OPEN_MARKER} for {endpoint}')
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value) -> float | None:
+    """``Retry-After`` as seconds; accepts delta-seconds or an HTTP date."""
+    if value in (None, ''):
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(str(value)).timestamp() - time.time())
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def is_provider_failure(exc: BaseException) -> bool:
+    """Failures that say the endpoint is unhealthy (timeouts, connection errors, 408/429/5xx)."""
+    if isinstance(exc, requests.RequestException):
+        return True
+    if isinstance(exc, LLMHTTPError):
+        return exc.status_code in (408, 429) or exc.status_code >= 500
+    return False
+
+
+class EndpointHealth:
+    """
+    Circuit breaker and smoothed latency of one LLM endpoint. After CIRCUIT_FAILURE_THRESHOLD
+    consecutive failures calls fail fast for CIRCUIT_RESET_SEC (or the provider's Retry-After,
+    if longer); then CIRCUIT_HALF_OPEN_PROBES trial calls decide whether it closes again.
+    """
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.state = 'closed'
+        self.failures = 0
+        self.latency_ms: float | None = None
+        self._opened_at = 0.0
+        self._open_for = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == 'open':
+                if time.monotonic() - self._opened_at < self._open_for:
+                    return False
+                self._transition('half_open')
+                self._probes = 0
+            if self.state == 'half_open':
+                if self._probes >= get_circuit_half_open_probes():
+                    return False
+                self._probes += 1
+            return True
+
+    def release_probe(self) -> None:
+        """Give back a half-open probe slot taken by ``allow`` when the call never reached the endpoint."""
+        with self._lock:
+            if self.state == 'half_open' and self._probes:
+                self._probes -= 1
+
+    def retry_in(self) -> float:
+        with self._lock:
+            if self.state != 'open':
+                return 0.0
+            return max(0.0, self._open_for - (time.monotonic() - self._opened_at))
+
+    def record_success(self, latency_sec: float | None = None) -> None:
+        with self._lock:
+            if latency_sec is not None:
+                sample = latency_sec * 1000
+                if self.latency_ms is None:
+                    self.latency_ms = sample
+                else:
+                    self.latency_ms += LATENCY_SMOOTHING * (sample - self.latency_ms)
+            self.failures = 0
+            if self.state != 'closed':
+                self._transition('closed')
+
+    def record_failure(self, retry_after: float | None = None) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= get_circuit_failure_threshold():
+                self._opened_at = time.monotonic()
+                self._open_for = max(get_circuit_reset_sec(), retry_after or 0.0)
+                self._transition('open')
+
+    def _transition(self, state: str) -> None:
+        if state != self.state:
+            self.state = state
+            CIRCUIT_TRANSITIONS.inc(state=state)
+
+
+_health: dict[str, EndpointHealth] = {}
+_health_lock = threading.Lock()
+
+
+def get_endpoint_health(endpoint: str) -> EndpointHealth:
+    with _health_lock:
+        health = _health.get(endpoint)
+        if health is None:
+            health = _health[endpoint] = EndpointHealth(endpoint)
+        return health
+
+
+def reset_endpoint_health() -> None:
+    with _health_lock:
+        _health.clear()
+
+
+def backoff_delay(attempt: int, exc: BaseException | None) -> float | None:
+    """
+    Seconds to wait before retry ``attempt`` (1-based) after ``exc``: full-jitter exponential
+    backoff for provider failures, never shorter than Retry-After. None means do not retry,
+    because the provider asked for a longer pause than BACKOFF_MAX_SEC. Other errors retry at once.
+    """
+    if exc is None or not is_provider_failure(exc):
+        return 0.0
+    cap = get_backoff_max_sec()
+    retry_after = getattr(exc, 'retry_after', None)
+    if retry_after is not None and retry_after > cap:
+        return None
+    delay = random.uniform(0, min(cap, get_backoff_base_sec() * 2 ** (attempt - 1)))
+    return max(delay, retry_after or 0.0)
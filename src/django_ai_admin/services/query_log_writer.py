@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import queue
+import threading
+
+from django.db import connection, transaction
+
+from ..conf import (
+    get_query_log_batch_size,
+    get_query_log_flush_interval_sec,
+    get_query_log_mode,
+    get_query_log_queue_size,
+)
+from ..models import QueryLog
+
+logger = logging.getLogger('app')
+
+
+class QueryLogWriter:
+    """
+    Collects QueryLog records in a bounded in-memory queue and writes them with
+    bulk_create from a daemon thread. Pending records are flushed at interpreter
+    shutdown. When the queue is full the record is written inline, so audit rows
+    are never dropped because of back-pressure. A batch that fails to insert is
+    retried row by row, so one bad record only loses itself.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 200,
+        max_queue_size: int = 10000,
+        flush_interval_sec: float = 1.0,
+        autostart: bool = True,
+    ):
+        self.batch_size = max(1, int(batch_size))
+        self.max_queue_size = max(1, int(max_queue_size))
+        self.flush_interval_sec = max(0.05, float(flush_interval_sec))
+        self.autostart = autostart
+        self._queue: queue.Queue = queue.Queue(maxsize=self.max_queue_size)
+        self._flush_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._pid = os.getpid()
+
+    def submit(self, record: QueryLog) -> None:
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self._write([record])
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def flush(self) -> int:
+        written = 0
+        with self._flush_lock:
+            while True:
+                batch = self._drain(self.batch_size)
+                if not batch:
+                    break
+                written += self._write(batch)
+        return written
+
+    def shutdown(self) -> None:
+        self._stop.set()
+        thread = self._thread
+        if thread and thread.is_alive() and thread is not threading.current_thread():
+            thread.join(timeout=self.flush_interval_sec * 2)
+        self.flush()
+
+    def _drain(self, limit: int) -> list[QueryLog]:
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: list[QueryLog]) -> int:
+        try:
+            with transaction.atomic():
+                QueryLog.objects.bulk_create(batch, batch_size=self.batch_size)
+            return len(batch)
+        except Exception:
+            logger.exception('ai_admin query log bulk insert failed (%s records); writing them one by one', len(batch))
+        if not connection.in_atomic_block:
+            # Drop a connection the failure left broken so the retry reconnects.
+            connection.close_if_unusable_or_obsolete()
+        written = 0
+        for record in batch:
+            try:
+                with transaction.atomic():
+                    record.save(force_insert=True)
+                written += 1
+            except Exception:
+                logger.exception('ai_admin query log record could not be written')
+        if written < len(batch):
+            logger.error('ai_admin query log flush lost %s of %s records', len(batch) - written, len(batch))
+        return written
+
+    def _ensure_started(self) -> None:
+        if not self.autostart:
+            return
+        pid = os.getpid()
+        if self._thread is not None and self._thread.is_alive() and self._pid == pid:
+            return
+        with self._start_lock:
+            if pid != self._pid:
+                # Forked worker: the inherited queue belongs to the parent process.
+                self._queue = queue.Queue(maxsize=self.max_queue_size)
+                self._pid = pid
+                self._thread = None
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='ai-admin-query-log-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        try:
+            while not self._stop.wait(self.flush_interval_sec):
+                self.flush()
+        finally:
+            connection.close()
+
+
+_writer: QueryLogWriter | None = None
+_writer_lock = threading.Lock()
+
+
+def get_query_log_writer() -> QueryLogWriter:
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = QueryLogWriter(
+                    batch_size=get_query_log_batch_size(),
+                    max_queue_size=get_query_log_queue_size(),
+                    flush_interval_sec=get_query_log_flush_interval_sec(),
+                )
+                atexit.register(_writer.shutdown)
+    return _writer
+
+
+def write_query_log(**fields) -> QueryLog:
+    record = QueryLog(**fields)
+    if get_query_log_mode() == 'buffered':
+        get_query_log_writer().submit(record)
+    else:
+        record.save()
+    return record
+
+
+def flush_query_logs() -> int:
+    if _writer is None:
+        return 0
+    return _writer.flush()
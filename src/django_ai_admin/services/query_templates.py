@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import ast
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from ..conf import get_query_template_cache_size, get_query_templates_enabled
+from .candidates import validate_candidate
+from .manifest import get_manifest_hash
+from .metrics import record_cache
+
+_LITERAL_RE = re.compile(
+    r'"(?P<dq>[^"\n]+)"'
+    r"|(?<!\w)'(?P<sq>[^'\n]+)'(?!\w)"
+    r'|«(?P<gq>[^»\n]+)»'
+    r'|(?P<date>(?<![\w-])\d{4}-\d{2}-\d{2}(?![\w-]))'
+    r'|(?P<number>(?<![\w.])\d+(?:\.\d+)?(?![\w.]))'
+)
+_PERIOD_RE = re.compile(r'\b(?:past|previous|last)\s+(?={number})')
+_UNIT_RE = re.compile(r'\b(second|minute|hour|day|week|month|quarter|year)s\b')
+
+
+@dataclass(frozen=True)
+class Literal:
+    kind: str
+    value: object
+    raw: str
+
+
+def parameterize(question: str) -> tuple[str, list[Literal]]:
+    """
+    Split a question into its shape and literals: quoted strings, ISO dates and numbers become
+    ``{string}``, ``{date}`` and ``{number}``. Relative periods are normalized, so "past 7 days"
+    and "last 1 day" share the shape "last {number} day".
+    """
+    literals: list[Literal] = []
+
+    def replace(match: re.Match) -> str:
+        kind = match.lastgroup
+        raw = match.group(kind)
+        if kind == 'number':
+            literals.append(Literal('number', float(raw) if '.' in raw else int(raw), raw))
+        elif kind == 'date':
+            literals.append(Literal('date', raw, raw))
+        else:
+            kind = 'string'
+            literals.append(Literal('string', raw, raw))
+        return '{' + kind + '}'
+
+    shape = _LITERAL_RE.sub(replace, question or '').lower()
+    shape = _UNIT_RE.sub(r'\1', _PERIOD_RE.sub('last ', shape))
+    shape = ' '.join(shape.split()).rstrip('?.! ')
+    return shape, literals
+
+
+def _constants(tree: ast.AST) -> list[ast.Constant]:
+    return [node for node in ast.walk(tree) if isinstance(node, ast.Constant)]
+
+
+def _matches(node: ast.Constant, literal: Literal) -> bool:
+    if literal.kind == 'number':
+        return type(node.value) in (int, float) and node.value == literal.value
+    return isinstance(node.value, str) and node.value == literal.value
+
+
+def _masked_dump(tree: ast.AST, slots: tuple[int, ...]) -> str:
+    constants = _constants(tree)
+    for index in slots:
+        constants[index].value = None
+    return ast.dump(tree)
+
+
+def _swap_text(text: str, old: list[Literal], new: list[Literal]) -> str:
+    for before, after in zip(old, new):
+        if before.raw != after.raw:
+            text = re.sub(rf'(?<![\w.-]){re.escape(before.raw)}(?![\w.-])', lambda _: after.raw, text)
+    return text
+
+
+@dataclass(frozen=True)
+class QueryTemplate:
+    """Executed code of one question with the constant of each question literal as a slot."""
+
+    shape: str
+    code: str
+    literals: tuple[Literal, ...]
+    slots: tuple[int, ...]
+    masked: str
+    summary: str = ''
+    explanation: str = ''
+
+    @classmethod
+    def build(cls, question: str, code: str, summary: str = '', explanation: str = '') -> QueryTemplate | None:
+        """None unless every literal of the question is exactly one constant of the code."""
+        shape, literals = parameterize(question)
+        try:
+            tree = ast.parse(code)
+        except SyntaxError:
+            return None
+        constants = _constants(tree)
+        slots = []
+        for literal in literals:
+            found = [index for index, node in enumerate(constants) if _matches(node, literal)]
+            if len(found) != 1 or found[0] in slots:
+                return None
+            slots.append(found[0])
+        return cls(
+            shape, code, tuple(literals), tuple(slots), _masked_dump(tree, tuple(slots)), summary, explanation,
+        )
+
+    def fill(self, literals: list[Literal], manifest: dict[str, list[str]]) -> str | None:
+        """
+        The code with the slots set to ``literals``, spliced into the original source so its
+        formatting is kept. None when the result does not parse back to the template's AST
+        with exactly those constants, or fails the pre-execution checks.
+        """
+        if [literal.kind for literal in literals] != [literal.kind for literal in self.literals]:
+            return None
+        constants = _constants(ast.parse(self.code))
+        source = self.code.encode('utf-8')
+        line_starts = [0]
+        for line in source.splitlines(keepends=True):
+            line_starts.append(line_starts[-1] + len(line))
+        edits = []
+        for index, literal in zip(self.slots, literals):
+            node = constants[index]
+            start = line_starts[node.lineno - 1] + node.col_offset
+            end = line_starts[node.end_lineno - 1] + node.end_col_offset
+            edits.append((start, end, repr(literal.value).encode('utf-8')))
+        for start, end, text in sorted(edits, reverse=True):
+            source = source[:start] + text + source[end:]
+        code = source.decode('utf-8')
+        try:
+            tree = ast.parse(code)
+        except SyntaxError:
+            return None
+        constants = _constants(tree)
+        if len(constants) != len(_constants(ast.parse(self.code))):
+            return None
+        if any(not _matches(constants[index], literal) for index, literal in zip(self.slots, literals)):
+            return None
+        if _masked_dump(tree, self.slots) != self.masked or validate_candidate(code, manifest):
+            return None
+        return code
+
+
+class QueryTemplateCache:
+    """
+    LRU of query templates keyed by question shape, primary candidate model and manifest hash.
+    A question that matches a stored shape reuses its code with the new literals instead of
+    a generation call.
+    """
+
+    def __init__(self, max_size: int = 1000):
+        self.max_size = max(1, int(max_size))
+        self._templates: OrderedDict[tuple, QueryTemplate] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    @staticmethod
+    def _key(shape: str, candidate_models: list[str] | None) -> tuple:
+        return shape, (candidate_models or [''])[0], get_manifest_hash()
+
+    def learn(
+        self,
+        question: str,
+        code: str,
+        candidate_models: list[str] | None = None,
+        summary: str = '',
+        explanation: str = '',
+    ) -> bool:
+        template = QueryTemplate.build(question, code, summary, explanation)
+        if template is None:
+            return False
+        key = self._key(template.shape, candidate_models)
+        with self._lock:
+            self._templates[key] = template
+            self._templates.move_to_end(key)
+            while len(self._templates) > self.max_size:
+                self._templates.popitem(last=False)
+        return True
+
+    def lookup(
+        self,
+        question: str,
+        candidate_models: list[str] | None,
+        manifest: dict[str, list[str]],
+    ) -> dict | None:
+        """A generation-shaped dict with the filled code, or None."""
+        shape, literals = parameterize(question)
+        key = self._key(shape, candidate_models)
+        with self._lock:
+            template = self._templates.get(key)
+            if template is not None:
+                self._templates.move_to_end(key)
+        code = template.fill(literals, manifest) if template is not None else None
+        record_cache('query_template', code is not None)
+        if code is None:
+            return None
+        return {
+            'summary': _swap_text(template.summary, list(template.literals), literals),
+            'explanation': _swap_text(template.explanation, list(template.literals), literals),
+            'code': code,
+            'template': template.shape,
+        }
+
+    def forget(self, question: str, candidate_models: list[str] | None = None) -> None:
+        shape, _ = parameterize(question)
+        with self._lock:
+            self._templates.pop(self._key(shape, candidate_models), None)
+
+
+_cache: QueryTemplateCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_query_template_cache() -> QueryTemplateCache | None:
+    """The process-wide template cache, or None when DJANGO_AI_ADMIN_QUERY_TEMPLATES is off."""
+    global _cache
+    if not get_query_templates_enabled():
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = QueryTemplateCache(max_size=get_query_template_cache_size())
+    return _cache
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from ..models import AIConfig, Chat, QueryLog
+from .benchmark import post_turn, summarize_samples
+from .metrics import CACHE_REQUESTS, EXECUTE_DURATION
+from .query_log_writer import flush_query_logs
+
+REPLAY_USERNAME = 'ai_admin_replay'
+
+_EMAIL_RE = re.compile(r'[\w.+-]+@[\w-]+(?:\.[\w-]+)+')
+_QUOTED_RE = re.compile(r'(["\'])(?:(?!\1).){1,200}\1')
+_LONG_NUMBER_RE = re.compile(r'\b\d[\d -]{5,}\d\b')
+
+
+def anonymize_question(text: str) -> str:
+    """Mask e-mails, quoted literals and long digit runs (phones, ids); keep the question's shape."""
+    text = _EMAIL_RE.sub('user@example.com', text or '')
+    text = _QUOTED_RE.sub(lambda m: f'{m.group(1)}value{m.group(1)}', text)
+    return _LONG_NUMBER_RE.sub('0000000', text)
+
+
+def load_questions(limit: int = 200, days: int = 30, routes=None, anonymize: bool = False) -> list[str]:
+    qs = QueryLog.objects.filter(created_at__gte=timezone.now() - timedelta(days=days)).exclude(question='')
+    if routes:
+        qs = qs.filter(route__in=list(routes))
+    questions = list(qs.order_by('created_at').values_list('question', flat=True)[:limit])
+    return [anonymize_question(q) for q in questions] if anonymize else questions
+
+
+def _cache_counts() -> dict[str, dict[str, float]]:
+    counts: dict[str, dict[str, float]] = {}
+    for (cache, result), value in CACHE_REQUESTS.snapshot().items():
+        counts.setdefault(cache, {})[result] = value
+    return counts
+
+
+def _cache_deltas(before: dict, after: dict) -> dict:
+    out = {}
+    for cache, results in after.items():
+        hits = results.get('hit', 0) - before.get(cache, {}).get('hit', 0)
+        misses = results.get('miss', 0) - before.get(cache, {}).get('miss', 0)
+        if hits or misses:
+            out[cache] = {'hits': hits, 'misses': misses, 'hit_rate': round(hits / (hits + misses), 4)}
+    return out
+
+
+def _stage_percentiles(trace_ids: list[str]) -> dict:
+    samples: dict[str, list[float]] = {}
+    metas = QueryLog.objects.filter(trace_id__in=trace_ids).values_list('query_meta', flat=True)
+    for meta in metas:
+        for item in (meta or {}).get('timings') or []:
+            if isinstance(item, dict) and 'stage' in item:
+                # generate_1/execute_2 ... are reported per stage family.
+                stage = re.sub(r'_\d+$', '', str(item['stage']))
+                samples.setdefault(stage, []).append(float(item.get('ms') or 0))
+    return {stage: {**summarize_samples(values), 'count': len(values)} for stage, values in sorted(samples.items())}
+
+
+def replay(
+    questions: list[str],
+    concurrency: int = 4,
+    rate: float = 0.0,
+    use_mock: bool = True,
+    mock_latency_ms: int = 0,
+    keep: bool = False,
+) -> dict:
+    """
+    Send ``questions`` through ChatMessageView as a dedicated staff user, each in a new chat,
+    at most ``rate`` turns per second (0 = unthrottled) on ``concurrency`` threads.
+    """
+    user, _ = get_user_model().objects.get_or_create(username=REPLAY_USERNAME, defaults={'is_staff': True})
+    # Every turn runs as one user and must be answered inline, not rate limited or queued.
+    overrides = {
+        'DJANGO_AI_ADMIN_PROFILE_SAMPLE_RATE': 0.0,
+        'DJANGO_AI_ADMIN_USER_TURNS_PER_MINUTE': 0,
+        'DJANGO_AI_ADMIN_BACKGROUND_JOBS': False,
+    }
+    temp_config = None
+    if use_mock:
+        overrides.update({
+            'DJANGO_AI_ADMIN_LLM_PROVIDER': 'mock',
+            'DJANGO_AI_ADMIN_MOCK_LLM_LATENCY_MS': mock_latency_ms,
+        })
+        if not AIConfig.objects.exists():
+            temp_config = AIConfig.objects.create(provider='mock', model='mock')
+
+    lock = threading.Lock()
+    latencies: list[float] = []
+    trace_ids: list[str] = []
+    chat_ids: list[int] = []
+    outcomes: dict[str, int] = {}
+
+    def run_one(index: int, question: str):
+        if rate:
+            delay = started + index / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        chat = Chat.objects.create(owner=user)
+        t0 = time.perf_counter()
+        try:
+            response = post_turn(user, chat.pk, question)
+            data = response.data if isinstance(response.data, dict) else {}
+            outcome = data.get('type') or str(response.status_code)
+            trace_id = (data.get('meta') or {}).get('trace_id', '')
+        except Exception as exc:
+            outcome, trace_id = f'exception:{type(exc).__name__}', ''
+        elapsed = (time.perf_counter() - t0) * 1000
+        with lock:
+            latencies.append(elapsed)
+            chat_ids.append(chat.pk)
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+            if trace_id:
+                trace_ids.append(trace_id)
+
+    def run_pooled(index: int, question: str):
+        try:
+            run_one(index, question)
+        finally:
+            # Worker threads own their connections.
+            connections.close_all()
+
+    cache_before = _cache_counts()
+    exec_errors_before = EXECUTE_DURATION.count(status='error')
+    exec_ok_before = EXECUTE_DURATION.count(status='ok')
+    with override_settings(**overrides):
+        started = time.perf_counter()
+        if concurrency <= 1:
+            for index, question in enumerate(questions):
+                run_one(index, question)
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='ai-admin-replay') as pool:
+                list(pool.map(run_pooled, range(len(questions)), questions))
+        wall = time.perf_counter() - started
+    flush_query_logs()
+
+    exec_errors = EXECUTE_DURATION.count(status='error') - exec_errors_before
+    exec_total = exec_errors + EXECUTE_DURATION.count(status='ok') - exec_ok_before
+    report = {
+        'questions': len(questions),
+        'concurrency': concurrency,
+        'rate': rate,
+        'mock_llm': use_mock,
+        'wall_sec': round(wall, 3),
+        'throughput_per_sec': round(len(latencies) / wall, 3) if wall else 0.0,
+        'latency_ms': summarize_samples(latencies),
+        'outcomes': outcomes,
+        'stages_ms': _stage_percentiles(trace_ids),
+        'cache': _cache_deltas(cache_before, _cache_counts()),
+        'executor': {
+            'runs': exec_total,
+            'failures': exec_errors,
+            'failure_rate': round(exec_errors / exec_total, 4) if exec_total else 0.0,
+        },
+    }
+    if not keep:
+        QueryLog.objects.filter(trace_id__in=trace_ids).delete()
+        Chat.objects.filter(pk__in=chat_ids).delete()
+    if temp_config is not None:
+        temp_config.delete()
+    return report
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import json
+import re
+from collections import Counter
+
+from .prompt_budget import estimate_tokens
+
+SAMPLE_ROWS = 5
+TOP_VALUES = 5
+_ISO_DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}')
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, ensure_ascii=False, default=str, separators=(',', ':'))
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _hashable(value):
+    return value if not isinstance(value, (dict, list)) else _dumps(value)
+
+
+def _column_names(rows: list) -> list[str]:
+    names: dict[str, None] = {}
+    for row in rows:
+        if isinstance(row, dict):
+            names.update(dict.fromkeys(str(key) for key in row))
+        elif isinstance(row, (list, tuple)):
+            names.update(dict.fromkeys(str(index) for index in range(len(row))))
+        else:
+            names['value'] = None
+    return list(names)
+
+
+def _cell(row, name: str):
+    if isinstance(row, dict):
+        return row.get(name)
+    if isinstance(row, (list, tuple)):
+        index = int(name) if name.isdigit() else -1
+        return row[index] if 0 <= index < len(row) else None
+    return row if name == 'value' else None
+
+
+def column_stats(rows: list, name: str) -> dict:
+    """Stats of one column over every returned row: type, nulls, distinct values, range, sum and most common values."""
+    values = [_cell(row, name) for row in rows]
+    present = [value for value in values if value is not None]
+    stats = {'name': name, 'non_null': len(present)}
+    if not present:
+        stats['type'] = 'null'
+        return stats
+    counts = Counter(_hashable(value) for value in present)
+    stats['distinct'] = len(counts)
+    if all(_is_number(value) for value in present):
+        stats.update(type='number', min=min(present), max=max(present), sum=round(sum(present), 6))
+    elif all(isinstance(value, str) for value in present):
+        stats['type'] = 'string'
+        if all(_ISO_DATE_RE.match(value) for value in present):
+            stats.update(type='datetime', min=min(present), max=max(present))
+    elif all(isinstance(value, bool) for value in present):
+        stats['type'] = 'bool'
+    else:
+        stats['type'] = 'mixed'
+    # Top values only say something when values repeat.
+    if stats['type'] != 'number' and len(counts) < len(present):
+        stats['top'] = [[value, count] for value, count in counts.most_common(TOP_VALUES)]
+    return stats
+
+
+def build_result_digest(result, truncated: bool = False, max_tokens: int = 0) -> dict:
+    """
+    Compact, valid-JSON view of an executed result for the summarizer. Lists get row and column
+    counts, per-column stats over all returned rows and head/tail samples, shrunk until the digest
+    fits ``max_tokens`` (0: no limit). Mappings that do not fit whole, such as ``{date: count}``
+    group-bys, are digested as key/value rows; oversized scalars are cut.
+    """
+    base = {'truncated': bool(truncated)}
+    if isinstance(result, dict):
+        whole = {**base, 'data': result}
+        if not max_tokens or estimate_tokens(_dumps(whole)) <= max_tokens:
+            return whole
+        rows = [{'key': key, 'value': value} for key, value in result.items()]
+        return _rows_digest(rows, {'shape': 'mapping', **base}, max_tokens)
+    if isinstance(result, list):
+        return _rows_digest(result, base, max_tokens)
+    whole = {**base, 'data': result}
+    if not max_tokens or estimate_tokens(_dumps(whole)) <= max_tokens:
+        return whole
+    text = result if isinstance(result, str) else _dumps(result)
+    chars = len(text)
+    while chars:
+        chars = chars * 3 // 4
+        cut = {**base, 'data': text[:chars] + '…', 'data_cut': True}
+        if estimate_tokens(_dumps(cut)) <= max_tokens:
+            return cut
+    return {**base, 'data': '', 'data_cut': True}
+
+
+def _rows_digest(rows: list, base: dict, max_tokens: int) -> dict:
+    digest = {**base, 'row_count': len(rows)}
+    if len(rows) <= 2 * SAMPLE_ROWS:
+        full = {**digest, 'rows': rows}
+        if not max_tokens or estimate_tokens(_dumps(full)) <= max_tokens:
+            return full
+    names = _column_names(rows)
+    digest['column_count'] = len(names)
+    columns = [column_stats(rows, name) for name in names]
+    sample, top = SAMPLE_ROWS, True
+    while True:
+        candidate = dict(digest)
+        candidate['columns'] = columns if top else [{k: v for k, v in c.items() if k != 'top'} for c in columns]
+        candidate['omitted_rows'] = len(rows)
+        if sample:
+            head = rows[:sample]
+            tail = rows[max(sample, len(rows) - sample):]
+            candidate['head'] = head
+            if tail:
+                candidate['tail'] = tail
+            candidate['omitted_rows'] = len(rows) - len(head) - len(tail)
+        if not max_tokens or estimate_tokens(_dumps(candidate)) <= max_tokens:
+            return candidate
+        if sample:
+            sample //= 2
+        elif top:
+            top = False
+        else:
+            # Too many columns even for stats alone: keep the first ones that fit.
+            candidate['columns'] = list(candidate['columns'])
+            while candidate['columns'] and estimate_tokens(_dumps(candidate)) > max_tokens:
+                candidate['columns'].pop()
+            candidate['columns_omitted'] = len(names) - len(candidate['columns'])
+            return candidate
+
+
+def dumps_digest(digest: dict) -> str:
+    return _dumps(digest)
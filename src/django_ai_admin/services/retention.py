@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import gzip
+import json
+import math
+import os
+import re
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import QueryLog, QueryLogDailyRollup
+
+ROLLUP_GROUPS = ('route', 'intent_label', 'user', 'day')
+USAGE_FIELDS = ('prompt_tokens', 'completion_tokens', 'cached_tokens', 'cost_usd')
+
+
+def _usage_totals() -> dict:
+    return {'prompt_tokens': 0, 'completion_tokens': 0, 'cached_tokens': 0, 'cost_usd': Decimal('0')}
+
+
+def _new_bucket() -> dict:
+    return {'durations': [], 'errors': 0, **_usage_totals()}
+
+
+def _day_bounds(day: date) -> tuple[datetime, datetime]:
+    start = datetime.combine(day, time.min)
+    end = start + timedelta(days=1)
+    if settings.USE_TZ:
+        tz = timezone.get_current_timezone()
+        start = timezone.make_aware(start, tz)
+        end = timezone.make_aware(end, tz)
+    return start, end
+
+
+def _percentile(sorted_values: list[int], pct: float) -> int:
+    if not sorted_values:
+        return 0
+    idx = math.ceil(pct / 100.0 * len(sorted_values)) - 1
+    idx = max(0, min(len(sorted_values) - 1, idx))
+    return int(sorted_values[idx])
+
+
+def archive_path(archive_dir: str, day: date, first_pk: int, last_pk: int) -> str:
+    name = f'querylog-{day.isoformat()}-{first_pk:010d}-{last_pk:010d}.ndjson.gz'
+    return os.path.join(archive_dir, f'{day:%Y}', f'{day:%m}', name)
+
+
+def _drop_unfinished_archives(directory: str, day: date, first_pk: int) -> None:
+    """
+    Remove files of an earlier run that wrote a batch but failed before deleting its rows:
+    they start at or after the lowest primary key still in the table and are rewritten.
+    """
+    pattern = re.compile(rf'querylog-{day.isoformat()}-(\d+)-\d+\.ndjson\.gz(\.tmp)?$')
+    for name in os.listdir(directory):
+        match = pattern.match(name)
+        if match and (match.group(2) or int(match.group(1)) >= first_pk):
+            os.remove(os.path.join(directory, name))
+
+
+def _write_archive(path: str, rows: list[dict]) -> None:
+    tmp_path = f'{path}.tmp'
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as fh:
+        for row in rows:
+            fh.write(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n')
+    os.replace(tmp_path, path)
+
+
+def is_rollup_final(day: date) -> bool:
+    """A rollup is final once it was computed after its day closed."""
+    _, end = _day_bounds(day)
+    return QueryLogDailyRollup.objects.filter(day=day, updated_at__gte=end).exists()
+
+
+def rebuild_daily_rollups(day: date, force: bool = False) -> int:
+    """
+    Recompute rollup rows for one day from raw QueryLog rows.
+    Final rollups are kept unless ``force`` is set, because the raw rows of an
+    already archived day may be partially or fully deleted.
+    """
+    if not force and is_rollup_final(day):
+        return 0
+    start, end = _day_bounds(day)
+    groups: dict[tuple, dict] = defaultdict(_new_bucket)
+    qs = (
+        QueryLog.objects.filter(created_at__gte=start, created_at__lt=end)
+        .values('route', 'intent_label', 'user_id', 'duration_ms', 'error', *USAGE_FIELDS)
+    )
+    for row in qs.iterator(chunk_size=2000):
+        bucket = groups[(row['route'], row['intent_label'], row['user_id'])]
+        bucket['durations'].append(int(row['duration_ms'] or 0))
+        if row['error']:
+            bucket['errors'] += 1
+        for name in USAGE_FIELDS:
+            bucket[name] += row[name] or 0
+
+    rollups = []
+    for (route, intent_label, user_id), bucket in groups.items():
+        durations = sorted(bucket['durations'])
+        count = len(durations)
+        rollups.append(QueryLogDailyRollup(
+            day=day,
+            route=route,
+            intent_label=intent_label,
+            user_id=user_id,
+            count=count,
+            error_count=bucket['errors'],
+            error_rate=round(bucket['errors'] / count, 4) if count else 0.0,
+            p50_duration_ms=_percentile(durations, 50),
+            p95_duration_ms=_percentile(durations, 95),
+            **{name: bucket[name] for name in USAGE_FIELDS},
+        ))
+    with transaction.atomic():
+        QueryLogDailyRollup.objects.filter(day=day).delete()
+        QueryLogDailyRollup.objects.bulk_create(rollups)
+    return len(rollups)
+
+
+def refresh_recent_rollups(days: int = 2) -> int:
+    today = timezone.localdate()
+    total = 0
+    for offset in range(max(1, days)):
+        total += rebuild_daily_rollups(today - timedelta(days=offset))
+    return total
+
+
+def archive_query_logs(before_day: date, archive_dir: str | None = None, batch_size: int = 1000) -> dict:
+    """
+    Move QueryLog rows created before ``before_day`` out of the table, one day
+    partition at a time. Each day is rolled up first, then each primary-key batch is
+    written to ``<archive_dir>/YYYY/MM/querylog-YYYY-MM-DD-<first pk>-<last pk>.ndjson.gz``
+    through a temporary file and deleted, so a rerun after a failure rewrites the batch
+    instead of archiving its rows twice. Without ``archive_dir`` rows are only rolled up
+    and deleted.
+    """
+    start_cutoff, _ = _day_bounds(before_day)
+    fields = [f.attname for f in QueryLog._meta.concrete_fields]
+    stats = {'days': 0, 'archived': 0, 'rollups': 0, 'files': []}
+    for day in QueryLog.objects.filter(created_at__lt=start_cutoff).dates('created_at', 'day'):
+        start, end = _day_bounds(day)
+        stats['rollups'] += rebuild_daily_rollups(day)
+        directory = os.path.dirname(archive_path(archive_dir, day, 0, 0)) if archive_dir else ''
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        last_pk = 0
+        while True:
+            batch = list(
+                QueryLog.objects.filter(created_at__gte=start, created_at__lt=end, pk__gt=last_pk)
+                .order_by('pk')
+                .values(*fields)[:batch_size]
+            )
+            if not batch:
+                break
+            ids = [row['id'] for row in batch]
+            if directory:
+                if not last_pk:
+                    _drop_unfinished_archives(directory, day, ids[0])
+                path = archive_path(archive_dir, day, ids[0], ids[-1])
+                _write_archive(path, batch)
+                stats['files'].append(path)
+            QueryLog.objects.filter(pk__in=ids).delete()
+            last_pk = ids[-1]
+            stats['archived'] += len(ids)
+        stats['days'] += 1
+    return stats
+
+
+def summarize_rollups(days: int = 7, group_by: str = 'route') -> list[dict]:
+    """
+    Aggregate rollup rows of the last ``days`` days by one dimension.
+    Percentiles cannot be merged exactly, so p50/p95 are count-weighted means
+    of the daily values.
+    """
+    if group_by not in ROLLUP_GROUPS:
+        group_by = 'route'
+    key_field = 'user_id' if group_by == 'user' else group_by
+    since = timezone.localdate() - timedelta(days=max(1, days) - 1)
+    totals: dict = {}
+    qs = QueryLogDailyRollup.objects.filter(day__gte=since).values(
+        key_field, 'count', 'error_count', 'p50_duration_ms', 'p95_duration_ms', *USAGE_FIELDS
+    )
+    for row in qs.iterator(chunk_size=2000):
+        key = row[key_field]
+        bucket = totals.get(key)
+        if bucket is None:
+            bucket = totals[key] = {'count': 0, 'error_count': 0, 'p50_sum': 0, 'p95_sum': 0, **_usage_totals()}
+        bucket['count'] += row['count']
+        bucket['error_count'] += row['error_count']
+        bucket['p50_sum'] += row['p50_duration_ms'] * row['count']
+        bucket['p95_sum'] += row['p95_duration_ms'] * row['count']
+        for name in USAGE_FIELDS:
+            bucket[name] += row[name] or 0
+
+    out = []
+    for key, bucket in totals.items():
+        count = bucket['count']
+        out.append({
+            group_by: key.isoformat() if isinstance(key, date) else key,
+            'count': count,
+            'error_count': bucket['error_count'],
+            'error_rate': round(bucket['error_count'] / count, 4) if count else 0.0,
+            'p50_duration_ms': int(bucket['p50_sum'] / count) if count else 0,
+            'p95_duration_ms': int(bucket['p95_sum'] / count) if count else 0,
+            'prompt_tokens': bucket['prompt_tokens'],
+            'completion_tokens': bucket['completion_tokens'],
+            'cached_tokens': bucket['cached_tokens'],
+            'cost_usd': float(bucket['cost_usd']),
+        })
+    if group_by == 'day':
+        out.sort(key=lambda item: item['day'], reverse=True)
+    else:
+        out.sort(key=lambda item: item['count'], reverse=True)
+    return out
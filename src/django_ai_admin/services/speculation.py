@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import re
+import time
+from concurrent.futures import Future
+
+from ..conf import get_speculative_generation_enabled
+from ..models import AIConfig
+from .intent_router import IntentDecision, prerank_candidate_models
+from .llm_client import chat_generate_orm
+from .metrics import SPECULATION, SPECULATION_SAVED
+from .planner import build_query_plan
+from .endpoints import get_llm_config, is_llm_configured
+from .few_shot import few_shot_examples
+from .workers import submit_in_context
+
+# Minimum word overlap (Jaccard) between the raw question and the router's normalized query.
+MIN_QUERY_SIMILARITY = 0.7
+
+
+def _words(text: str) -> set[str]:
+    return set(re.findall(r'\w+', (text or '').lower()))
+
+
+def query_similarity(first: str, second: str) -> float:
+    a, b = _words(first), _words(second)
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class SpeculativeGeneration:
+    """
+    ``chat_generate_orm`` started alongside ``route_intent`` for locally pre-ranked models.
+    The result is used only when the router agrees on a DATA_QUERY about the same primary model.
+    """
+
+    def __init__(self, candidate_models: list[str], question: str = ''):
+        self.candidate_models = candidate_models
+        self.question = question
+        self.future: Future | None = None
+        self.started = time.perf_counter()
+        self.finished = 0.0
+        self.outcome = ''
+        self.saved_ms = 0
+
+    def _generate(self, question: str, context: dict | None, plan: dict, cfg: AIConfig, examples: list) -> dict:
+        try:
+            return chat_generate_orm(
+                question, context=context, plan=plan, candidate_models=self.candidate_models, cfg=cfg, examples=examples,
+            )
+        finally:
+            self.finished = time.perf_counter()
+
+    def agrees_with(self, decision: IntentDecision) -> bool:
+        return (
+            decision.label == 'DATA_QUERY'
+            and bool(decision.candidate_models)
+            and decision.candidate_models[0] == self.candidate_models[0]
+            # A rewritten follow-up is a different question, even about the same model.
+            and query_similarity(self.question, decision.normalized_query or self.question) >= MIN_QUERY_SIMILARITY
+        )
+
+    @property
+    def pending(self) -> bool:
+        return not self.outcome
+
+    def discard(self, outcome: str = 'miss') -> None:
+        self.future.cancel()
+        self._record(outcome)
+
+    def take(self) -> dict | None:
+        """Wait for the speculative generation; None when it failed and generation must run normally."""
+        waited_from = time.perf_counter()
+        try:
+            generated = self.future.result()
+        except Exception:
+            self._record('error')
+            return None
+        # Only the part of the generation that overlapped earlier stages was saved.
+        self.saved_ms = max(0, int((min(self.finished, waited_from) - self.started) * 1000))
+        SPECULATION_SAVED.observe(self.saved_ms / 1000)
+        self._record('hit')
+        return generated
+
+    def _record(self, outcome: str) -> None:
+        self.outcome = outcome
+        SPECULATION.inc(result=outcome)
+
+    def as_meta(self) -> dict:
+        meta = {
+            'result': self.outcome or 'pending',
+            'saved_ms': self.saved_ms,
+            'candidate_models': self.candidate_models,
+        }
+        if self.future is not None and not self.future.done():
+            # A discarded call still in flight is not waited for; its tokens reach the
+            # ai_admin_llm_tokens_total counter when it finishes, not this turn's usage.
+            meta['usage_pending'] = True
+        return meta
+
+
+def start_speculative_generation(
+    question: str,
+    manifest: dict[str, list[str]],
+    context: dict | None = None,
+) -> SpeculativeGeneration | None:
+    if not get_speculative_generation_enabled():
+        return None
+    candidates = prerank_candidate_models(question, manifest)
+    if not candidates:
+        SPECULATION.inc(result='skipped')
+        return None
+    # Resolved here so the worker thread never touches the database.
+    cfg = get_llm_config('generation')
+    if not is_llm_configured(cfg):
+        return None
+    examples = few_shot_examples(question, candidates)
+    provisional = IntentDecision(
+        label='DATA_QUERY',
+        confidence=0.0,
+        candidate_models=candidates,
+        normalized_query=question,
+    )
+    plan = build_query_plan(question, provisional, context)
+    speculation = SpeculativeGeneration(candidates, question)
+    speculation.future = submit_in_context(speculation._generate, question, context, plan, cfg, examples)
+    return speculation
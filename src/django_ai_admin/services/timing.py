@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+
+from .tracing import start_span
+
+
+class StageTimer:
+    """
+    Wall-clock timings of the stages of one assistant turn.
+    Stages keep their call order and may repeat (one entry per attempt).
+    Each stage is also a tracing span; ``stage()`` yields it for attributes.
+    """
+
+    def __init__(self):
+        self._started = time.perf_counter()
+        self._stages: list[dict] = []
+
+    @contextmanager
+    def stage(self, name: str, **attributes):
+        t0 = time.perf_counter()
+        try:
+            with start_span(name, **attributes) as span:
+                yield span
+        finally:
+            self.record(name, (time.perf_counter() - t0) * 1000)
+
+    def record(self, name: str, duration_ms: float) -> None:
+        self._stages.append({'stage': name, 'ms': int(round(duration_ms))})
+
+    def elapsed_ms(self) -> int:
+        return int((time.perf_counter() - self._started) * 1000)
+
+    def total_ms(self, name: str) -> int:
+        return sum(item['ms'] for item in self._stages if item['stage'] == name)
+
+    def as_list(self) -> list[dict]:
+        return [dict(item) for item in self._stages]
+
+
+def format_timings(timings) -> str:
+    if not isinstance(timings, list):
+        return ''
+    parts = []
+    for item in timings:
+        if isinstance(item, dict) and 'stage' in item:
+            parts.append(f"{item['stage']}: {item.get('ms', 0)} ms")
+    return '\n'.join(parts)
@@ -0,0 +1,364 @@
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import queue
+import secrets
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+import requests
+from django.utils.module_loading import import_string
+
+from ..conf import (
+    get_tracing_enabled,
+    get_tracing_exporters,
+    get_tracing_json_file,
+    get_tracing_otlp_endpoint,
+    get_tracing_otlp_hook,
+    get_tracing_queue_size,
+)
+from .metrics import TRACES_DROPPED
+
+logger = logging.getLogger('app')
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str = ''
+    start_time: float = field(default_factory=time.time)
+    end_time: float = 0.0
+    attributes: dict = field(default_factory=dict)
+    status: str = 'ok'
+    error: str = ''
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+    @property
+    def duration_ms(self) -> float:
+        return round(((self.end_time or time.time()) - self.start_time) * 1000, 3)
+
+    def as_dict(self) -> dict:
+        return {
+            'name': self.name,
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'start_time': self.start_time,
+            'end_time': self.end_time,
+            'duration_ms': self.duration_ms,
+            'attributes': dict(self.attributes),
+            'status': self.status,
+            'error': self.error,
+        }
+
+
+class _NoopSpan:
+    name = ''
+    trace_id = ''
+    span_id = ''
+
+    def set_attribute(self, key: str, value) -> None:
+        pass
+
+    def set_attributes(self, **attributes) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class _Trace:
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.spans: list[Span] = []
+
+
+_current_trace: ContextVar[_Trace | None] = ContextVar('django_ai_admin_trace', default=None)
+_current_span: ContextVar[Span | None] = ContextVar('django_ai_admin_span', default=None)
+
+
+def is_recording() -> bool:
+    return _current_trace.get() is not None
+
+
+def current_span():
+    return _current_span.get() or NOOP_SPAN
+
+
+@contextmanager
+def start_trace(trace_id: str, name: str = 'ai_admin.turn', **attributes):
+    """Open the root span of one assistant turn; yields a no-op span when tracing is disabled."""
+    if not get_tracing_enabled():
+        yield NOOP_SPAN
+        return
+    trace = _Trace(trace_id or str(uuid.uuid4()))
+    token = _current_trace.set(trace)
+    try:
+        with start_span(name, **attributes) as root:
+            yield root
+    finally:
+        _current_trace.reset(token)
+        export_spans(trace.spans)
+
+
+@contextmanager
+def start_span(name: str, **attributes):
+    trace = _current_trace.get()
+    if trace is None:
+        yield NOOP_SPAN
+        return
+    parent = _current_span.get()
+    span = Span(
+        name=name,
+        trace_id=trace.trace_id,
+        span_id=secrets.token_hex(8),
+        parent_id=parent.span_id if parent else '',
+        attributes=dict(attributes),
+    )
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as exc:
+        span.status = 'error'
+        span.error = f'{type(exc).__name__}: {exc}'[:500]
+        raise
+    finally:
+        span.end_time = time.time()
+        _current_span.reset(token)
+        trace.spans.append(span)
+
+
+class SpanExporter:
+    def export(self, spans: list[Span]) -> None:
+        raise NotImplementedError
+
+
+class LogSpanExporter(SpanExporter):
+    def export(self, spans: list[Span]) -> None:
+        for span in spans:
+            logger.info(
+                'ai_admin span %s trace=%s span=%s parent=%s %.1fms status=%s attrs=%s',
+                span.name,
+                span.trace_id,
+                span.span_id,
+                span.parent_id or '-',
+                span.duration_ms,
+                span.status,
+                json.dumps(span.attributes, ensure_ascii=False, default=str),
+            )
+
+
+class JsonFileSpanExporter(SpanExporter):
+    """Appends one JSON object per span to a file."""
+
+    _lock = threading.Lock()
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, spans: list[Span]) -> None:
+        if not self.path:
+            return
+        lines = [json.dumps(span.as_dict(), ensure_ascii=False, default=str) for span in spans]
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as fh:
+                fh.write('\n'.join(lines) + '\n')
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    if isinstance(value, (list, tuple)):
+        return {'arrayValue': {'values': [_otlp_value(v) for v in value]}}
+    return {'stringValue': str(value)}
+
+
+class OTLPHookExporter(SpanExporter):
+    """
+    Converts spans to the OTLP/HTTP JSON shape. The payload is handed to ``hook``
+    when configured (for example to forward into an OpenTelemetry SDK), otherwise
+    it is posted to ``endpoint`` (typically ``http://collector:4318/v1/traces``).
+    """
+
+    def __init__(self, endpoint: str = '', hook=None, timeout: float = 2.0):
+        self.endpoint = endpoint
+        self.hook = hook
+        self.timeout = timeout
+
+    def to_payload(self, spans: list[Span]) -> dict:
+        otlp_spans = []
+        for span in spans:
+            otlp_spans.append({
+                'traceId': span.trace_id.replace('-', '')[:32].rjust(32, '0'),
+                'spanId': span.span_id,
+                'parentSpanId': span.parent_id,
+                'name': span.name,
+                'kind': 1,
+                'startTimeUnixNano': str(int(span.start_time * 1e9)),
+                'endTimeUnixNano': str(int(span.end_time * 1e9)),
+                'attributes': [{'key': k, 'value': _otlp_value(v)} for k, v in span.attributes.items()],
+                'status': {'code': 2, 'message': span.error} if span.status == 'error' else {'code': 1},
+            })
+        return {
+            'resourceSpans': [{
+                'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': 'django_ai_admin'}}]},
+                'scopeSpans': [{'scope': {'name': 'django_ai_admin'}, 'spans': otlp_spans}],
+            }],
+        }
+
+    def export(self, spans: list[Span]) -> None:
+        payload = self.to_payload(spans)
+        if self.hook is not None:
+            self.hook(payload)
+            return
+        if self.endpoint:
+            requests.post(self.endpoint, json=payload, timeout=self.timeout)
+
+
+def _build_exporter(ref) -> SpanExporter | None:
+    if isinstance(ref, SpanExporter):
+        return ref
+    if ref == 'log':
+        return LogSpanExporter()
+    if ref == 'json_file':
+        return JsonFileSpanExporter(get_tracing_json_file())
+    if ref == 'otlp':
+        hook_ref = get_tracing_otlp_hook()
+        hook = import_string(hook_ref) if hook_ref else None
+        return OTLPHookExporter(endpoint=get_tracing_otlp_endpoint(), hook=hook)
+    loaded = import_string(ref)
+    return loaded() if isinstance(loaded, type) else loaded
+
+
+def get_exporters() -> list[SpanExporter]:
+    exporters = []
+    for ref in get_tracing_exporters():
+        try:
+            exporter = _build_exporter(ref)
+        except Exception:
+            logger.exception('ai_admin tracing exporter %r could not be loaded', ref)
+            continue
+        if exporter is not None:
+            exporters.append(exporter)
+    return exporters
+
+
+def _export(spans: list[Span], exporters: list[SpanExporter]) -> None:
+    for exporter in exporters:
+        try:
+            exporter.export(spans)
+        except Exception:
+            logger.exception('ai_admin tracing export failed (%s)', type(exporter).__name__)
+
+
+class SpanExportQueue:
+    """
+    Hands finished traces to their exporters from a daemon thread, so a slow or unreachable
+    collector never adds to turn latency. At most ``max_size`` traces wait; when the queue is
+    full the newest trace is dropped and counted in ``ai_admin_traces_dropped_total``.
+    """
+
+    def __init__(self, max_size: int = 1000, autostart: bool = True):
+        self.max_size = max(1, int(max_size))
+        self.autostart = autostart
+        self._queue: queue.Queue = queue.Queue(maxsize=self.max_size)
+        self._start_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._pid = os.getpid()
+
+    def submit(self, spans: list[Span], exporters: list[SpanExporter]) -> bool:
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((spans, exporters))
+        except queue.Full:
+            TRACES_DROPPED.inc()
+            logger.warning('ai_admin tracing export queue is full; dropped trace %s', spans[0].trace_id)
+            return False
+        return True
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def flush(self) -> None:
+        """Export everything queued so far, including a trace the thread is exporting right now."""
+        while True:
+            try:
+                spans, exporters = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                _export(spans, exporters)
+            finally:
+                self._queue.task_done()
+        self._queue.join()
+
+    def _ensure_started(self) -> None:
+        if not self.autostart:
+            return
+        pid = os.getpid()
+        if self._thread is not None and self._thread.is_alive() and self._pid == pid:
+            return
+        with self._start_lock:
+            if pid != self._pid:
+                # Forked worker: the inherited queue belongs to the parent process.
+                self._queue = queue.Queue(maxsize=self.max_size)
+                self._pid = pid
+                self._thread = None
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='ai-admin-span-export', daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            spans, exporters = self._queue.get()
+            try:
+                _export(spans, exporters)
+            finally:
+                self._queue.task_done()
+
+
+_export_queue: SpanExportQueue | None = None
+_export_queue_lock = threading.Lock()
+
+
+def get_span_export_queue() -> SpanExportQueue:
+    global _export_queue
+    if _export_queue is None:
+        with _export_queue_lock:
+            if _export_queue is None:
+                _export_queue = SpanExportQueue(max_size=get_tracing_queue_size())
+                atexit.register(_export_queue.flush)
+    return _export_queue
+
+
+def export_spans(spans: list[Span]) -> None:
+    if not spans:
+        return
+    exporters = get_exporters()
+    if exporters:
+        get_span_export_queue().submit(spans, exporters)
+
+
+def flush_spans() -> None:
+    """Block until every queued trace is exported (tests, management commands, shutdown)."""
+    if _export_queue is not None:
+        _export_queue.flush()
@@ -0,0 +1,152 @@
+import json
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ..conf import get_llm_http_pool_size
+from ..models import AIConfig
+from .admission import admit
+from .endpoints import chat_completions_url, endpoint_key, route_endpoints
+from .metrics import ERRORS, LLM_FAILOVERS, LLM_PROMPT_CACHE, LLM_REQUEST_DURATION, LLM_TOKENS, record_cache
+from .mock_llm import MockLLMError, get_mock_llm, is_mock_provider
+from .provider_health import CircuitOpen, LLMHTTPError, get_endpoint_health, is_provider_failure, parse_retry_after
+from .tracing import start_span
+from .usage import record_usage
+
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """Shared keep-alive session so concurrent turns reuse provider connections instead of new TLS handshakes."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            pool_size = get_llm_http_pool_size()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+            session = requests.Session()
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session = session
+        return _session
+
+
+def post_chat_completion(
+    payload: dict,
+    cfg: AIConfig,
+    *,
+    purpose: str,
+    timeout: float | None = None,
+    error_prefix: str = 'LLM error',
+) -> dict:
+    """
+    Send ``payload`` to the endpoints serving ``purpose`` (see ``route_endpoints``), moving on to
+    the next one after a provider failure or an open circuit. Each endpoint gets its own model.
+    """
+    endpoints = route_endpoints(purpose, cfg)
+    for index, endpoint in enumerate(endpoints):
+        try:
+            return _complete(
+                {**payload, 'model': endpoint.model or payload.get('model')},
+                endpoint,
+                purpose=purpose,
+                timeout=timeout,
+                error_prefix=error_prefix,
+            )
+        except Exception as exc:
+            if index + 1 == len(endpoints) or not (isinstance(exc, CircuitOpen) or is_provider_failure(exc)):
+                raise
+            LLM_FAILOVERS.inc(purpose=purpose)
+
+
+def _complete(payload: dict, cfg: AIConfig, *, purpose: str, timeout: float | None, error_prefix: str) -> dict:
+    model = payload.get('model') or cfg.model
+    endpoint = endpoint_key(cfg)
+    health = get_endpoint_health(endpoint)
+    if not health.allow():
+        ERRORS.inc(code='llm_circuit_open')
+        raise CircuitOpen(endpoint, health.retry_in())
+    recorded = False
+    try:
+        with start_span('llm.chat_completion', purpose=purpose, model=model) as span:
+            with admit('llm'):
+                t0 = time.perf_counter()
+                try:
+                    data = _post(payload, cfg, purpose=purpose, timeout=timeout, error_prefix=error_prefix)
+                except Exception as exc:
+                    recorded = True
+                    if is_provider_failure(exc):
+                        health.record_failure(getattr(exc, 'retry_after', None))
+                    else:
+                        # The endpoint answered (e.g. 400/401): healthy as far as the breaker is concerned.
+                        health.record_success()
+                    raise
+                recorded = True
+                health.record_success(time.perf_counter() - t0)
+            usage = record_usage(purpose, model, data.get('usage'))
+            span.set_attributes(
+                prompt_tokens=usage.prompt_tokens,
+                completion_tokens=usage.completion_tokens,
+                cached_tokens=usage.cached_tokens,
+            )
+    finally:
+        if not recorded:
+            # No admission slot (CapacityExhausted): a half-open probe must not be used up without an outcome.
+            health.release_probe()
+    LLM_TOKENS.inc(usage.prompt_tokens, purpose=purpose, kind='prompt')
+    LLM_TOKENS.inc(usage.completion_tokens, purpose=purpose, kind='completion')
+    LLM_TOKENS.inc(usage.cached_tokens, purpose=purpose, kind='cached')
+    if usage.prompt_tokens:
+        record_cache('provider_prompt', usage.cached_tokens > 0)
+        LLM_PROMPT_CACHE.inc(purpose=purpose, result='hit' if usage.cached_tokens else 'miss')
+    return data
+
+
+def _post(payload: dict, cfg: AIConfig, *, purpose: str, timeout: float | None, error_prefix: str) -> dict:
+    if is_mock_provider(cfg):
+        return _post_mock(payload, purpose=purpose, error_prefix=error_prefix)
+    headers = {
+        'Authorization': f'Bearer {cfg.api_key}',
+        'Content-Type': 'application/json',
+    }
+    t0 = time.perf_counter()
+    try:
+        response = get_http_session().post(
+            chat_completions_url(cfg),
+            headers=headers,
+            data=json.dumps(payload),
+            timeout=timeout or cfg.timeout_sec,
+        )
+    except requests.Timeout:
+        LLM_REQUEST_DURATION.observe(time.perf_counter() - t0, purpose=purpose, status='timeout')
+        ERRORS.inc(code='llm_timeout')
+        raise
+    except requests.RequestException:
+        LLM_REQUEST_DURATION.observe(time.perf_counter() - t0, purpose=purpose, status='connection_error')
+        ERRORS.inc(code='llm_connection_error')
+        raise
+    if response.status_code != 200:
+        LLM_REQUEST_DURATION.observe(time.perf_counter() - t0, purpose=purpose, status=str(response.status_code))
+        ERRORS.inc(code=f'llm_http_{response.status_code}')
+        raise LLMHTTPError(
+            f'{error_prefix} {response.status_code}',
+            response.status_code,
+            parse_retry_after(response.headers.get('Retry-After')),
+        )
+    LLM_REQUEST_DURATION.observe(time.perf_counter() - t0, purpose=purpose, status='ok')
+    return response.json()
+
+
+def _post_mock(payload: dict, *, purpose: str, error_prefix: str) -> dict:
+    t0 = time.perf_counter()
+    try:
+        data = get_mock_llm().complete(payload, purpose=purpose)
+    except MockLLMError as exc:
+        LLM_REQUEST_DURATION.observe(time.perf_counter() - t0, purpose=purpose, status=str(exc.status_code))
+        ERRORS.inc(code=f'llm_http_{exc.status_code}')
+        raise LLMHTTPError(f'{error_prefix} {exc.status_code}', exc.status_code, exc.retry_after) from None
+    LLM_REQUEST_DURATION.observe(time.perf_counter() - t0, purpose=purpose, status='ok')
+    return data
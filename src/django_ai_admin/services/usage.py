@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from decimal import Decimal
+
+from ..conf import get_model_prices
+
+PER_TOKENS = Decimal(1_000_000)
+
+
+@dataclass
+class LLMUsage:
+    purpose: str
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    cost_usd: Decimal = Decimal('0')
+
+
+class UsageCollector:
+    """Token usage of every LLM call made during one assistant turn."""
+
+    def __init__(self):
+        self.calls: list[LLMUsage] = []
+
+    def add(self, usage: LLMUsage) -> None:
+        self.calls.append(usage)
+
+    def totals(self) -> dict:
+        return {
+            'prompt_tokens': sum(c.prompt_tokens for c in self.calls),
+            'completion_tokens': sum(c.completion_tokens for c in self.calls),
+            'cached_tokens': sum(c.cached_tokens for c in self.calls),
+            'cost_usd': sum((c.cost_usd for c in self.calls), Decimal('0')),
+        }
+
+    def as_list(self) -> list[dict]:
+        out = []
+        for call in self.calls:
+            item = asdict(call)
+            item['cost_usd'] = float(call.cost_usd)
+            out.append(item)
+        return out
+
+
+_current: ContextVar[UsageCollector | None] = ContextVar('django_ai_admin_usage', default=None)
+
+
+@contextmanager
+def collect_usage():
+    collector = UsageCollector()
+    token = _current.set(collector)
+    try:
+        yield collector
+    finally:
+        _current.reset(token)
+
+
+def _as_int(value) -> int:
+    try:
+        return max(0, int(value or 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+def parse_usage(usage) -> tuple[int, int, int]:
+    """Return (prompt, completion, cached) tokens from an OpenAI-style usage block."""
+    if not isinstance(usage, dict):
+        return 0, 0, 0
+    details = usage.get('prompt_tokens_details') or {}
+    cached = details.get('cached_tokens') if isinstance(details, dict) else 0
+    return _as_int(usage.get('prompt_tokens')), _as_int(usage.get('completion_tokens')), _as_int(cached)
+
+
+def _price_for(model: str) -> dict | None:
+    prices = get_model_prices()
+    if model in prices:
+        return prices[model]
+    # Providers often answer with dated snapshots (gpt-4o-mini-2024-07-18).
+    matches = [key for key in prices if model.startswith(key)]
+    if not matches:
+        return None
+    return prices[max(matches, key=len)]
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> Decimal:
+    price = _price_for(model or '')
+    if not price:
+        return Decimal('0')
+    input_price = Decimal(str(price.get('input', 0) or 0))
+    cached_price = Decimal(str(price.get('cached_input', price.get('input', 0)) or 0))
+    output_price = Decimal(str(price.get('output', 0) or 0))
+    cached = min(cached_tokens, prompt_tokens)
+    total = (prompt_tokens - cached) * input_price + cached * cached_price + completion_tokens * output_price
+    return (total / PER_TOKENS).quantize(Decimal('0.000001'))
+
+
+def record_usage(purpose: str, model: str, usage) -> LLMUsage:
+    prompt_tokens, completion_tokens, cached_tokens = parse_usage(usage)
+    item = LLMUsage(
+        purpose=purpose,
+        model=model or '',
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        cached_tokens=cached_tokens,
+        cost_usd=estimate_cost(model or '', prompt_tokens, completion_tokens, cached_tokens),
+    )
+    collector = _current.get()
+    if collector is not None:
+        collector.add(item)
+    return item
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import contextvars
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+from ..conf import get_async_pipeline_threads, get_llm_max_workers
+
+_executor: ThreadPoolExecutor | None = None
+_pipeline_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Shared pool for LLM calls made off the request thread."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=get_llm_max_workers(), thread_name_prefix='ai-admin-llm')
+        return _executor
+
+
+def submit_in_context(fn, *args, **kwargs) -> Future:
+    # The copied context carries the turn's usage collector and trace into the worker.
+    return get_executor().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def get_pipeline_executor() -> ThreadPoolExecutor:
+    """Bounded pool for whole message turns started from async views."""
+    global _pipeline_executor
+    with _executor_lock:
+        if _pipeline_executor is None:
+            _pipeline_executor = ThreadPoolExecutor(
+                max_workers=get_async_pipeline_threads(),
+                thread_name_prefix='ai-admin-pipeline',
+            )
+        return _pipeline_executor
+
+
+def _with_connection_cleanup(fn, *args, **kwargs):
+    # Pool threads are outside Django's request signals, so they expire their own connections.
+    close_old_connections()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_in_pipeline(fn, *args, **kwargs):
+    """
+    Await ``fn`` on the pipeline pool. Unlike Django's default ``thread_sensitive`` handling,
+    turns run in parallel, up to DJANGO_AI_ADMIN_ASYNC_PIPELINE_THREADS at once.
+    """
+    runner = sync_to_async(_with_connection_cleanup, thread_sensitive=False, executor=get_pipeline_executor())
+    return await runner(fn, *args, **kwargs)
@@ -502,6 +502,32 @@
     });
   }
 
+  var JOB_WAIT_LIMIT_MS = 5 * 60 * 1000;
+
+  function waitForJob(res, delayMs, deadline) {
+    // Background job mode: the message endpoint answers 202 and the result is long-polled.
+    if (!res || (res.type !== 'queued' && res.type !== 'running') || !res.data || !res.data.job_id) {
+      return Promise.resolve(res);
+    }
+    deadline = deadline || Date.now() + JOB_WAIT_LIMIT_MS;
+    if (Date.now() >= deadline) {
+      // No worker picked the job up in time; stop polling instead of spinning forever.
+      return Promise.resolve({
+        type: 'error',
+        message: 'The assistant is taking too long to respond. Please try again later.',
+        data: { error_code: 'job_timeout', job_id: res.data.job_id },
+        meta: res.meta || {},
+      });
+    }
+    return new Promise(function (resolve) {
+      setTimeout(resolve, delayMs || 0);
+    }).then(function () {
+      return fetchJSON(apiUrl('api/jobs/' + res.data.job_id));
+    }).then(function (next) {
+      return waitForJob(next, 1000, deadline);
+    });
+  }
+
   function sendMessage() {
     if (requestInFlight) return;
     if (!currentChatId && !draftChatMode) return;
@@ -520,6 +546,8 @@
         method: 'POST',
         body: JSON.stringify({ content: v }),
       });
+    }).then(function (res) {
+      return waitForJob(res, 0);
     }).then(function (res) {
       hideTypingIndicator();
       setRequestState(false);
@@ -0,0 +1,155 @@
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from django_ai_admin.models import AIConfig, Chat, QueryLog
+from django_ai_admin.services.admission import (
+    CacheSemaphore,
+    CapacityExhausted,
+    FairSemaphore,
+    admit,
+    check_user_rate,
+)
+from django_ai_admin.services.benchmark import post_turn
+from django_ai_admin.services.intent_router import IntentDecision
+
+LOCMEM = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'admission': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'admission-tests'},
+}
+
+
+class AdmissionPrimitiveTests(SimpleTestCase):
+    def test_fair_semaphore_admits_waiters_in_arrival_order(self):
+        semaphore = FairSemaphore(1)
+        held = semaphore.acquire(0)
+        order = []
+
+        def wait(name):
+            token = semaphore.acquire(5)
+            order.append(name)
+            semaphore.release(token)
+
+        threads = []
+        for name in ('first', 'second', 'third'):
+            thread = threading.Thread(target=wait, args=(name,))
+            thread.start()
+            threads.append(thread)
+            while len(semaphore._waiters) < len(threads):
+                time.sleep(0.005)
+        semaphore.release(held)
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(order, ['first', 'second', 'third'])
+        self.assertIsNone(FairSemaphore(0).acquire(0.01))
+
+    @override_settings(DJANGO_AI_ADMIN_MAX_CONCURRENT_LLM_CALLS=1, DJANGO_AI_ADMIN_ADMISSION_WAIT_SEC=0.05)
+    def test_admit_raises_when_no_slot_frees_up_in_time(self):
+        with admit('llm'):
+            with self.assertRaises(CapacityExhausted):
+                with admit('llm'):
+                    pass
+        with admit('llm'):
+            pass
+
+    @override_settings(CACHES=LOCMEM)
+    def test_cache_semaphore_slots_are_shared(self):
+        cache = caches['admission']
+        first = CacheSemaphore(cache, 'llm', 1, lease_sec=30)
+        other_process = CacheSemaphore(cache, 'llm', 1, lease_sec=30)
+        token = first.acquire(0)
+        self.assertIsNone(other_process.acquire(0))
+        first.release(token)
+        self.assertIsNotNone(other_process.acquire(0))
+
+    @override_settings(CACHES=LOCMEM)
+    def test_cache_semaphore_release_after_lease_expiry_keeps_other_claim(self):
+        cache = caches['admission']
+        first = CacheSemaphore(cache, 'llm', 1, lease_sec=30)
+        other_process = CacheSemaphore(cache, 'llm', 1, lease_sec=30)
+        slot = first.acquire(0)
+        cache.delete(slot[0])  # the lease ran out while the turn was still running
+        self.assertIsNotNone(other_process.acquire(0))
+        first.release(slot)
+        self.assertIsNone(first.acquire(0))
+        cache.clear()
+
+    @override_settings(DJANGO_AI_ADMIN_USER_TURNS_PER_MINUTE=60, DJANGO_AI_ADMIN_USER_TURN_BURST=2)
+    def test_token_bucket_allows_burst_then_refills(self):
+        self.assertEqual(check_user_rate('bucket-user'), 0)
+        self.assertEqual(check_user_rate('bucket-user'), 0)
+        retry_after = check_user_rate('bucket-user')
+        self.assertGreater(retry_after, 0)
+        self.assertLessEqual(retry_after, 1)
+        self.assertEqual(check_user_rate('other-user'), 0)
+
+    @override_settings(DJANGO_AI_ADMIN_USER_TURNS_PER_MINUTE=1, DJANGO_AI_ADMIN_USER_TURN_BURST=2)
+    def test_refilled_buckets_of_idle_users_are_evicted(self):
+        with mock.patch('django_ai_admin.services.admission._buckets', {}) as buckets, \
+                mock.patch('django_ai_admin.services.admission._buckets_swept', 0.0), \
+                mock.patch('django_ai_admin.services.admission.time') as fake_time:
+            clock = fake_time.monotonic
+            clock.return_value = 1000.0
+            check_user_rate('idle-user')
+            check_user_rate('busy-user')
+            clock.return_value = 1030.0
+            check_user_rate('busy-user')
+            clock.return_value = 1070.0
+            check_user_rate('new-user')
+
+        self.assertEqual(sorted(buckets), ['busy-user', 'new-user'])
+
+    @override_settings(
+        CACHES=LOCMEM,
+        DJANGO_AI_ADMIN_ADMISSION_CACHE='admission',
+        DJANGO_AI_ADMIN_USER_TURNS_PER_MINUTE=1,
+    )
+    def test_shared_user_limit_counts_per_minute(self):
+        self.assertEqual(check_user_rate('shared-user'), 0)
+        self.assertGreater(check_user_rate('shared-user'), 0)
+
+
+class AdmissionViewTests(TestCase):
+    def setUp(self):
+        AIConfig.objects.create(provider='mock', model='mock')
+        self.user = get_user_model().objects.create_user('staff', is_staff=True)
+        self.chat = Chat.objects.create(owner=self.user, title='Users')
+
+    @override_settings(DJANGO_AI_ADMIN_USER_TURNS_PER_MINUTE=1)
+    def test_user_over_rate_gets_429_before_anything_is_stored(self):
+        with mock.patch('django_ai_admin.views.execute', return_value={'result': 1, 'rows': 1, 'truncated': False}):
+            self.assertEqual(post_turn(self.user, self.chat.pk, 'How many users?').status_code, 200)
+            response = post_turn(self.user, self.chat.pk, 'How many users?')
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.data['data']['error_code'], 'rate_limited')
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+        self.assertEqual(self.chat.messages.filter(role='user').count(), 1)
+
+    def test_exhausted_execute_capacity_is_reported_without_retries(self):
+        with mock.patch('django_ai_admin.views.execute', side_effect=CapacityExhausted('execute')) as execute:
+            response = post_turn(self.user, self.chat.pk, 'How many users are there?')
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.data['type'], 'error')
+        self.assertEqual(response.data['data']['error_code'], 'capacity_exhausted')
+        self.assertEqual(execute.call_count, 1)
+        log = QueryLog.objects.get()
+        self.assertEqual((log.route, log.error), ('ERROR', 'capacity exhausted: execute'))
+        reply = self.chat.messages.get(role='assistant')
+        self.assertEqual(reply.meta['error_code'], 'capacity_exhausted')
+
+    @override_settings(DJANGO_AI_ADMIN_GENERATION_CANDIDATES=3)
+    def test_exhausted_capacity_skips_remaining_candidates(self):
+        decision = IntentDecision(label='DATA_QUERY', confidence=0.9, candidate_models=['auth.User', 'auth.Group'])
+        with mock.patch('django_ai_admin.views.route_intent', return_value=decision), \
+                mock.patch('django_ai_admin.views.execute', side_effect=CapacityExhausted('execute')) as execute:
+            response = post_turn(self.user, self.chat.pk, 'How many users are there?')
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(execute.call_count, 1)
@@ -0,0 +1,78 @@
+import asyncio
+import json
+import threading
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import AsyncRequestFactory, TransactionTestCase
+
+from django_ai_admin.models import AIConfig, Chat, QueryLog
+from django_ai_admin.views import _render_chat_message, async_chat_message_view
+
+EXECUTED = {'result': 3, 'rows': 1, 'truncated': False}
+
+
+class AsyncPipelineTests(TransactionTestCase):
+    def setUp(self):
+        AIConfig.objects.create(provider='mock', model='mock')
+        self.user = get_user_model().objects.create_user('staff', is_staff=True)
+        self.chats = [Chat.objects.create(owner=self.user) for _ in range(3)]
+
+    def _request(self, chat):
+        request = AsyncRequestFactory().post(
+            f'/api/chats/{chat.pk}/message',
+            data=json.dumps({'content': 'How many users are there?'}),
+            content_type='application/json',
+        )
+        request.user = self.user
+        request._dont_enforce_csrf_checks = True
+        return request
+
+    async def test_turn_is_answered_on_pipeline_pool(self):
+        threads = []
+
+        def execute(code, **kwargs):
+            threads.append(threading.current_thread().name)
+            return EXECUTED
+
+        chat = self.chats[0]
+        with mock.patch('django_ai_admin.views.execute', side_effect=execute):
+            response = await async_chat_message_view(self._request(chat), chat_id=chat.pk)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['type'], 'answer')
+        self.assertTrue(threads[0].startswith('ai-admin-pipeline'))
+        self.assertEqual(await QueryLog.objects.filter(route='DATA_QUERY').acount(), 1)
+
+    async def test_real_turns_overlap_on_the_pipeline_pool(self):
+        # Every turn must be inside execute() at the same time. The shared in-memory sqlite test
+        # database cannot take concurrent writers, so each turn holds db_lock while it is outside
+        # execute(); the turns themselves run unchanged on the pipeline pool.
+        barrier = threading.Barrier(len(self.chats), timeout=5)
+        db_lock = threading.Lock()
+        threads = set()
+
+        def execute(code, **kwargs):
+            threads.add(threading.current_thread().name)
+            db_lock.release()
+            try:
+                barrier.wait()
+            finally:
+                db_lock.acquire()
+            return EXECUTED
+
+        def render_serialized(request, chat_id):
+            with db_lock:
+                return _render_chat_message(request, chat_id)
+
+        with mock.patch('django_ai_admin.views.execute', side_effect=execute), \
+                mock.patch('django_ai_admin.views._render_chat_message', side_effect=render_serialized):
+            responses = await asyncio.gather(*(
+                async_chat_message_view(self._request(chat), chat_id=chat.pk) for chat in self.chats
+            ))
+
+        self.assertEqual([r.status_code for r in responses], [200, 200, 200])
+        self.assertTrue(all(json.loads(r.content)['type'] == 'answer' for r in responses))
+        self.assertEqual(len(threads), 3)
+        self.assertTrue(all(name.startswith('ai-admin-pipeline') for name in threads))
+        self.assertEqual(await QueryLog.objects.filter(route='DATA_QUERY').acount(), 3)
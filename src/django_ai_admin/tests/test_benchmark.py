@@ -0,0 +1,41 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+
+from django_ai_admin.models import AIConfig, Chat, QueryLog
+from django_ai_admin.services.benchmark import build_synthetic_models, run_benchmark
+from django_ai_admin.services.manifest import build_manifest
+
+
+class BenchmarkTests(TestCase):
+    def test_synthetic_models_feed_the_manifest(self):
+        manifest = build_manifest(build_synthetic_models(3))
+        self.assertEqual(sorted(manifest), ['ai_admin_bench.Entity00000', 'ai_admin_bench.Entity00001', 'ai_admin_bench.Entity00002'])
+        self.assertIn('parent', manifest['ai_admin_bench.Entity00001'])
+
+    def test_run_benchmark_reports_each_size_and_cleans_up(self):
+        # The executor needs Postgres; the pipeline around it is what is measured here.
+        executed = {'result': 3, 'rows': 1, 'truncated': False}
+        with mock.patch('django_ai_admin.views.execute', return_value=executed):
+            results = run_benchmark(sizes=(5,), iterations=2, questions=('How many users are there?',))
+
+        item = results['sizes']['5']
+        self.assertGreaterEqual(item['models'], 5)
+        self.assertEqual(item['response_types'], {'answer': 2})
+        self.assertGreater(item['router_prompt_chars'], 0)
+        self.assertGreater(item['post_queries']['p50'], 0)
+        self.assertFalse(AIConfig.objects.exists())
+        self.assertFalse(Chat.objects.exists())
+        self.assertFalse(QueryLog.objects.exists())
+
+    def test_turns_still_write_after_the_unmocked_execute_benchmark(self):
+        # Only the turns' execute is stubbed; bench_execute_overhead runs the real executor first.
+        executed = {'result': 3, 'rows': 1, 'truncated': False}
+        with mock.patch('django_ai_admin.views.execute', return_value=executed):
+            results = run_benchmark(sizes=(5,), iterations=2, questions=('How many users are there?',))
+
+        if connection.vendor == 'postgresql':
+            self.assertIn('ms', results['execute_overhead'])
+        self.assertEqual(results['sizes']['5']['response_types'], {'answer': 2})
+        self.assertFalse(Chat.objects.exists())
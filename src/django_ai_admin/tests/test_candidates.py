@@ -0,0 +1,90 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from django_ai_admin.models import AIConfig, Chat, QueryLog
+from django_ai_admin.services.benchmark import post_turn
+from django_ai_admin.services.candidates import rank_candidates, validate_candidate
+from django_ai_admin.services.intent_router import IntentDecision
+
+MANIFEST = {'auth.User': ['id', 'username'], 'auth.Group': ['id', 'name']}
+
+
+class CandidateRankingTests(SimpleTestCase):
+    def test_validate_candidate(self):
+        self.assertEqual(validate_candidate('result = User.objects.count()', MANIFEST), '')
+        self.assertIn('syntax', validate_candidate('result = User.objects.count(', MANIFEST))
+        self.assertEqual(validate_candidate('result = Order.objects.count()', MANIFEST), 'unknown model Order')
+        self.assertEqual(validate_candidate('User.objects.count()', MANIFEST), 'result is never assigned')
+
+    def test_rank_drops_duplicates_and_invalid_and_prefers_primary_model(self):
+        ranked, stats = rank_candidates(
+            [
+                {'code': 'result = Group.objects.count()'},
+                {'code': 'result = Order.objects.count()'},
+                {'code': 'result = User.objects.count()'},
+                {'code': 'result = Group.objects.count()'},
+            ],
+            MANIFEST,
+            ['auth.User'],
+        )
+        self.assertEqual([item['index'] for item in ranked], [2, 0])
+        self.assertEqual(stats, {'generated': 4, 'unique': 3, 'valid': 2})
+
+    def test_rank_keeps_invalid_when_nothing_is_valid(self):
+        ranked, stats = rank_candidates([{'code': 'x = 1'}], MANIFEST)
+        self.assertEqual(len(ranked), 1)
+        self.assertEqual(ranked[0]['problem'], 'result is never assigned')
+        self.assertEqual(stats['valid'], 0)
+
+
+@override_settings(DJANGO_AI_ADMIN_GENERATION_CANDIDATES=3)
+class CandidateGenerationViewTests(TestCase):
+    def setUp(self):
+        AIConfig.objects.create(provider='mock', model='mock')
+        self.user = get_user_model().objects.create_user('staff', is_staff=True)
+        self.chat = Chat.objects.create(owner=self.user)
+        self.decision = IntentDecision(
+            label='DATA_QUERY',
+            confidence=0.9,
+            candidate_models=['auth.User', 'auth.Group'],
+        )
+
+    def _post(self, execute):
+        with mock.patch('django_ai_admin.views.route_intent', return_value=self.decision), \
+                mock.patch('django_ai_admin.views.execute', side_effect=execute):
+            return post_turn(self.user, self.chat.pk, 'How many users are there?')
+
+    def test_single_request_returns_n_choices_and_first_valid_executes(self):
+        def execute(code, **kwargs):
+            return {'result': code, 'rows': 1, 'truncated': False}
+
+        response = self._post(execute)
+
+        self.assertEqual(response.data['data']['code'], 'result = User.objects.count()')
+        meta = QueryLog.objects.get().query_meta
+        self.assertEqual(meta['candidates'], {'generated': 3, 'unique': 2, 'valid': 2, 'chosen': 0})
+        self.assertEqual([c['purpose'] for c in meta['llm_usage']].count('generation'), 1)
+
+    def test_falls_through_to_next_candidate_when_execution_fails(self):
+        def execute(code, **kwargs):
+            if 'User' in code:
+                raise ValueError('boom')
+            return {'result': 2, 'rows': 1, 'truncated': False}
+
+        response = self._post(execute)
+
+        self.assertEqual(response.data['type'], 'answer')
+        self.assertEqual(response.data['data']['code'], 'result = Group.objects.count()')
+        self.assertEqual(QueryLog.objects.get().query_meta['candidates']['chosen'], 1)
+
+    @override_settings(DJANGO_AI_ADMIN_GENERATION_CANDIDATES_MODE='parallel')
+    def test_parallel_mode_sends_one_request_per_candidate(self):
+        response = self._post(lambda code, **kwargs: {'result': 1, 'rows': 1, 'truncated': False})
+
+        self.assertEqual(response.data['type'], 'answer')
+        meta = QueryLog.objects.get().query_meta
+        self.assertEqual([c['purpose'] for c in meta['llm_usage']].count('generation'), 3)
+        # Every parallel request sees the same prompt, so the mock returns identical code.
+        self.assertEqual(meta['candidates']['unique'], 1)
@@ -0,0 +1,120 @@
+import threading
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from django_ai_admin.models import AIConfig, Chat, QueryLog
+from django_ai_admin.services.benchmark import post_turn
+from django_ai_admin.services.coalescing import CACHE_PREFIX, coalescing_key, run_coalesced
+from django_ai_admin.services.timing import StageTimer
+
+LOCMEM = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'coalesce': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'coalesce-tests'},
+}
+
+
+@override_settings(DJANGO_AI_ADMIN_COALESCING=True, CACHES=LOCMEM)
+class RunCoalescedTests(SimpleTestCase):
+    def test_key_ignores_case_and_spacing_but_not_models(self):
+        with mock.patch('django_ai_admin.services.coalescing.get_manifest_hash', return_value='m1'):
+            key = coalescing_key('How many  Users?', ['auth.User'])
+            self.assertEqual(key, coalescing_key('how many users?', ['auth.User']))
+            self.assertNotEqual(key, coalescing_key('how many users?', ['auth.Group']))
+
+    def test_key_separates_chats_with_different_context(self):
+        with mock.patch('django_ai_admin.services.coalescing.get_manifest_hash', return_value='m1'):
+            fresh = coalescing_key('and last week?', ['auth.User'], {'summary': '', 'turns': []})
+            self.assertEqual(fresh, coalescing_key('and last week?', ['auth.User']))
+            self.assertNotEqual(
+                coalescing_key('and last week?', ['auth.User'], {'summary': 'Active staff users', 'turns': []}),
+                coalescing_key('and last week?', ['auth.User'], {'summary': 'Users who never logged in', 'turns': []}),
+            )
+        with override_settings(DJANGO_AI_ADMIN_COALESCING=False):
+            self.assertIsNone(coalescing_key('how many users?', ['auth.User']))
+
+    def test_concurrent_callers_share_one_run(self):
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return {'value': 42}
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(run_coalesced('k1', slow, StageTimer())))
+            for _ in range(3)
+        ]
+        for thread in threads:
+            thread.start()
+        started.wait(5)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(role for _, role in results), ['', 'follower', 'follower'])
+        self.assertTrue(all(outcome == {'value': 42} for outcome, _ in results))
+
+    def test_follower_runs_itself_when_leader_fails(self):
+        started = threading.Event()
+
+        def failing():
+            started.set()
+            raise RuntimeError('boom')
+
+        thread = threading.Thread(target=lambda: self.assertRaises(
+            RuntimeError, run_coalesced, 'k2', failing, StageTimer(),
+        ))
+        thread.start()
+        started.wait(5)
+        outcome, role = run_coalesced('k2', lambda: {'value': 1}, StageTimer())
+        thread.join(5)
+        self.assertEqual((outcome, role), ({'value': 1}, ''))
+
+    @override_settings(DJANGO_AI_ADMIN_COALESCING_CACHE='coalesce')
+    def test_waits_for_leader_in_another_process_via_cache(self):
+        cache = caches['coalesce']
+        cache.add(f'{CACHE_PREFIX}k3:lock', 1)
+        threading.Timer(0.2, lambda: cache.set(f'{CACHE_PREFIX}k3:result', {'value': 7})).start()
+
+        timer = StageTimer()
+        outcome, role = run_coalesced('k3', lambda: {'value': 0}, timer)
+
+        self.assertEqual((outcome, role), ({'value': 7}, 'follower'))
+        self.assertEqual([item['stage'] for item in timer.as_list()], ['coalesced_wait'])
+
+
+class CoalescedTurnTests(TestCase):
+    def test_follower_reuses_outcome_but_writes_its_own_rows(self):
+        AIConfig.objects.create(provider='mock', model='mock')
+        user = get_user_model().objects.create_user('staff', is_staff=True)
+        chat = Chat.objects.create(owner=user, title='Users')
+        shared = {
+            'success': True,
+            'summary': 'There are 5 users.',
+            'explanation': '',
+            'code': 'result = User.objects.count()',
+            'result': 5,
+            'truncated': False,
+            'rows': 1,
+            'error': '',
+            'prev_code': None,
+            'retry_count': 0,
+            'candidates': None,
+        }
+
+        with mock.patch('django_ai_admin.views.run_coalesced', return_value=(shared, 'follower')), \
+                mock.patch('django_ai_admin.views.execute') as execute:
+            response = post_turn(user, chat.pk, 'How many users are there?')
+
+        execute.assert_not_called()
+        self.assertEqual(response.data['data']['result'], 5)
+        self.assertEqual(chat.messages.filter(role='assistant').get().content, 'There are 5 users.')
+        log = QueryLog.objects.get()
+        self.assertEqual((log.query_meta['coalesced'], log.orm_code), ('follower', 'result = User.objects.count()'))
@@ -0,0 +1,78 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from django_ai_admin.models import AIConfig, Chat, QueryLog
+from django_ai_admin.services.benchmark import post_turn
+from django_ai_admin.services.combined import route_and_generate
+
+EXECUTED = {'result': 3, 'rows': 1, 'truncated': False}
+MANIFEST = {'shop.Order': ['id', 'total'], 'auth.User': ['id', 'username']}
+
+
+def _reply(content):
+    return {'choices': [{'message': {'content': content}}]}
+
+
+class RouteAndGenerateTests(TestCase):
+    def setUp(self):
+        AIConfig.objects.create(provider='mock', model='mock')
+
+    def test_reply_is_normalized_and_code_extracted(self):
+        content = (
+            '{"label": "data_query", "confidence": 0.8, "candidate_models": ["shop.Order", "shop.Nope"],'
+            ' "summary": "Order count.", "explanation": "Counts orders.",'
+            ' "code": "```python\\nresult = Order.objects.count()\\n```"}'
+        )
+        with mock.patch('django_ai_admin.services.combined.post_chat_completion', return_value=_reply(content)):
+            decision, generated = route_and_generate('How many orders?', MANIFEST)
+
+        self.assertEqual((decision.label, decision.candidate_models), ('DATA_QUERY', ['shop.Order']))
+        self.assertEqual(generated['code'], 'result = Order.objects.count()')
+        self.assertEqual(generated['summary'], 'Order count.')
+
+    def test_unparseable_reply_signals_fallback(self):
+        with mock.patch('django_ai_admin.services.combined.post_chat_completion', return_value=_reply('Sure! Orders.')):
+            self.assertEqual(route_and_generate('How many orders?', MANIFEST), (None, None))
+
+
+@override_settings(DJANGO_AI_ADMIN_COMBINED_ROUTING=True)
+class CombinedTurnTests(TestCase):
+    def setUp(self):
+        AIConfig.objects.create(provider='mock', model='mock')
+        self.user = get_user_model().objects.create_user('staff', is_staff=True)
+        self.chat = Chat.objects.create(owner=self.user, title='Existing')
+
+    def _purposes(self):
+        return [c['purpose'] for c in QueryLog.objects.get().query_meta['llm_usage']]
+
+    def test_data_query_uses_one_call(self):
+        with mock.patch('django_ai_admin.views.execute', return_value=EXECUTED):
+            response = post_turn(self.user, self.chat.pk, 'How many users are there?')
+
+        self.assertEqual(response.data['data']['code'], 'result = User.objects.count()')
+        self.assertEqual(self._purposes(), ['route_generate', 'summary'])
+
+    def test_falls_back_to_two_calls(self):
+        with mock.patch('django_ai_admin.views.route_and_generate', return_value=(None, None)), \
+                mock.patch('django_ai_admin.views.execute', return_value=EXECUTED):
+            response = post_turn(self.user, self.chat.pk, 'How many users are there?')
+
+        self.assertEqual(response.data['type'], 'answer')
+        self.assertEqual(self._purposes(), ['router', 'generation', 'summary'])
+
+    def test_clarification_pick_skips_the_combined_call(self):
+        self.chat.pending_clarification = {
+            'base_question': 'How many users are there?',
+            'options': [{'id': '1', 'label': 'Users', 'model': 'auth.User'}],
+        }
+        self.chat.save(update_fields=['pending_clarification'])
+        with mock.patch('django_ai_admin.views.route_and_generate') as combined, \
+                mock.patch('django_ai_admin.views.route_intent') as routed, \
+                mock.patch('django_ai_admin.views.execute', return_value=EXECUTED):
+            post_turn(self.user, self.chat.pk, '1')
+
+        combined.assert_not_called()
+        routed.assert_not_called()
+        self.assertEqual(QueryLog.objects.get().query_meta['candidate_models'], ['auth.User'])
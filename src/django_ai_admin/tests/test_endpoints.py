@@ -0,0 +1,61 @@
+from unittest import mock
+
+import requests
+from django.test import TestCase
+
+from django_ai_admin.models import AIConfig
+from django_ai_admin.services.endpoints import endpoint_key, get_llm_config, route_endpoints
+from django_ai_admin.services.llm_client import suggest_chat_title
+from django_ai_admin.services.provider_health import get_endpoint_health, reset_endpoint_health
+
+
+class EndpointSelectionTests(TestCase):
+    def setUp(self):
+        reset_endpoint_health()
+        self.addCleanup(reset_endpoint_health)
+
+    def test_purposes_pick_the_endpoint(self):
+        fast = AIConfig.objects.create(name='fast', provider='mock', model='mini', purposes='router, title')
+        strong = AIConfig.objects.create(name='strong', provider='mock', model='large', purposes='generation')
+        AIConfig.objects.create(name='off', provider='mock', model='old', is_active=False)
+
+        self.assertEqual(get_llm_config('generation'), strong)
+        self.assertEqual(get_llm_config('title'), fast)
+        self.assertIsNone(get_llm_config('summary'))
+        self.assertEqual(route_endpoints('title', fast), [fast])
+
+    def test_open_circuits_and_standby_endpoints_go_last(self):
+        standby = AIConfig.objects.create(name='standby', provider='mock', model='a', weight=0)
+        broken = AIConfig.objects.create(name='broken', provider='mock', model='b')
+        primary = AIConfig.objects.create(name='primary', provider='mock', model='c')
+        health = get_endpoint_health(endpoint_key(broken))
+        for _ in range(5):
+            health.record_failure()
+
+        cfg = get_llm_config('summary')
+        self.assertEqual(route_endpoints('summary', cfg), [primary, standby, broken])
+
+    def test_lower_latency_wins_at_equal_weight(self):
+        slow = AIConfig.objects.create(name='slow', provider='mock', model='a')
+        fast = AIConfig.objects.create(name='fast', provider='mock', model='b')
+        get_endpoint_health(endpoint_key(slow)).record_success(2.0)
+        get_endpoint_health(endpoint_key(fast)).record_success(0.1)
+
+        cfg = get_llm_config('summary')
+        with mock.patch('django_ai_admin.services.endpoints.random.random', return_value=0.5):
+            self.assertEqual(route_endpoints('summary', cfg), [fast, slow])
+
+    def test_provider_failure_fails_over_to_next_endpoint(self):
+        remote = AIConfig.objects.create(
+            name='remote', provider='openai', model='gpt', api_key='k', base_url='http://llm.invalid/v1/',
+        )
+        AIConfig.objects.create(name='local', provider='mock', model='mock', weight=0)
+        session = mock.Mock()
+        session.post.side_effect = requests.ConnectionError('refused')
+
+        with mock.patch('django_ai_admin.services.transport.get_http_session', return_value=session):
+            title = suggest_chat_title('How many users signed up last week?')
+
+        self.assertTrue(title)
+        self.assertEqual(session.post.call_args.args[0], 'http://llm.invalid/v1/chat/completions')
+        self.assertEqual(get_endpoint_health(endpoint_key(remote)).failures, 1)
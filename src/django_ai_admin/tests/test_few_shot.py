@@ -0,0 +1,75 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from django_ai_admin.models import AIConfig, QueryLog
+from django_ai_admin.services.benchmark import use_manifest
+from django_ai_admin.services.few_shot import FewShotIndex, few_shot_examples
+from django_ai_admin.services.llm_client import _generation_payload
+from django_ai_admin.services.manifest import get_manifest_hash
+
+MANIFEST = {'shop.Payment': ['id', 'amount', 'created_at'], 'shop.Order': ['id', 'total', 'created_at']}
+
+
+def _log(question, code, models, manifest_hash, **fields):
+    return QueryLog.objects.create(
+        route='DATA_QUERY',
+        question=question,
+        orm_code=code,
+        query_meta={'candidate_models': models, 'manifest_hash': manifest_hash},
+        **fields,
+    )
+
+
+class FewShotIndexTests(TestCase):
+    def test_refresh_is_incremental_and_skips_failures(self):
+        index = FewShotIndex()
+        _log('payments by day', 'result = 1', ['shop.Payment'], 'h1')
+        _log('broken query', 'result = x', ['shop.Payment'], 'h1', error='NameError')
+        self.assertEqual((index.refresh(), len(index)), (1, 1))
+
+        _log('orders by month', 'result = 2', ['shop.Order'], 'h1')
+        self.assertEqual((index.refresh(), len(index)), (1, 2))
+        self.assertEqual(index.refresh(), 0)
+
+    def test_search_ranks_by_bm25_within_models_and_manifest_version(self):
+        index = FewShotIndex()
+        _log('total payment amount last week', 'result = 1', ['shop.Payment'], 'h1')
+        _log('how many payments were refunded', 'result = 2', ['shop.Payment'], 'h1')
+        _log('total payment amount by user', 'result = 3', ['shop.Payment'], 'old')
+        _log('total order amount last week', 'result = 4', ['shop.Order'], 'h1')
+        index.refresh()
+
+        found = index.search('Total payments amount for last month', ['shop.Payment'], 'h1', k=3)
+        self.assertEqual([example.code for example in found], ['result = 1', 'result = 2'])
+        self.assertEqual(index.search('total order amount', ['shop.Order'], 'h1')[0].code, 'result = 4')
+
+    def test_examples_are_opt_in(self):
+        with mock.patch('django_ai_admin.services.few_shot._index', FewShotIndex()) as index:
+            _log('payments by day', 'result = 1', ['shop.Payment'], get_manifest_hash())
+            self.assertEqual(few_shot_examples('payments by day', ['shop.Payment']), [])
+        self.assertEqual(len(index), 0)
+
+    def test_oldest_examples_are_evicted_and_repeats_replaced(self):
+        index = FewShotIndex(max_size=2)
+        index.add(1, 'payments today', 'result = 1')
+        index.add(2, 'payments today', 'result = 1')
+        index.add(3, 'orders today', 'result = 2')
+        index.add(4, 'users today', 'result = 3')
+        self.assertEqual([example.id for example in index.search('today', k=5)], [4, 3])
+
+
+@override_settings(DJANGO_AI_ADMIN_FEW_SHOT_EXAMPLES=3)
+class FewShotPromptTests(TestCase):
+    def test_examples_are_injected_after_the_stable_prefix(self):
+        cfg = AIConfig(provider='mock', model='mock')
+        with use_manifest(MANIFEST), \
+                mock.patch('django_ai_admin.services.few_shot._index', FewShotIndex()):
+            _log('payments in the last 7 days', 'result = Payment.objects.count()', ['shop.Payment'], get_manifest_hash())
+            payload = _generation_payload('payments in the last 30 days', None, None, None, None, ['shop.Payment'], cfg)
+            plain = _generation_payload('orders per day', None, None, None, None, ['shop.Order'], cfg)
+
+        self.assertEqual(payload['messages'][0]['content'], plain['messages'][0]['content'])
+        turn = payload['messages'][1]['content']
+        self.assertIn('Q: payments in the last 7 days\n```python\nresult = Payment.objects.count()\n```', turn)
+        self.assertNotIn('Q: ', plain['messages'][1]['content'])
@@ -1,6 +1,6 @@
 from django.test import SimpleTestCase
 
-from django_ai_admin.services.intent_router import INTERNAL_APP_LABEL, route_intent
+from django_ai_admin.services.intent_router import INTERNAL_APP_LABEL, resolve_clarification_reply, route_intent
 
 
 class IntentRouterTests(SimpleTestCase):
@@ -101,3 +101,33 @@ class IntentRouterTests(SimpleTestCase):
         self.assertEqual(decision.label, 'DATA_QUERY')
         self.assertTrue(decision.candidate_models)
         self.assertTrue(decision.candidate_models[0].startswith('domain_chat.'))
+
+    def test_resolves_clarification_pick(self):
+        pending = {
+            'id': 'c1',
+            'base_question': 'Show weekly stats',
+            'options': [
+                {'id': '1', 'label': 'app.User', 'model': 'app.User'},
+                {'id': '2', 'label': 'app.Payment', 'model': 'app.Payment'},
+            ],
+        }
+
+        for reply in ('2', 'Option 2.', 'app.Payment', 'payment'):
+            decision = resolve_clarification_reply(reply, pending, self.manifest)
+            self.assertEqual(
+                (decision.label, decision.candidate_models, decision.normalized_query, decision.reason),
+                ('DATA_QUERY', ['app.Payment'], 'Show weekly stats', 'clarification_resolved'),
+            )
+
+    def test_unmatched_clarification_reply_goes_to_router(self):
+        pending = {'base_question': 'Show weekly stats', 'options': [{'id': '1', 'label': 'Users', 'model': 'app.User'}]}
+        calls = []
+
+        def classifier(**kwargs):
+            calls.append(kwargs['pending_clarification'])
+            return {'label': 'DATA_QUERY', 'candidate_models': ['app.Payment'], 'normalized_query': kwargs['question']}
+
+        self.assertIsNone(resolve_clarification_reply('payments, by week', pending, self.manifest))
+        decision = route_intent('payments, by week', self.manifest, pending_clarification=pending, classifier=classifier)
+        self.assertEqual(calls, [pending])
+        self.assertEqual(decision.candidate_models, ['app.Payment'])
@@ -0,0 +1,107 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from django_ai_admin.models import AIConfig, Chat, Message, MessageJob, QueryLog
+from django_ai_admin.services.benchmark import post_turn
+from django_ai_admin.services.jobs import _Heartbeat, claim_next_job, requeue_stale_jobs, run_job, run_worker
+from django_ai_admin.views import MessageJobView
+
+EXECUTED = {'result': 3, 'rows': 1, 'truncated': False}
+
+
+@override_settings(DJANGO_AI_ADMIN_BACKGROUND_JOBS=True)
+class BackgroundJobTests(TestCase):
+    def setUp(self):
+        AIConfig.objects.create(provider='mock', model='mock')
+        self.user = get_user_model().objects.create_user('staff', is_staff=True)
+        self.chat = Chat.objects.create(owner=self.user)
+
+    def _poll(self, job_id, user=None):
+        request = APIRequestFactory().get(f'/api/jobs/{job_id}', {'wait': 0})
+        force_authenticate(request, user=user or self.user)
+        response = MessageJobView.as_view()(request, job_id=job_id)
+        response.render()
+        return response
+
+    def test_message_is_queued_and_answered_by_worker(self):
+        response = post_turn(self.user, self.chat.pk, 'How many users are there?')
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['type'], 'queued')
+        job_id = response.data['data']['job_id']
+        self.assertEqual(list(self.chat.messages.values_list('role', flat=True)), ['user'])
+        self.assertEqual(self._poll(job_id).status_code, 202)
+
+        with mock.patch('django_ai_admin.views.execute', return_value=EXECUTED):
+            self.assertEqual(run_worker(worker='test', once=True), 1)
+
+        polled = self._poll(job_id)
+        self.assertEqual(polled.status_code, 200)
+        self.assertEqual(polled.data['type'], 'answer')
+        self.assertEqual(polled.data['meta']['trace_id'], response.data['meta']['trace_id'])
+        self.assertEqual(Message.objects.filter(chat=self.chat, role='user').count(), 1)
+        self.assertEqual(Message.objects.filter(chat=self.chat, role='assistant').count(), 1)
+        log = QueryLog.objects.get()
+        self.assertEqual(log.trace_id, response.data['meta']['trace_id'])
+        self.assertEqual(log.query_meta['timings'][0]['stage'], 'queue_wait')
+
+    def test_jobs_are_private_to_their_user(self):
+        job = MessageJob.objects.create(chat=self.chat, user=self.user, content='x')
+        other = get_user_model().objects.create_user('other', is_staff=True)
+        self.assertEqual(self._poll(job.pk, user=other).status_code, 404)
+
+    def test_a_job_is_claimed_once(self):
+        job = MessageJob.objects.create(chat=self.chat, user=self.user, content='x')
+        self.assertEqual(claim_next_job('a').pk, job.pk)
+        self.assertIsNone(claim_next_job('b'))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker, job.attempts), ('running', 'a', 1))
+
+    @override_settings(DJANGO_AI_ADMIN_JOB_STALE_SEC=60, DJANGO_AI_ADMIN_JOB_MAX_ATTEMPTS=2)
+    def test_stale_running_jobs_are_requeued_then_failed(self):
+        started = timezone.now() - timedelta(minutes=5)
+        running = {'chat': self.chat, 'user': self.user, 'status': 'running', 'started_at': started}
+        retry = MessageJob.objects.create(content='a', attempts=1, **running)
+        spent = MessageJob.objects.create(content='b', attempts=2, **running)
+
+        self.assertEqual(requeue_stale_jobs(), 2)
+
+        retry.refresh_from_db()
+        spent.refresh_from_db()
+        self.assertEqual(retry.status, 'queued')
+        self.assertEqual(spent.status, 'failed')
+        self.assertEqual(spent.result['data']['error_code'], 'job_failed')
+
+    @override_settings(DJANGO_AI_ADMIN_JOB_STALE_SEC=60)
+    def test_heartbeat_keeps_a_long_running_job_claimed(self):
+        MessageJob.objects.create(chat=self.chat, user=self.user, content='x')
+        job = claim_next_job('a')
+        MessageJob.objects.filter(pk=job.pk).update(started_at=timezone.now() - timedelta(minutes=5))
+
+        self.assertTrue(_Heartbeat(job).beat())
+        self.assertEqual(requeue_stale_jobs(), 0)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker), ('running', 'a'))
+
+    def test_result_of_a_job_taken_over_is_not_saved(self):
+        MessageJob.objects.create(chat=self.chat, user=self.user, content='How many users are there?')
+        job = claim_next_job('a')
+        MessageJob.objects.filter(pk=job.pk).update(worker='b')
+
+        with mock.patch('django_ai_admin.views.execute', return_value=EXECUTED):
+            run_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker), ('running', 'b'))
+        self.assertIsNone(job.result)
+
+    def test_worker_keeps_the_connection_of_an_open_transaction(self):
+        with mock.patch.object(connection, 'close_if_unusable_or_obsolete') as recycle:
+            self.assertEqual(run_worker(worker='test', once=True), 0)
+        recycle.assert_not_called()
@@ -0,0 +1,35 @@
+from django.test import SimpleTestCase
+
+from django_ai_admin.services.metrics import MetricsRegistry
+
+
+class MetricsRegistryTests(SimpleTestCase):
+    def test_renders_counters_with_labels(self):
+        registry = MetricsRegistry()
+        turns = registry.counter('turns_total', 'Turns.', ('route',))
+        turns.inc(route='DATA_QUERY')
+        turns.inc(2, route='DATA_QUERY')
+        turns.inc(route='say "hi"')
+
+        text = registry.render()
+        self.assertIn('# TYPE turns_total counter', text)
+        self.assertIn('turns_total{route="DATA_QUERY"} 3', text)
+        self.assertIn('turns_total{route="say \\"hi\\""} 1', text)
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry()
+        latency = registry.histogram('latency_seconds', 'Latency.', ('purpose',), buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            latency.observe(value, purpose='router')
+
+        text = registry.render()
+        self.assertIn('latency_seconds_bucket{purpose="router",le="0.1"} 2', text)
+        self.assertIn('latency_seconds_bucket{purpose="router",le="1"} 3', text)
+        self.assertIn('latency_seconds_bucket{purpose="router",le="+Inf"} 4', text)
+        self.assertIn('latency_seconds_count{purpose="router"} 4', text)
+        self.assertIn('latency_seconds_sum{purpose="router"} 3.65', text)
+
+    def test_registering_same_name_returns_existing_metric(self):
+        registry = MetricsRegistry()
+        first = registry.counter('errors_total', 'Errors.', ('code',))
+        self.assertIs(registry.counter('errors_total', 'Errors.', ('code',)), first)
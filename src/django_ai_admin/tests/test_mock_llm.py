@@ -0,0 +1,63 @@
+import json
+import threading
+
+import requests
+from django.test import TestCase, override_settings
+
+from django_ai_admin.models import AIConfig
+from django_ai_admin.services.intent_router import route_intent
+from django_ai_admin.services.llm_client import chat_generate_orm, suggest_chat_title
+from django_ai_admin.services.mock_llm import MockLLM, make_server
+
+MANIFEST = {
+    'shop.Order': ['id', 'total', 'created_at'],
+    'shop.Customer': ['id', 'email'],
+    'auth.User': ['id', 'username'],
+}
+
+
+class MockProviderTests(TestCase):
+    def setUp(self):
+        AIConfig.objects.create(provider='mock', api_key='', model='mock-model')
+
+    def test_pipeline_calls_are_answered_without_api_key(self):
+        decision = route_intent('How many orders were placed?', MANIFEST)
+        self.assertEqual(decision.label, 'DATA_QUERY')
+        self.assertEqual(decision.candidate_models[0], 'shop.Order')
+
+        generated = chat_generate_orm('How many orders?', candidate_models=decision.candidate_models)
+        self.assertEqual(generated['code'], 'result = Order.objects.count()')
+        self.assertEqual(suggest_chat_title('how many orders were placed today'), 'How Many Orders Were Placed')
+
+    @override_settings(DJANGO_AI_ADMIN_MOCK_LLM_ERROR_RATE=1.0, DJANGO_AI_ADMIN_MOCK_LLM_ERROR_STATUS=429)
+    def test_error_injection(self):
+        with self.assertRaisesMessage(RuntimeError, 'LLM error 429'):
+            chat_generate_orm('How many orders?')
+        self.assertEqual(route_intent('orders', MANIFEST).reason, 'router_error:LLMHTTPError')
+
+
+class MockServerTests(TestCase):
+    def test_http_stand_in_uses_fixtures_and_injected_errors(self):
+        llm = MockLLM(fixtures=[
+            {'purpose': 'summary', 'match': 'broken', 'status': 503},
+            {'purpose': 'summary', 'match': '', 'content': 'Forty-two orders.'},
+        ])
+        server = make_server('127.0.0.1', 0, llm)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        url = 'http://127.0.0.1:%d/v1/chat/completions' % server.server_address[1]
+
+        def ask(question):
+            messages = [
+                {'role': 'system', 'content': 'You are an analytics summarizer.'},
+                {'role': 'user', 'content': f'Question: {question}\nData: 42'},
+            ]
+            return requests.post(url, data=json.dumps({'model': 'm', 'messages': messages}), timeout=5)
+
+        ok = ask('how many orders')
+        self.assertEqual(ok.status_code, 200)
+        self.assertEqual(ok.json()['choices'][0]['message']['content'], 'Forty-two orders.')
+        self.assertGreater(ok.json()['usage']['prompt_tokens'], 0)
+        self.assertEqual(ask('broken').status_code, 503)
@@ -0,0 +1,63 @@
+import marshal
+import threading
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from django_ai_admin.models import ProfileCapture
+from django_ai_admin.services.profiling import profile_call, profile_reason, top_functions
+
+
+def _busy(n):
+    return sum(i * i for i in range(n))
+
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('staff', password='x', is_staff=True)
+
+    def _request(self, user, **meta):
+        return SimpleNamespace(user=user, META=meta)
+
+    def test_header_opt_in_requires_staff(self):
+        self.assertEqual(profile_reason(self._request(self.user, HTTP_X_AI_ADMIN_PROFILE='1')), 'header')
+        self.assertEqual(profile_reason(self._request(self.user)), '')
+        other = get_user_model().objects.create_user('plain', password='x')
+        self.assertEqual(profile_reason(self._request(other, HTTP_X_AI_ADMIN_PROFILE='1')), '')
+
+    @override_settings(DJANGO_AI_ADMIN_PROFILE_SAMPLE_RATE=1.0, DJANGO_AI_ADMIN_PROFILE_HEADER_ENABLED=False)
+    def test_sampling(self):
+        self.assertEqual(profile_reason(self._request(self.user, HTTP_X_AI_ADMIN_PROFILE='1')), 'sampled')
+
+    def test_profile_call_stores_loadable_stats(self):
+        result = profile_call('trace-1', 'header', _busy, 1000, user=self.user, chat_id=7)
+
+        self.assertEqual(result, _busy(1000))
+        capture = ProfileCapture.objects.get(trace_id='trace-1')
+        self.assertEqual((capture.user, capture.chat_id, capture.reason), (self.user, 7, 'header'))
+        self.assertIsInstance(marshal.loads(bytes(capture.stats)), dict)
+        self.assertIn('_busy', top_functions(capture, limit=10))
+
+    def test_concurrent_turns_are_profiled_one_at_a_time(self):
+        started, release = threading.Event(), threading.Event()
+
+        def slow():
+            started.set()
+            release.wait(5)
+            return 'first'
+
+        results = []
+        with mock.patch('django_ai_admin.services.profiling.save_profile') as save:
+            thread = threading.Thread(target=lambda: results.append(profile_call('trace-a', 'sampled', slow)))
+            thread.start()
+            started.wait(5)
+            try:
+                self.assertEqual(profile_call('trace-b', 'sampled', _busy, 10), _busy(10))
+            finally:
+                release.set()
+                thread.join(5)
+
+        self.assertEqual(results, ['first'])
+        self.assertEqual([call.args[1] for call in save.call_args_list], ['trace-a'])
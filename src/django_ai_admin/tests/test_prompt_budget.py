@@ -0,0 +1,57 @@
+import json
+
+from django.test import SimpleTestCase, override_settings
+
+from django_ai_admin.models import AIConfig
+from django_ai_admin.services.benchmark import use_manifest
+from django_ai_admin.services.llm_client import _generation_payload
+from django_ai_admin.services.prompt_budget import PromptBudget, Section, estimate_tokens
+
+MANIFEST = {f'shop.Model{index:03d}': [f'field_{n}' for n in range(12)] for index in range(200)}
+
+
+class PromptBudgetTests(SimpleTestCase):
+    def test_estimate_tokens(self):
+        self.assertEqual(estimate_tokens(''), 0)
+        self.assertEqual(estimate_tokens('count users'), 4)
+        self.assertEqual(estimate_tokens('{"a": 12345}'), 8)
+
+    def test_sections_fill_by_priority(self):
+        prompt = PromptBudget('generation', 60)
+        turns = '\n'.join(f'- user: question {n}' for n in range(5))
+        fitted = prompt.fit([
+            Section('rules', 'Answer with ORM code only.', required=True),
+            Section('manifest', '\n'.join(f'app.M{n}: id, name' for n in range(50)), priority=4),
+            Section('recent_turns', turns, priority=2, keep='tail'),
+        ])
+
+        self.assertEqual(fitted['recent_turns'], turns)
+        self.assertTrue(fitted['manifest'].startswith('app.M0: id, name'))
+        self.assertLessEqual(prompt.used, 60)
+        self.assertEqual([item['section'] for item in prompt.trimmed], ['manifest'])
+
+    def test_single_long_line_is_cut_by_characters(self):
+        prompt = PromptBudget('summary', 20)
+        text = prompt.take(Section('data', json.dumps([{'id': n} for n in range(100)])))
+        self.assertTrue(text.endswith('…'))
+        self.assertLessEqual(prompt.used, 20)
+
+
+@override_settings(DJANGO_AI_ADMIN_PROMPT_TOKEN_BUDGETS={'generation': 800}, DJANGO_AI_ADMIN_FEW_SHOT_EXAMPLES=0)
+class BudgetedPromptTests(SimpleTestCase):
+    def test_generation_keeps_candidate_schema_and_stable_prefix(self):
+        cfg = AIConfig(provider='mock', model='mock')
+        context = {
+            'summary': 'Orders by month. ' * 100,
+            'turns': [{'role': 'user', 'content': f'turn {n}'} for n in range(6)],
+        }
+        with use_manifest(MANIFEST):
+            first = _generation_payload('How many?', None, None, context, None, ['shop.Model199'], cfg)
+            second = _generation_payload('And now?', None, None, None, None, ['shop.Model000'], cfg)
+
+        self.assertEqual(first['messages'][0]['content'], second['messages'][0]['content'])
+        self.assertNotIn('shop.Model199:', first['messages'][0]['content'])
+        turn = first['messages'][1]['content']
+        self.assertIn('shop.Model199: field_0', turn)
+        self.assertIn('- user: turn 5', turn)
+        self.assertLessEqual(estimate_tokens(''.join(m['content'] for m in first['messages'])), 800)
@@ -0,0 +1,70 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from django_ai_admin.models import AIConfig, Chat
+from django_ai_admin.services.benchmark import post_turn, use_manifest
+from django_ai_admin.services.combined import _build_combined_messages
+from django_ai_admin.services.intent_router import _build_router_messages, _manifest_snippet
+from django_ai_admin.services.llm_client import _generation_payload, chat_generate_orm
+from django_ai_admin.services.metrics import LLM_PROMPT_CACHE
+
+MANIFEST = {'shop.Order': ['id', 'total', 'created_at'], 'auth.User': ['id', 'username', 'date_joined']}
+
+
+class PromptPrefixTests(TestCase):
+    def test_generation_prefix_is_byte_stable_across_turns(self):
+        cfg = AIConfig(provider='mock', model='mock')
+        with use_manifest(MANIFEST):
+            first = _generation_payload('How many orders?', None, None, None, None, ['shop.Order'], cfg)
+            second = _generation_payload(
+                'And users joined last week?',
+                'result = Order.objects.count()',
+                'boom',
+                {'summary': 'Orders per month', 'turns': [{'role': 'user', 'content': 'hi'}]},
+                {'intent': 'count'},
+                ['auth.User'],
+                cfg,
+            )
+        with use_manifest({**MANIFEST, 'shop.Refund': ['id']}):
+            changed = _generation_payload('How many orders?', None, None, None, None, ['shop.Order'], cfg)
+
+        prefix = first['messages'][0]['content'].encode('utf-8')
+        self.assertEqual(prefix, second['messages'][0]['content'].encode('utf-8'))
+        self.assertNotEqual(prefix, changed['messages'][0]['content'].encode('utf-8'))
+        self.assertNotIn(b'Preferred models', prefix)
+        self.assertIn('Orders per month', second['messages'][1]['content'])
+
+    def test_router_and_combined_prompts_share_the_manifest_prefix(self):
+        first = _build_router_messages('How many orders?', MANIFEST)
+        second = _build_router_messages('List users', MANIFEST, {'question': 'Which?'}, 'shop.Order')
+        combined = _build_combined_messages('How many orders?', MANIFEST, None, '', {'summary': 'Orders'})
+
+        self.assertEqual(first[0]['content'], second[0]['content'])
+        self.assertIn('shop.Order: id, total, created_at', first[0]['content'])
+        self.assertNotIn('shop.Order: id', first[1]['content'])
+        self.assertTrue(combined[0]['content'].startswith(first[0]['content']))
+
+    def test_provider_cache_hits_are_counted_from_usage(self):
+        AIConfig.objects.create(provider='mock', model='mock')
+        hits = LLM_PROMPT_CACHE.value(purpose='generation', result='hit')
+        with use_manifest(MANIFEST):
+            chat_generate_orm('How many orders?', candidate_models=['shop.Order'])
+            chat_generate_orm('How many users?', candidate_models=['auth.User'])
+        self.assertGreaterEqual(LLM_PROMPT_CACHE.value(purpose='generation', result='hit'), hits + 1)
+
+    def test_router_manifest_is_built_once_across_turns(self):
+        AIConfig.objects.create(provider='mock', model='mock')
+        user = get_user_model().objects.create_user('staff', is_staff=True)
+        chat = Chat.objects.create(owner=user)
+        executed = {'result': 3, 'rows': 1, 'truncated': False}
+        with use_manifest(MANIFEST), \
+                mock.patch('django_ai_admin.services.intent_router._router_manifest_cache', (None, None)), \
+                mock.patch('django_ai_admin.services.intent_router._manifest_snippet', wraps=_manifest_snippet) as built, \
+                mock.patch('django_ai_admin.views.execute', return_value=executed):
+            post_turn(user, chat.pk, 'How many orders?')
+            post_turn(user, chat.pk, 'How many orders were placed today?')
+            self.assertEqual(built.call_count, 1)
+            _build_router_messages('How many orders?', {**MANIFEST, 'shop.Refund': ['id']})
+            self.assertEqual(built.call_count, 2)
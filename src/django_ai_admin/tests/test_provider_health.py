@@ -0,0 +1,121 @@
+import time
+from unittest import mock
+
+import requests
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from django_ai_admin.models import AIConfig, Chat, QueryLog
+from django_ai_admin.services.admission import CapacityExhausted, admit
+from django_ai_admin.services.benchmark import post_turn
+from django_ai_admin.services.endpoints import endpoint_key
+from django_ai_admin.services.llm_client import chat_generate_orm
+from django_ai_admin.services.provider_health import (
+    CircuitOpen,
+    EndpointHealth,
+    LLMHTTPError,
+    backoff_delay,
+    parse_retry_after,
+    get_endpoint_health,
+    reset_endpoint_health,
+)
+from django_ai_admin.services.transport import post_chat_completion
+
+
+@override_settings(DJANGO_AI_ADMIN_CIRCUIT_FAILURE_THRESHOLD=2, DJANGO_AI_ADMIN_CIRCUIT_RESET_SEC=0.05)
+class CircuitBreakerTests(SimpleTestCase):
+    def test_opens_after_threshold_and_closes_after_successful_probe(self):
+        health = EndpointHealth('x')
+        health.record_failure()
+        self.assertTrue(health.allow())
+        health.record_failure()
+        self.assertEqual(health.state, 'open')
+        self.assertFalse(health.allow())
+
+        time.sleep(0.06)
+        self.assertTrue(health.allow())
+        self.assertEqual(health.state, 'half_open')
+        self.assertFalse(health.allow())
+        health.record_success(0.2)
+        self.assertEqual(health.state, 'closed')
+        self.assertEqual(health.latency_ms, 200)
+
+    def test_failed_probe_reopens_for_at_least_retry_after(self):
+        health = EndpointHealth('x')
+        health.record_failure()
+        health.record_failure()
+        time.sleep(0.06)
+        self.assertTrue(health.allow())
+        health.record_failure(retry_after=5)
+        self.assertEqual(health.state, 'open')
+        self.assertGreater(health.retry_in(), 4)
+
+    @override_settings(DJANGO_AI_ADMIN_MAX_CONCURRENT_LLM_CALLS=1, DJANGO_AI_ADMIN_ADMISSION_WAIT_SEC=0.01)
+    def test_probe_refused_admission_is_handed_back(self):
+        cfg = AIConfig(pk=1, provider='mock', model='mock')
+        health = get_endpoint_health(endpoint_key(cfg))
+        health.record_failure()
+        health.record_failure()
+        time.sleep(0.06)
+        payload = {'messages': [{'role': 'user', 'content': 'hi'}]}
+        try:
+            with mock.patch('django_ai_admin.services.transport.route_endpoints', return_value=[cfg]):
+                with admit('llm'):
+                    with self.assertRaises(CapacityExhausted):
+                        post_chat_completion(payload, cfg, purpose='title')
+                self.assertEqual(health.state, 'half_open')
+                post_chat_completion(payload, cfg, purpose='title')
+            self.assertEqual(health.state, 'closed')
+        finally:
+            reset_endpoint_health()
+
+
+@override_settings(DJANGO_AI_ADMIN_BACKOFF_BASE_SEC=0.5, DJANGO_AI_ADMIN_BACKOFF_MAX_SEC=8)
+class BackoffTests(SimpleTestCase):
+    def test_backoff_delay(self):
+        self.assertEqual(backoff_delay(1, ValueError('bad code')), 0)
+        self.assertLessEqual(backoff_delay(1, LLMHTTPError('LLM error 503', 503)), 0.5)
+        self.assertLessEqual(backoff_delay(3, requests.Timeout()), 2)
+        self.assertGreaterEqual(backoff_delay(1, LLMHTTPError('LLM error 429', 429, retry_after=3)), 3)
+        self.assertIsNone(backoff_delay(1, LLMHTTPError('LLM error 429', 429, retry_after=60)))
+        self.assertEqual(backoff_delay(1, LLMHTTPError('LLM error 401', 401)), 0)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after('7'), 7)
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after('soon'))
+        self.assertAlmostEqual(parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'), 0)
+
+
+@override_settings(
+    DJANGO_AI_ADMIN_CIRCUIT_FAILURE_THRESHOLD=2,
+    DJANGO_AI_ADMIN_CIRCUIT_RESET_SEC=60,
+    DJANGO_AI_ADMIN_BACKOFF_BASE_SEC=0,
+    DJANGO_AI_ADMIN_MOCK_LLM_ERROR_RATE=1.0,
+    DJANGO_AI_ADMIN_MOCK_LLM_ERROR_STATUS=503,
+)
+class ProviderOutageTests(TestCase):
+    def setUp(self):
+        reset_endpoint_health()
+        self.addCleanup(reset_endpoint_health)
+        AIConfig.objects.create(provider='mock', model='mock')
+
+    def test_open_circuit_fails_fast_without_calling_provider(self):
+        for _ in range(2):
+            with self.assertRaises(LLMHTTPError):
+                chat_generate_orm('How many users?')
+        with mock.patch('django_ai_admin.services.transport._post_mock') as post:
+            with self.assertRaises(CircuitOpen):
+                chat_generate_orm('How many users?')
+        post.assert_not_called()
+
+    def test_turn_stops_retrying_once_the_circuit_opens(self):
+        user = get_user_model().objects.create_user('staff', is_staff=True)
+        chat = Chat.objects.create(owner=user, title='Users')
+        response = post_turn(user, chat.pk, 'How many users are there?')
+
+        self.assertEqual(response.data['data']['error_code'], 'execution_failed')
+        log = QueryLog.objects.get()
+        self.assertIn('llm circuit open', log.error)
+        # Router call + first generation open the circuit; the retry fails fast and is final.
+        self.assertEqual(log.query_meta['retry_count'], 1)
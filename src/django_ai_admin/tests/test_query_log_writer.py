@@ -0,0 +1,48 @@
+from django.test import TestCase, override_settings
+
+from django_ai_admin.models import QueryLog
+from django_ai_admin.services.query_log_writer import QueryLogWriter, write_query_log
+
+
+class QueryLogWriterTests(TestCase):
+    def test_sync_mode_writes_immediately(self):
+        record = write_query_log(route='DATA_QUERY', question='How many users?')
+        self.assertIsNotNone(record.pk)
+        self.assertEqual(QueryLog.objects.count(), 1)
+
+    def test_buffered_writer_flushes_in_batches(self):
+        writer = QueryLogWriter(batch_size=2, max_queue_size=10, autostart=False)
+        for idx in range(5):
+            writer.submit(QueryLog(route='DATA_QUERY', question=f'q{idx}'))
+        self.assertEqual(QueryLog.objects.count(), 0)
+        self.assertEqual(writer.pending(), 5)
+
+        self.assertEqual(writer.flush(), 5)
+        self.assertEqual(writer.pending(), 0)
+        self.assertEqual(QueryLog.objects.count(), 5)
+
+    def test_full_queue_writes_inline(self):
+        writer = QueryLogWriter(batch_size=10, max_queue_size=1, autostart=False)
+        writer.submit(QueryLog(route='DATA_QUERY', question='queued'))
+        writer.submit(QueryLog(route='DATA_QUERY', question='overflow'))
+        self.assertEqual(list(QueryLog.objects.values_list('question', flat=True)), ['overflow'])
+
+        writer.shutdown()
+        self.assertEqual(QueryLog.objects.count(), 2)
+
+    def test_failed_batch_is_written_row_by_row(self):
+        writer = QueryLogWriter(batch_size=10, max_queue_size=10, autostart=False)
+        writer.submit(QueryLog(route='DATA_QUERY', question='q1'))
+        writer.submit(QueryLog(route='DATA_QUERY', question=None))
+        writer.submit(QueryLog(route='DATA_QUERY', question='q3'))
+
+        with self.assertLogs('app', 'ERROR') as logs:
+            self.assertEqual(writer.flush(), 2)
+
+        self.assertEqual(sorted(QueryLog.objects.values_list('question', flat=True)), ['q1', 'q3'])
+        self.assertIn('lost 1 of 3 records', logs.output[-1])
+
+    @override_settings(DJANGO_AI_ADMIN_QUERY_LOG_MODE='unknown')
+    def test_unknown_mode_falls_back_to_sync(self):
+        write_query_log(route='ERROR', question='q')
+        self.assertEqual(QueryLog.objects.count(), 1)
@@ -0,0 +1,100 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from django_ai_admin.models import AIConfig, Chat, QueryLog
+from django_ai_admin.services.benchmark import post_turn
+from django_ai_admin.services.intent_router import IntentDecision
+from django_ai_admin.services.query_templates import QueryTemplate, parameterize
+
+MANIFEST = {'shop.Payment': ['id', 'status', 'created_at']}
+CODE = (
+    'since = timezone.now() - timedelta(days=7)\n'
+    "result = Payment.objects.filter(created_at__gte=since, status='paid').count()  # last 7 days"
+)
+
+
+class QueryTemplateTests(SimpleTestCase):
+    def test_parameterize_detects_literals_and_normalizes_periods(self):
+        shape, literals = parameterize('Payments with status "paid" in the past 7 days?')
+        self.assertEqual(shape, 'payments with status {string} in the last {number} day')
+        self.assertEqual([(item.kind, item.value) for item in literals], [('string', 'paid'), ('number', 7)])
+        self.assertEqual(parameterize('payments since 2026-01-01 over 10.5')[0], 'payments since {date} over {number}')
+        self.assertEqual(parameterize('Payments in the last 1 day')[0], shape.replace(' with status {string}', ''))
+
+    def test_fill_replaces_slots_and_keeps_formatting(self):
+        template = QueryTemplate.build('payments with status "paid" in the last 7 days', CODE)
+        _, literals = parameterize("payments with status 'refunded' in the last 30 days")
+
+        code = template.fill(literals, MANIFEST)
+        self.assertEqual(code, CODE.replace('days=7', 'days=30').replace("'paid'", "'refunded'"))
+        self.assertIsNone(template.fill(parameterize('payments with status "paid" in the last "week"')[1], MANIFEST))
+        self.assertIsNone(template.fill(literals, {'shop.Order': ['id']}))
+
+    def test_ambiguous_or_unused_literals_are_not_templated(self):
+        self.assertIsNone(QueryTemplate.build('top 100 payments', 'result = list(Payment.objects.all()[:100])[:100]'))
+        self.assertIsNone(QueryTemplate.build('payments in the last 7 days', 'result = Payment.objects.count()'))
+
+
+@override_settings(DJANGO_AI_ADMIN_QUERY_TEMPLATES=True)
+class QueryTemplateViewTests(TestCase):
+    def setUp(self):
+        AIConfig.objects.create(provider='mock', model='mock')
+        self.user = get_user_model().objects.create_user('staff', is_staff=True)
+        self.chat = Chat.objects.create(owner=self.user)
+        self.decision = IntentDecision(label='DATA_QUERY', confidence=0.9, candidate_models=['auth.User'])
+
+    def test_second_question_reuses_the_template_with_new_literals(self):
+        generated = {
+            'summary': 'Users joined in the last 7 days.',
+            'explanation': 'Counts users with date_joined in the last 7 days.',
+            'code': 'result = User.objects.filter(date_joined__gte=timezone.now() - timedelta(days=7)).count()',
+        }
+        executed = []
+
+        def execute(code, **kwargs):
+            executed.append(code)
+            return {'result': 1, 'rows': 1, 'truncated': False}
+
+        with mock.patch('django_ai_admin.services.query_templates._cache', None), \
+                mock.patch('django_ai_admin.views.route_intent', return_value=self.decision), \
+                mock.patch('django_ai_admin.views.chat_generate_orm_candidates', return_value=[generated]) as generate, \
+                mock.patch('django_ai_admin.views.execute', side_effect=execute):
+            post_turn(self.user, self.chat.pk, 'Users joined in the last 7 days')
+            response = post_turn(self.user, self.chat.pk, 'Users joined in the past 30 days?')
+
+        self.assertEqual(generate.call_count, 1)
+        self.assertIn('timedelta(days=30)', executed[-1])
+        self.assertEqual(response.data['data']['explanation'], 'Counts users with date_joined in the last 30 days.')
+        self.assertEqual(
+            [log.query_meta['template'] for log in QueryLog.objects.order_by('id')],
+            ['learned', 'hit'],
+        )
+
+    def test_failed_template_is_followed_by_a_fresh_generation(self):
+        generated = {
+            'summary': 'Users joined in the last 7 days.',
+            'explanation': 'Counts recent users.',
+            'code': 'result = User.objects.filter(date_joined__gte=timezone.now() - timedelta(days=7)).count()',
+        }
+        calls = []
+
+        def execute(code, **kwargs):
+            calls.append(code)
+            if len(calls) == 2:
+                raise RuntimeError('llm error 400: template code rejected')
+            return {'result': 1, 'rows': 1, 'truncated': False}
+
+        with mock.patch('django_ai_admin.services.query_templates._cache', None), \
+                mock.patch('django_ai_admin.views.route_intent', return_value=self.decision), \
+                mock.patch('django_ai_admin.views.chat_generate_orm_candidates', return_value=[generated]) as generate, \
+                mock.patch('django_ai_admin.views.execute', side_effect=execute):
+            post_turn(self.user, self.chat.pk, 'Users joined in the last 7 days')
+            response = post_turn(self.user, self.chat.pk, 'Users joined in the past 30 days?')
+
+        self.assertEqual(response.data['type'], 'answer')
+        self.assertEqual(generate.call_count, 2)
+        self.assertIsNone(generate.call_args.kwargs['prev_code'])
+        self.assertIsNone(generate.call_args.kwargs['prev_error'])
+        self.assertEqual(QueryLog.objects.order_by('id').last().query_meta['template'], 'failed')
@@ -0,0 +1,41 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from django_ai_admin.models import Chat, QueryLog
+from django_ai_admin.services.replay import anonymize_question, load_questions, replay
+
+
+class AnonymizeTests(SimpleTestCase):
+    def test_masks_identifying_literals(self):
+        self.assertEqual(
+            anonymize_question('Orders by jane.doe@corp.io named "Acme Ltd" phone 555 123 4567 in 2024'),
+            'Orders by user@example.com named "value" phone 0000000 in 2024',
+        )
+
+
+class ReplayTests(TestCase):
+    def test_replays_logged_questions_and_cleans_up(self):
+        QueryLog.objects.create(route='DATA_QUERY', question='How many users are there?')
+        QueryLog.objects.create(route='OUT_OF_SCOPE', question='Tell me a joke')
+        questions = load_questions(routes=['DATA_QUERY'])
+        self.assertEqual(questions, ['How many users are there?'])
+
+        executed = {'result': 3, 'rows': 1, 'truncated': False}
+        with mock.patch('django_ai_admin.views.execute', return_value=executed):
+            report = replay(questions * 3, concurrency=1)
+
+        self.assertEqual(report['outcomes'], {'answer': 3})
+        self.assertEqual(report['stages_ms']['routing']['count'], 3)
+        self.assertIn('generate', report['stages_ms'])
+        self.assertGreater(report['cache']['manifest']['hits'], 0)
+        self.assertEqual(QueryLog.objects.count(), 2)
+        self.assertFalse(Chat.objects.exists())
+
+    @override_settings(DJANGO_AI_ADMIN_USER_TURNS_PER_MINUTE=2, DJANGO_AI_ADMIN_BACKGROUND_JOBS=True)
+    def test_replay_is_not_rate_limited_or_queued(self):
+        executed = {'result': 3, 'rows': 1, 'truncated': False}
+        with mock.patch('django_ai_admin.views.execute', return_value=executed):
+            report = replay(['How many users are there?'] * 5, concurrency=1)
+
+        self.assertEqual(report['outcomes'], {'answer': 5})
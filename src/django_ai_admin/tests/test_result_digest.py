@@ -0,0 +1,93 @@
+import json
+import re
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from django_ai_admin.models import AIConfig
+from django_ai_admin.services.llm_client import answer_with_data
+from django_ai_admin.services.prompt_budget import estimate_tokens
+from django_ai_admin.services.result_digest import build_result_digest, dumps_digest
+
+ROWS = [
+    {'id': n, 'status': 'paid' if n % 3 else 'refunded', 'total': n * 10, 'created_at': f'2026-01-{n % 28 + 1:02d}'}
+    for n in range(100)
+]
+
+
+class ResultDigestTests(SimpleTestCase):
+    def test_small_results_are_sent_whole(self):
+        self.assertEqual(build_result_digest(42), {'truncated': False, 'data': 42})
+        digest = build_result_digest(ROWS[:3], truncated=True)
+        self.assertEqual((digest['row_count'], digest['truncated'], digest['rows']), (3, True, ROWS[:3]))
+
+    def test_columns_are_summarized_over_every_row(self):
+        digest = build_result_digest(ROWS)
+        columns = {column['name']: column for column in digest['columns']}
+
+        self.assertEqual((digest['row_count'], digest['column_count']), (100, 4))
+        self.assertEqual((columns['total']['sum'], columns['total']['max']), (49500, 990))
+        self.assertEqual(columns['status']['top'], [['paid', 66], ['refunded', 34]])
+        self.assertEqual((columns['created_at']['type'], columns['created_at']['min']), ('datetime', '2026-01-01'))
+        self.assertEqual((digest['head'][0]['id'], digest['tail'][-1]['id'], digest['omitted_rows']), (0, 99, 90))
+
+    def test_digest_shrinks_to_the_budget_and_stays_valid_json(self):
+        digest = build_result_digest([[n, f'name {n}'] for n in range(500)], max_tokens=150)
+        text = dumps_digest(digest)
+        self.assertLessEqual(estimate_tokens(text), 150)
+        self.assertEqual(json.loads(text)['row_count'], 500)
+        self.assertLess(len(digest.get('head', [])), 5)
+
+    def test_large_mappings_are_digested_as_key_value_rows(self):
+        counts = {f'2026-{n // 28 + 1:02d}-{n % 28 + 1:02d}': n for n in range(336)}
+        text = dumps_digest(build_result_digest(counts, max_tokens=300))
+        digest = json.loads(text)
+
+        self.assertLessEqual(estimate_tokens(text), 300)
+        self.assertEqual((digest['shape'], digest['row_count']), ('mapping', 336))
+        value = next(column for column in digest['columns'] if column['name'] == 'value')
+        self.assertEqual(value['sum'], sum(range(336)))
+        self.assertEqual(build_result_digest({'a': 1}, max_tokens=300)['data'], {'a': 1})
+
+
+@override_settings(DJANGO_AI_ADMIN_PROMPT_TOKEN_BUDGETS={'summary': 600})
+class SummarizerDigestTests(SimpleTestCase):
+    def test_summarizer_receives_the_digest(self):
+        captured = {}
+
+        def post(payload, cfg, **kwargs):
+            captured.update(payload)
+            return {'choices': [{'message': {'content': 'ok'}}]}
+
+        cfg = AIConfig(provider='mock', model='m')
+        with mock.patch('django_ai_admin.services.llm_client.get_llm_config', return_value=cfg), \
+                mock.patch('django_ai_admin.services.llm_client.post_chat_completion', side_effect=post):
+            answer_with_data('Total of orders?', ROWS * 5, truncated=True)
+
+        content = captured['messages'][1]['content']
+        data = json.loads(re.search(r'^Data: (.*)$', content, flags=re.M).group(1))
+        self.assertEqual((data['row_count'], data['truncated']), (500, True))
+        total = next(column for column in data['columns'] if column['name'] == 'total')
+        self.assertEqual(total['sum'], 247500)
+        self.assertLessEqual(estimate_tokens(''.join(m['content'] for m in captured['messages'])), 600)
+
+    def test_dropped_data_is_reported_as_truncated(self):
+        captured = {}
+
+        def post(payload, cfg, **kwargs):
+            captured.update(payload)
+            return {'choices': [{'message': {'content': 'ok'}}]}
+
+        cfg = AIConfig(provider='mock', model='m')
+        with mock.patch('django_ai_admin.services.llm_client.get_llm_config', return_value=cfg), \
+                mock.patch('django_ai_admin.services.llm_client.post_chat_completion', side_effect=post):
+            answer_with_data('Orders per day?', {f'day {n}': n for n in range(336)})
+            mapping = captured['messages'][1]['content']
+            answer_with_data('Show the report', 'line of text ' * 2000)
+            scalar = captured['messages'][1]['content']
+
+        data = json.loads(re.search(r'^Data: (.*)$', mapping, flags=re.M).group(1))
+        self.assertEqual((data['shape'], data['row_count'], data['truncated']), ('mapping', 336, False))
+        data = json.loads(re.search(r'^Data: (.*)$', scalar, flags=re.M).group(1))
+        self.assertEqual((data['data_cut'], data['truncated']), (True, True))
+        self.assertTrue(scalar.endswith('Truncated: True'))
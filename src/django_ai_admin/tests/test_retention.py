@@ -0,0 +1,80 @@
+import glob
+import gzip
+import json
+import os
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.db import DatabaseError
+from django.db.models import QuerySet
+from django.test import TestCase
+from django.utils import timezone
+
+from django_ai_admin.models import QueryLog, QueryLogDailyRollup
+from django_ai_admin.services.retention import archive_query_logs, rebuild_daily_rollups, summarize_rollups
+
+
+class RetentionTests(TestCase):
+    def _log(self, days_ago: int, duration_ms: int, route='DATA_QUERY', error=''):
+        log = QueryLog.objects.create(route=route, intent_label=route, question='q', duration_ms=duration_ms, error=error)
+        QueryLog.objects.filter(pk=log.pk).update(created_at=timezone.now() - timedelta(days=days_ago))
+        return log
+
+    def test_rollup_counts_errors_and_percentiles(self):
+        for duration in range(10, 110, 10):
+            self._log(0, duration)
+        self._log(0, 500, route='ERROR', error='boom')
+
+        rebuild_daily_rollups(timezone.localdate())
+        rollup = QueryLogDailyRollup.objects.get(route='DATA_QUERY')
+        self.assertEqual(rollup.count, 10)
+        self.assertEqual(rollup.p50_duration_ms, 50)
+        self.assertEqual(rollup.p95_duration_ms, 100)
+        error_rollup = QueryLogDailyRollup.objects.get(route='ERROR')
+        self.assertEqual(error_rollup.error_rate, 1.0)
+
+        stats = {item['route']: item for item in summarize_rollups(days=1)}
+        self.assertEqual(stats['DATA_QUERY']['count'], 10)
+        self.assertEqual(stats['ERROR']['error_count'], 1)
+
+    def test_archive_writes_ndjson_and_keeps_rollups(self):
+        old = self._log(40, 120)
+        recent = self._log(1, 80)
+        with tempfile.TemporaryDirectory() as tmp:
+            stats = archive_query_logs(timezone.localdate() - timedelta(days=30), archive_dir=tmp, batch_size=1)
+            self.assertEqual(stats['archived'], 1)
+            with gzip.open(stats['files'][0], 'rt', encoding='utf-8') as fh:
+                rows = [json.loads(line) for line in fh]
+
+        self.assertEqual([row['id'] for row in rows], [old.pk])
+        self.assertEqual(list(QueryLog.objects.values_list('pk', flat=True)), [recent.pk])
+        rollup = QueryLogDailyRollup.objects.get()
+        self.assertEqual(rollup.count, 1)
+        self.assertEqual(rebuild_daily_rollups(rollup.day), 0)
+
+    def test_rerun_after_failed_delete_does_not_archive_rows_twice(self):
+        first = self._log(40, 120)
+        second = self._log(40, 80)
+        before_day = timezone.localdate() - timedelta(days=30)
+        with tempfile.TemporaryDirectory() as tmp:
+            delete = QuerySet.delete
+
+            def fail_log_delete(qs):
+                if qs.model is QueryLog:
+                    raise DatabaseError('lost connection')
+                return delete(qs)
+
+            with mock.patch.object(QuerySet, 'delete', fail_log_delete), self.assertRaises(DatabaseError):
+                archive_query_logs(before_day, archive_dir=tmp, batch_size=1)
+
+            stats = archive_query_logs(before_day, archive_dir=tmp, batch_size=2)
+            archived = []
+            for path in glob.glob(f'{tmp}/**/*', recursive=True):
+                if os.path.isfile(path):
+                    with gzip.open(path, 'rt', encoding='utf-8') as fh:
+                        archived += [json.loads(line)['id'] for line in fh]
+
+        self.assertEqual(stats['archived'], 2)
+        self.assertEqual(sorted(archived), [first.pk, second.pk])
+        self.assertFalse(QueryLog.objects.exists())
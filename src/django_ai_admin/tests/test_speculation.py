@@ -0,0 +1,92 @@
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from django_ai_admin.models import AIConfig, Chat, QueryLog
+from django_ai_admin.services.benchmark import post_turn
+from django_ai_admin.services.intent_router import IntentDecision
+from django_ai_admin.services.metrics import SPECULATION
+from django_ai_admin.services.speculation import start_speculative_generation
+
+EXECUTED = {'result': 3, 'rows': 1, 'truncated': False}
+
+
+@override_settings(DJANGO_AI_ADMIN_SPECULATIVE_GENERATION=True)
+class SpeculativeGenerationTests(TestCase):
+    def setUp(self):
+        AIConfig.objects.create(provider='mock', model='mock')
+        self.user = get_user_model().objects.create_user('staff', is_staff=True)
+        self.chat = Chat.objects.create(owner=self.user)
+
+    def _post(self, question):
+        with mock.patch('django_ai_admin.views.execute', return_value=EXECUTED):
+            return post_turn(self.user, self.chat.pk, question)
+
+    def test_hit_reuses_generation_started_before_routing(self):
+        hits = SPECULATION.value(result='hit')
+        with mock.patch('django_ai_admin.views.chat_generate_orm_candidates') as generate:
+            response = self._post('How many users are there?')
+
+        self.assertEqual(response.data['type'], 'answer')
+        self.assertEqual(response.data['data']['code'], 'result = User.objects.count()')
+        generate.assert_not_called()
+        self.assertEqual(SPECULATION.value(result='hit'), hits + 1)
+        log = QueryLog.objects.get()
+        self.assertEqual(log.query_meta['speculation']['result'], 'hit')
+        self.assertEqual(log.query_meta['speculation']['candidate_models'], ['auth.User'])
+        self.assertEqual([c['purpose'] for c in log.query_meta['llm_usage']].count('generation'), 1)
+
+    def test_miss_is_discarded_when_router_disagrees(self):
+        decision = IntentDecision(label='DATA_QUERY', confidence=0.9, candidate_models=['auth.Group'])
+        with mock.patch('django_ai_admin.views.route_intent', return_value=decision):
+            response = self._post('How many users are there?')
+
+        self.assertEqual(response.data['data']['code'], 'result = Group.objects.count()')
+        self.assertEqual(QueryLog.objects.get().query_meta['speculation']['result'], 'miss')
+
+    @override_settings(DJANGO_AI_ADMIN_MOCK_LLM_LATENCY_MS=300)
+    def test_discarded_generation_in_flight_is_not_waited_for(self):
+        decision = IntentDecision(label='DATA_QUERY', confidence=0.9, candidate_models=['auth.Group'])
+        generated = {'summary': '', 'explanation': '', 'code': 'result = Group.objects.count()'}
+        started = []
+
+        def route(*args, **kwargs):
+            time.sleep(0.05)  # the speculative call is in flight and cannot be cancelled
+            return decision
+
+        def start(*args, **kwargs):
+            started.append(start_speculative_generation(*args, **kwargs))
+            return started[-1]
+
+        with mock.patch('django_ai_admin.views.start_speculative_generation', side_effect=start), \
+                mock.patch('django_ai_admin.views.route_intent', side_effect=route), \
+                mock.patch('django_ai_admin.views.chat_generate_orm_candidates', return_value=[generated]), \
+                mock.patch('django_ai_admin.views.answer_with_data', return_value='3 groups'), \
+                mock.patch('django_ai_admin.views.suggest_chat_title', return_value='Groups'):
+            self._post('How many users are there?')
+        in_flight = not started[0].future.done()
+        started[0].future.result()
+
+        self.assertTrue(in_flight)
+        meta = QueryLog.objects.get().query_meta
+        self.assertEqual(meta['speculation']['result'], 'miss')
+        self.assertTrue(meta['speculation']['usage_pending'])
+        self.assertEqual(meta['llm_usage'], [])
+
+    def test_miss_when_router_rewrites_the_question(self):
+        decision = IntentDecision(
+            label='DATA_QUERY',
+            confidence=0.9,
+            candidate_models=['auth.User'],
+            normalized_query='How many users joined in the last 7 days?',
+        )
+        with mock.patch('django_ai_admin.views.route_intent', return_value=decision):
+            self._post('And users?')
+
+        self.assertEqual(QueryLog.objects.get().query_meta['speculation']['result'], 'miss')
+
+    def test_no_speculation_without_locally_ranked_models(self):
+        self._post('Show me the numbers')
+        self.assertNotIn('speculation', QueryLog.objects.get().query_meta)
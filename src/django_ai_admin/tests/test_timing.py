@@ -0,0 +1,91 @@
+from unittest import mock
+
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from django_ai_admin.admin import QueryLogAdmin
+from django_ai_admin.models import AIConfig, Chat, QueryLog
+from django_ai_admin.services.benchmark import post_turn
+from django_ai_admin.services.timing import StageTimer, format_timings
+from django_ai_admin.services.tracing import SpanExporter, flush_spans, start_trace
+
+EXECUTED = {'result': 3, 'rows': 1, 'truncated': False}
+TURN_STAGES = [
+    'persist_input', 'context', 'routing', 'title', 'generate_1', 'autofix_1', 'execute_1', 'summarize', 'persist',
+]
+
+
+class CollectingExporter(SpanExporter):
+    def __init__(self):
+        self.spans = []
+
+    def export(self, spans):
+        self.spans.extend(spans)
+
+
+class StageTimerTests(SimpleTestCase):
+    def test_nested_and_repeated_stages_are_all_recorded(self):
+        timer = StageTimer()
+        timer.record('queue_wait', 12.4)
+        with timer.stage('generate_1'):
+            with timer.stage('llm'):
+                pass
+        with timer.stage('generate_2'):
+            pass
+        timer.record('llm', 3)
+
+        stages = timer.as_list()
+        # A nested stage finishes, and is recorded, before the stage around it.
+        self.assertEqual([item['stage'] for item in stages], ['queue_wait', 'llm', 'generate_1', 'generate_2', 'llm'])
+        self.assertEqual(stages[0]['ms'], 12)
+        self.assertGreaterEqual(stages[2]['ms'], stages[1]['ms'])
+        self.assertEqual(timer.total_ms('llm'), stages[1]['ms'] + 3)
+        stages[0]['ms'] = 0
+        self.assertEqual(timer.as_list()[0]['ms'], 12)
+
+    def test_stage_attributes_reach_its_span(self):
+        exporter = CollectingExporter()
+        timer = StageTimer()
+        with override_settings(DJANGO_AI_ADMIN_TRACING_ENABLED=True, DJANGO_AI_ADMIN_TRACING_EXPORTERS=[exporter]):
+            with start_trace('trace-1'):
+                with timer.stage('routing', combined=True) as span:
+                    span.set_attributes(label='DATA_QUERY')
+        flush_spans()
+
+        routing = next(span for span in exporter.spans if span.name == 'routing')
+        self.assertEqual(routing.attributes, {'combined': True, 'label': 'DATA_QUERY'})
+        self.assertEqual(timer.as_list()[0]['stage'], 'routing')
+
+    def test_format_timings(self):
+        timings = [{'stage': 'routing', 'ms': 14}, {'stage': 'execute_1', 'ms': 2}, 'junk']
+        self.assertEqual(format_timings(timings), 'routing: 14 ms\nexecute_1: 2 ms')
+        self.assertEqual(format_timings(None), '')
+
+
+class TurnTimingTests(TestCase):
+    def setUp(self):
+        AIConfig.objects.create(provider='mock', model='mock')
+        self.user = get_user_model().objects.create_user('staff', is_staff=True)
+        self.chat = Chat.objects.create(owner=self.user)
+
+    def _post(self):
+        with mock.patch('django_ai_admin.views.execute', return_value=EXECUTED):
+            return post_turn(self.user, self.chat.pk, 'How many users are there?')
+
+    @override_settings(DJANGO_AI_ADMIN_DEBUG_META=True)
+    def test_stages_are_logged_and_shown_in_debug_meta(self):
+        response = self._post()
+
+        log = QueryLog.objects.get()
+        self.assertEqual([item['stage'] for item in log.query_meta['timings']], TURN_STAGES)
+        self.assertEqual(response.data['meta']['timings'], log.query_meta['timings'])
+        shown = QueryLogAdmin(QueryLog, admin.site).stage_timings(log)
+        self.assertEqual(shown.splitlines()[0], f"persist_input: {log.query_meta['timings'][0]['ms']} ms")
+
+    @override_settings(DJANGO_AI_ADMIN_DEBUG_META=False)
+    def test_timings_stay_out_of_the_response_without_debug_meta(self):
+        response = self._post()
+
+        self.assertNotIn('timings', response.data['meta'])
+        self.assertEqual(len(QueryLog.objects.get().query_meta['timings']), len(TURN_STAGES))
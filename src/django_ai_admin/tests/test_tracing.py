@@ -0,0 +1,106 @@
+import threading
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from django_ai_admin.services.metrics import TRACES_DROPPED
+from django_ai_admin.services.tracing import (
+    NOOP_SPAN,
+    OTLPHookExporter,
+    SpanExporter,
+    SpanExportQueue,
+    flush_spans,
+    start_span,
+    start_trace,
+)
+
+
+class CollectingExporter(SpanExporter):
+    def __init__(self):
+        self.spans = []
+
+    def export(self, spans):
+        self.spans.extend(spans)
+
+
+class TracingTests(SimpleTestCase):
+    def test_disabled_tracing_is_noop(self):
+        exporter = CollectingExporter()
+        with override_settings(DJANGO_AI_ADMIN_TRACING_ENABLED=False, DJANGO_AI_ADMIN_TRACING_EXPORTERS=[exporter]):
+            with start_trace('trace-1') as root:
+                with start_span('routing') as span:
+                    span.set_attribute('label', 'DATA_QUERY')
+        self.assertIs(root, NOOP_SPAN)
+        self.assertIs(span, NOOP_SPAN)
+        self.assertEqual(exporter.spans, [])
+
+    def test_nested_spans_are_exported_with_parents(self):
+        exporter = CollectingExporter()
+        with override_settings(DJANGO_AI_ADMIN_TRACING_ENABLED=True, DJANGO_AI_ADMIN_TRACING_EXPORTERS=[exporter]):
+            with start_trace('trace-2', chat_id=1) as root:
+                with start_span('generate_1', attempt=1):
+                    with start_span('llm.chat_completion', purpose='generation') as llm:
+                        llm.set_attributes(prompt_tokens=120)
+                with self.assertRaises(RuntimeError):
+                    with start_span('execute_1'):
+                        raise RuntimeError('boom')
+        flush_spans()
+
+        by_name = {span.name: span for span in exporter.spans}
+        self.assertEqual(set(by_name), {'ai_admin.turn', 'generate_1', 'llm.chat_completion', 'execute_1'})
+        self.assertTrue(all(span.trace_id == 'trace-2' for span in exporter.spans))
+        self.assertEqual(by_name['llm.chat_completion'].parent_id, by_name['generate_1'].span_id)
+        self.assertEqual(by_name['generate_1'].parent_id, root.span_id)
+        self.assertEqual(by_name['llm.chat_completion'].attributes['prompt_tokens'], 120)
+        self.assertEqual(by_name['execute_1'].status, 'error')
+
+    def test_otlp_hook_receives_otlp_json(self):
+        payloads = []
+        exporter = OTLPHookExporter(hook=payloads.append)
+        with override_settings(DJANGO_AI_ADMIN_TRACING_ENABLED=True, DJANGO_AI_ADMIN_TRACING_EXPORTERS=[exporter]):
+            with start_trace('0b8a3c4e-65a8-4d2b-9a55-3b1f2f6f2f10'):
+                pass
+        flush_spans()
+
+        spans = payloads[0]['resourceSpans'][0]['scopeSpans'][0]['spans']
+        self.assertEqual(spans[0]['traceId'], '0b8a3c4e65a84d2b9a553b1f2f6f2f10')
+        self.assertEqual(len(spans[0]['spanId']), 16)
+
+    def test_slow_exporter_does_not_hold_up_the_turn(self):
+        release = threading.Event()
+
+        class BlockingExporter(CollectingExporter):
+            def export(self, spans):
+                release.wait(5)
+                super().export(spans)
+
+        exporter = BlockingExporter()
+        with override_settings(DJANGO_AI_ADMIN_TRACING_ENABLED=True, DJANGO_AI_ADMIN_TRACING_EXPORTERS=[exporter]):
+            started = time.monotonic()
+            with start_trace('trace-3'):
+                pass
+            self.assertLess(time.monotonic() - started, 1.0)
+            self.assertEqual(exporter.spans, [])
+        release.set()
+        flush_spans()
+        self.assertEqual([span.name for span in exporter.spans], ['ai_admin.turn'])
+
+
+class SpanExportQueueTests(SimpleTestCase):
+    def test_full_queue_drops_the_trace_and_counts_it(self):
+        export_queue = SpanExportQueue(max_size=1, autostart=False)
+        exporter = CollectingExporter()
+        dropped = TRACES_DROPPED.value()
+        with override_settings(DJANGO_AI_ADMIN_TRACING_ENABLED=True, DJANGO_AI_ADMIN_TRACING_EXPORTERS=[exporter]):
+            with mock.patch('django_ai_admin.services.tracing.get_span_export_queue', return_value=export_queue):
+                with start_trace('trace-4'):
+                    pass
+                with self.assertLogs('app', 'WARNING'):
+                    with start_trace('trace-5'):
+                        pass
+
+        self.assertEqual(TRACES_DROPPED.value(), dropped + 1)
+        self.assertEqual(export_queue.pending(), 1)
+        export_queue.flush()
+        self.assertEqual({span.trace_id for span in exporter.spans}, {'trace-4'})
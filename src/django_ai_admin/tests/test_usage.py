@@ -0,0 +1,34 @@
+from decimal import Decimal
+
+from django.test import SimpleTestCase, override_settings
+
+from django_ai_admin.services.usage import collect_usage, estimate_cost, parse_usage, record_usage
+
+PRICES = {
+    'gpt-4o-mini': {'input': 0.15, 'cached_input': 0.075, 'output': 0.6},
+    'gpt-4o': {'input': 2.5, 'output': 10},
+}
+
+
+@override_settings(DJANGO_AI_ADMIN_MODEL_PRICES=PRICES)
+class UsageTests(SimpleTestCase):
+    def test_parse_usage_reads_cached_tokens(self):
+        usage = {'prompt_tokens': 1200, 'completion_tokens': 80, 'prompt_tokens_details': {'cached_tokens': 1024}}
+        self.assertEqual(parse_usage(usage), (1200, 80, 1024))
+        self.assertEqual(parse_usage(None), (0, 0, 0))
+
+    def test_cost_uses_longest_prefix_and_cached_price(self):
+        cost = estimate_cost('gpt-4o-mini-2024-07-18', 2_000_000, 1_000_000, cached_tokens=1_000_000)
+        self.assertEqual(cost, Decimal('0.825000'))
+        self.assertEqual(estimate_cost('unknown-model', 1000, 1000), Decimal('0'))
+
+    def test_collector_aggregates_calls_in_scope(self):
+        with collect_usage() as usage:
+            record_usage('router', 'gpt-4o', {'prompt_tokens': 100, 'completion_tokens': 10})
+            record_usage('generation', 'gpt-4o', {'prompt_tokens': 300, 'completion_tokens': 50})
+        record_usage('title', 'gpt-4o', {'prompt_tokens': 5, 'completion_tokens': 5})
+
+        totals = usage.totals()
+        self.assertEqual(totals['prompt_tokens'], 400)
+        self.assertEqual(totals['completion_tokens'], 60)
+        self.assertEqual([call['purpose'] for call in usage.as_list()], ['router', 'generation'])
@@ -1,9 +1,24 @@
 from django.urls import path
-from .views import ChatsView, ChatDetailView, SettingsCheckView, ChatMessageView
+from .conf import get_async_pipeline_enabled
+from .views import (
+    ChatsView,
+    ChatDetailView,
+    SettingsCheckView,
+    ChatMessageView,
+    MessageJobView,
+    MetricsView,
+    QueryLogStatsView,
+    async_chat_message_view,
+)
+
+chat_message_view = async_chat_message_view if get_async_pipeline_enabled() else ChatMessageView.as_view()
 
 urlpatterns = [
     path('api/chats', ChatsView.as_view()),
     path('api/chats/<int:chat_id>', ChatDetailView.as_view()),
-    path('api/chats/<int:chat_id>/message', ChatMessageView.as_view()),
+    path('api/chats/<int:chat_id>/message', chat_message_view),
+    path('api/jobs/<int:job_id>', MessageJobView.as_view()),
     path('api/settings/check', SettingsCheckView.as_view()),
+    path('api/stats', QueryLogStatsView.as_view()),
+    path('api/metrics', MetricsView.as_view()),
 ]
@@ -1,22 +1,51 @@
 import logging
+import math
 import re
+import time
 import uuid
 
+from django.http import HttpResponse
 from django.utils import timezone
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models import AIConfig, Chat, Message, QueryLog
+from .conf import (
+    get_admission_wait_sec,
+    get_background_jobs_enabled,
+    get_combined_routing_enabled,
+    get_debug_meta_enabled,
+    get_generation_candidates,
+    get_job_poll_timeout_sec,
+    get_llm_provider,
+)
+from .models import AIConfig, Chat, Message
 from .permissions import IsStaff
 from .serializers import ChatSerializer, MessageSerializer
+from .services.admission import CAPACITY_ERROR_PREFIX, CapacityExhausted, check_user_rate
+from .services.candidates import rank_candidates
+from .services.coalescing import coalescing_key, run_coalesced
+from .services.combined import route_and_generate
 from .services.context_builder import build_chat_context, update_chat_memory
+from .services.endpoints import LLM_PURPOSES, endpoint_key, get_llm_config, is_llm_configured, serves
 from .services.executor import execute
-from .services.intent_router import route_intent
-from .services.llm_client import answer_with_data, chat_generate_orm, suggest_chat_title
-from .services.manifest import get_manifest
+from .services.intent_router import resolve_clarification_reply, route_intent
+from .services.jobs import enqueue_message_job, job_envelope, wait_for_job
+from .services.llm_client import answer_with_data, chat_generate_orm_candidates, suggest_chat_title
+from .services.manifest import get_manifest, get_manifest_hash
+from .services.metrics import ERRORS, GENERATION_RETRIES, REGISTRY, TURN_DURATION, TURNS
 from .services.planner import build_query_plan
+from .services.profiling import profile_call, profile_reason
+from .services.provider_health import CIRCUIT_OPEN_MARKER, backoff_delay, get_endpoint_health
+from .services.query_log_writer import write_query_log
+from .services.query_templates import get_query_template_cache
 from .services.response_contract import build_envelope
+from .services.retention import ROLLUP_GROUPS, summarize_rollups
+from .services.speculation import SpeculativeGeneration, start_speculative_generation
+from .services.timing import StageTimer
+from .services.tracing import start_trace
+from .services.workers import run_in_pipeline
+from .services.usage import UsageCollector, collect_usage
 
 
 def _is_retryable_error(error: str) -> bool:
@@ -27,6 +56,8 @@ def _is_retryable_error(error: str) -> bool:
         'llm error 401',
         'llm error 403',
         'llm error 404',
+        CAPACITY_ERROR_PREFIX,
+        CIRCUIT_OPEN_MARKER,
     )
     if any(marker in low for marker in non_retryable):
         return False
@@ -50,6 +81,8 @@ def _autofix_generated_code(code: str, manifest: dict[str, list[str]]) -> str:
 
     fixed = src
     for app_label, model_name in pairs:
+        if f'{app_label}.' not in fixed:
+            continue
         fixed = re.sub(rf"\b{re.escape(app_label)}\.models\.{re.escape(model_name)}\b", model_name, fixed)
         fixed = re.sub(rf"\b{re.escape(app_label)}\.{re.escape(model_name)}\b", model_name, fixed)
     return fixed
@@ -89,7 +122,45 @@ def _is_default_title(value: str) -> bool:
     return not title or title.lower() == 'new chat'
 
 
-def _prepare_first_chat_title(chat: Chat, first_question: str, candidate_models: list[str]) -> bool:
+def _with_timings(meta: dict, timer: StageTimer) -> dict:
+    if not get_debug_meta_enabled():
+        return meta
+    out = dict(meta)
+    out['timings'] = timer.as_list()
+    return out
+
+
+def _log_meta(timer: StageTimer, usage: UsageCollector, speculation: SpeculativeGeneration | None, **items) -> dict:
+    meta = {key: value for key, value in items.items() if value is not None}
+    meta['timings'] = timer.as_list()
+    meta['llm_usage'] = usage.as_list()
+    if speculation is not None:
+        meta['speculation'] = speculation.as_meta()
+    return meta
+
+
+def _capacity_response(error_code: str, message: str, retry_after: float, meta: dict) -> Response:
+    seconds = max(1, math.ceil(retry_after))
+    return Response(
+        build_envelope('error', message, data={'error_code': error_code, 'retry_after': seconds}, meta=meta),
+        status=status.HTTP_429_TOO_MANY_REQUESTS,
+        headers={'Retry-After': str(seconds)},
+    )
+
+
+def _observe_turn(route: str, timer: StageTimer, error_code: str = '') -> None:
+    TURNS.inc(route=route)
+    TURN_DURATION.observe(timer.elapsed_ms() / 1000, route=route)
+    if error_code:
+        ERRORS.inc(code=error_code)
+
+
+def _prepare_first_chat_title(
+    chat: Chat,
+    first_question: str,
+    candidate_models: list[str],
+    timer: StageTimer | None = None,
+) -> bool:
     if not _is_default_title(chat.title):
         return False
     try:
@@ -100,10 +171,13 @@ def _prepare_first_chat_title(chat: Chat, first_question: str, candidate_models:
         return False
 
     title = ''
+    t0 = time.perf_counter()
     try:
         title = suggest_chat_title(first_question)
     except Exception:
         title = ''
+    if timer is not None:
+        timer.record('title', (time.perf_counter() - t0) * 1000)
 
     title = (title or '').strip()
     if not title:
@@ -158,14 +232,29 @@ class ChatDetailView(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+def _endpoint_status(cfg: AIConfig) -> dict:
+    health = get_endpoint_health(endpoint_key(cfg))
+    return {
+        'id': cfg.pk,
+        'name': cfg.name,
+        'model': cfg.model,
+        'configured': is_llm_configured(cfg),
+        'purposes': [purpose for purpose in LLM_PURPOSES if serves(cfg, purpose)],
+        'weight': cfg.weight,
+        'circuit': health.state,
+        'latency_ms': round(health.latency_ms) if health.latency_ms is not None else None,
+    }
+
+
 class SettingsCheckView(APIView):
     permission_classes = [IsStaff]
 
     def get(self, request):
-        cfg = AIConfig.objects.order_by('-updated_at').first()
-        ok = bool(cfg and cfg.api_key and cfg.model)
+        cfg = get_llm_config()
+        ok = is_llm_configured(cfg)
+        endpoints = AIConfig.objects.filter(is_active=True).order_by('-updated_at')
         model = cfg.model if cfg else ''
-        provider = cfg.provider if cfg else ''
+        provider = get_llm_provider() or (cfg.provider if cfg else '')
         timeout_sec = cfg.timeout_sec if cfg else 0
         updated_at = cfg.updated_at if cfg else None
         return Response({
@@ -174,15 +263,44 @@ class SettingsCheckView(APIView):
             'provider': provider,
             'timeout_sec': timeout_sec,
             'updated_at': updated_at.isoformat() if updated_at else None,
+            'endpoints': [_endpoint_status(row) for row in endpoints],
             'server_time': timezone.now().isoformat(),
         })
 
 
+class QueryLogStatsView(APIView):
+    permission_classes = [IsStaff]
+
+    def get(self, request):
+        days = max(1, min(366, _safe_int(request.query_params.get('days', '7'), 7)))
+        group_by = request.query_params.get('group_by', 'route')
+        if group_by not in ROLLUP_GROUPS:
+            return Response({'detail': f'group_by must be one of: {", ".join(ROLLUP_GROUPS)}'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'days': days, 'group_by': group_by, 'items': summarize_rollups(days=days, group_by=group_by)})
+
+
+class MetricsView(APIView):
+    permission_classes = [IsStaff]
+
+    def get(self, request):
+        return HttpResponse(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 class ChatMessageView(APIView):
     permission_classes = [IsStaff]
 
     def post(self, request, chat_id: int):
-        logger = logging.getLogger('app')
+        trace_id = str(uuid.uuid4())
+        reason = profile_reason(request)
+        with collect_usage() as usage, start_trace(trace_id, chat_id=chat_id, user_id=request.user.pk):
+            if reason:
+                return profile_call(
+                    trace_id, reason, self._handle_message, request, chat_id, usage, trace_id,
+                    user=request.user, chat_id=chat_id,
+                )
+            return self._handle_message(request, chat_id, usage, trace_id)
+
+    def _handle_message(self, request, chat_id: int, usage: UsageCollector, trace_id: str):
         try:
             chat = Chat.objects.get(id=chat_id, owner=request.user)
         except Chat.DoesNotExist:
@@ -190,23 +308,81 @@ class ChatMessageView(APIView):
 
         content = request.data.get('content', '').strip()
         if not content:
+            ERRORS.inc(code='empty_content')
             return Response(
                 build_envelope('error', 'Empty content', data={'error_code': 'empty_content'}, meta={'chat_id': chat_id}),
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        trace_id = str(uuid.uuid4())
+        retry_after = check_user_rate(request.user.pk)
+        if retry_after:
+            ERRORS.inc(code='rate_limited')
+            return _capacity_response(
+                'rate_limited',
+                'You are sending messages too quickly. Please wait a moment and try again.',
+                retry_after=retry_after,
+                meta={'chat_id': chat_id, 'trace_id': trace_id},
+            )
+
         started = timezone.now()
-        Message.objects.create(chat=chat, role='user', content=content)
-
-        manifest = get_manifest()
-        context = build_chat_context(chat)
-        decision = route_intent(
-            content,
-            manifest=manifest,
-            pending_clarification=chat.pending_clarification,
-            current_topic=chat.current_topic,
-        )
+        timer = StageTimer()
+        with timer.stage('persist_input'):
+            Message.objects.create(chat=chat, role='user', content=content)
+        if get_background_jobs_enabled():
+            job = enqueue_message_job(chat, request.user, content, trace_id)
+            return Response(
+                build_envelope(
+                    'queued',
+                    '',
+                    data={'job_id': job.id, 'status': job.status},
+                    meta={'chat_id': chat.id, 'trace_id': trace_id},
+                ),
+                status=status.HTTP_202_ACCEPTED,
+            )
+        return self.run_turn(request.user, chat, content, usage, trace_id, started, timer)
+
+    def run_turn(
+        self,
+        user,
+        chat: Chat,
+        content: str,
+        usage: UsageCollector,
+        trace_id: str,
+        started,
+        timer: StageTimer,
+    ):
+        """Everything after the user message is stored; also called by ``ai_admin_worker`` for queued jobs."""
+        with timer.stage('context'):
+            manifest = get_manifest()
+            context = build_chat_context(chat)
+        combined = get_combined_routing_enabled()
+        speculation = None
+        if not combined and not chat.pending_clarification:
+            speculation = start_speculative_generation(content, manifest, context)
+        combined_gen = None
+        with timer.stage('routing', combined=combined) as span:
+            # A pick from the pending clarification's options needs no router call.
+            decision = resolve_clarification_reply(content, chat.pending_clarification, manifest)
+            if decision is None and combined:
+                decision, combined_gen = route_and_generate(
+                    content,
+                    manifest,
+                    pending_clarification=chat.pending_clarification,
+                    current_topic=chat.current_topic,
+                    context=context,
+                )
+            if decision is None:
+                decision = route_intent(
+                    content,
+                    manifest=manifest,
+                    pending_clarification=chat.pending_clarification,
+                    current_topic=chat.current_topic,
+                )
+            span.set_attributes(label=decision.label, candidate_models=decision.candidate_models[:4])
+        if decision.reason.startswith('router_'):
+            ERRORS.inc(code='router_fallback')
+        if speculation is not None and not speculation.agrees_with(decision):
+            speculation.discard()
 
         base_meta = {
             'chat_id': chat.id,
@@ -215,43 +391,53 @@ class ChatMessageView(APIView):
             'trace_id': trace_id,
             'candidate_models': decision.candidate_models[:4],
         }
-        title_updated = _prepare_first_chat_title(chat, content, decision.candidate_models[:4])
+        title_updated = _prepare_first_chat_title(chat, content, decision.candidate_models[:4], timer=timer)
 
         if decision.label in ('OUT_OF_SCOPE', 'GENERAL_HELP'):
             message, data = _out_of_scope_message(decision.label, decision.candidate_models)
-            Message.objects.create(
-                chat=chat,
-                role='assistant',
-                content=message,
-                meta={
-                    'response_type': 'out_of_scope',
-                    'reason': decision.reason,
-                    'candidate_models': decision.candidate_models[:4],
-                    **data,
-                },
-            )
-            update_chat_memory(chat, content, message, decision.label, clear_pending=False)
-            chat.updated_at = timezone.now()
-            save_fields = ['conversation_summary', 'updated_at']
-            if title_updated:
-                save_fields.append('title')
-            chat.save(update_fields=save_fields)
-            QueryLog.objects.create(
-                user=request.user,
+            with timer.stage('persist'):
+                Message.objects.create(
+                    chat=chat,
+                    role='assistant',
+                    content=message,
+                    meta={
+                        'response_type': 'out_of_scope',
+                        'reason': decision.reason,
+                        'candidate_models': decision.candidate_models[:4],
+                        **data,
+                    },
+                )
+                update_chat_memory(chat, content, message, decision.label, clear_pending=False)
+                chat.updated_at = timezone.now()
+                save_fields = ['conversation_summary', 'updated_at']
+                if title_updated:
+                    save_fields.append('title')
+                chat.save(update_fields=save_fields)
+            write_query_log(
+                user=user,
+                trace_id=trace_id,
                 chat=chat,
                 route=decision.label,
                 question=content,
                 orm_code='',
-                query_meta={'candidate_models': decision.candidate_models[:4], 'reason': decision.reason},
+                query_meta=_log_meta(
+                    timer,
+                    usage,
+                    speculation,
+                    candidate_models=decision.candidate_models[:4],
+                    reason=decision.reason,
+                ),
                 duration_ms=int((timezone.now() - started).total_seconds() * 1000),
                 rows=0,
                 truncated=False,
                 error='',
                 intent_label=decision.label,
                 intent_confidence=decision.confidence,
+                **usage.totals(),
             )
+            _observe_turn(decision.label, timer)
             return Response(
-                build_envelope('out_of_scope', message, data=data, meta=base_meta),
+                build_envelope('out_of_scope', message, data=data, meta=_with_timings(base_meta, timer)),
                 status=status.HTTP_200_OK,
             )
 
@@ -275,37 +461,48 @@ class ChatMessageView(APIView):
             if title_updated:
                 save_fields.append('title')
             message_text = decision.clarification_question or 'Please clarify what exactly you want to know from project data.'
-            Message.objects.create(
-                chat=chat,
-                role='assistant',
-                content=message_text,
-                meta={
-                    'response_type': 'clarification',
-                    'pending_clarification_id': clarification_id,
-                    'options': options,
-                    'candidate_models': decision.candidate_models[:4],
-                    'reason': decision.reason,
-                },
-            )
-            update_chat_memory(chat, content, message_text, 'CLARIFICATION', clear_pending=False)
-            save_fields.append('conversation_summary')
-            chat.save(update_fields=save_fields)
-            QueryLog.objects.create(
-                user=request.user,
+            with timer.stage('persist'):
+                Message.objects.create(
+                    chat=chat,
+                    role='assistant',
+                    content=message_text,
+                    meta={
+                        'response_type': 'clarification',
+                        'pending_clarification_id': clarification_id,
+                        'options': options,
+                        'candidate_models': decision.candidate_models[:4],
+                        'reason': decision.reason,
+                    },
+                )
+                update_chat_memory(chat, content, message_text, 'CLARIFICATION', clear_pending=False)
+                save_fields.append('conversation_summary')
+                chat.save(update_fields=save_fields)
+            write_query_log(
+                user=user,
+                trace_id=trace_id,
                 chat=chat,
                 route='CLARIFICATION',
                 question=content,
                 orm_code='',
-                query_meta={'candidate_models': decision.candidate_models[:4], 'options': options, 'reason': decision.reason},
+                query_meta=_log_meta(
+                    timer,
+                    usage,
+                    speculation,
+                    candidate_models=decision.candidate_models[:4],
+                    options=options,
+                    reason=decision.reason,
+                ),
                 duration_ms=int((timezone.now() - started).total_seconds() * 1000),
                 rows=0,
                 truncated=False,
                 error='',
                 intent_label='CLARIFICATION',
                 intent_confidence=decision.confidence,
+                **usage.totals(),
             )
-            meta = dict(base_meta)
+            meta = _with_timings(base_meta, timer)
             meta['pending_clarification_id'] = clarification_id
+            _observe_turn('CLARIFICATION', timer)
             return Response(
                 build_envelope(
                     'clarification',
@@ -323,125 +520,88 @@ class ChatMessageView(APIView):
         # DATA_QUERY flow
         plan = build_query_plan(decision.normalized_query or content, decision, context)
         query_text = decision.normalized_query or content
-        summary = ''
-        explanation = ''
-        orm_code = ''
-        result = None
-        truncated = False
-        rows = 0
-        error = ''
-        prev_code = None
-        prev_error = None
-        success = False
-        final_code = ''
-        retry_count = 0
-
-        for attempt in range(3):
-            retry_count = attempt
-            try:
-                gen = chat_generate_orm(
-                    query_text,
-                    prev_code=prev_code,
-                    prev_error=prev_error,
-                    context=context,
-                    plan=plan,
-                    candidate_models=decision.candidate_models,
-                )
-                summary = (gen.get('summary') or '').strip()
-                explanation = (gen.get('explanation') or '').strip()
-                orm_code = gen['code']
-                logger.info('ai_admin code generated')
-
-                candidate_codes = []
-                normalized_code = _autofix_generated_code(orm_code, manifest)
-                if normalized_code and normalized_code != orm_code:
-                    candidate_codes.append(normalized_code)
-                candidate_codes.append(orm_code)
-
-                exec_res = None
-                last_exec_error = None
-                executed_code = orm_code
-                for code_candidate in candidate_codes:
-                    try:
-                        exec_res = execute(code_candidate, max_rows=100, statement_timeout_ms=5000)
-                        executed_code = code_candidate
-                        break
-                    except Exception as exec_exc:
-                        last_exec_error = exec_exc
-                        continue
-                if exec_res is None:
-                    raise last_exec_error or RuntimeError('Execution failed')
-
-                result = exec_res['result']
-                truncated = exec_res['truncated']
-                rows = exec_res['rows']
-                try:
-                    final_summary = answer_with_data(content, result, truncated)
-                    if final_summary:
-                        summary = final_summary
-                except Exception:
-                    pass
-                final_code = executed_code
-                success = True
-                break
-            except Exception as exc:
-                error = str(exc)
-                logger.error('ai_admin error: %s', error)
-                prev_code = orm_code or prev_code
-                prev_error = error
-                if attempt >= 2 or not _is_retryable_error(error):
-                    break
+        outcome, coalesced = run_coalesced(
+            coalescing_key(query_text, decision.candidate_models, context),
+            lambda: self._generate_and_execute(
+                content, query_text, decision, manifest, context, plan, timer, speculation, combined_gen,
+            ),
+            timer,
+        )
+        if coalesced and speculation is not None and speculation.pending:
+            speculation.discard('coalesced')
+        success = outcome['success']
+        summary = outcome['summary']
+        explanation = outcome['explanation']
+        final_code = outcome['code']
+        result = outcome['result']
+        truncated = outcome['truncated']
+        rows = outcome['rows']
+        error = outcome['error']
+        prev_code = outcome['prev_code']
+        retry_count = outcome['retry_count']
+        candidate_stats = outcome['candidates']
 
         duration = int((timezone.now() - started).total_seconds() * 1000)
 
         if success:
             answer_text = summary or 'Done.'
             main_topic = decision.candidate_models[0] if decision.candidate_models else ''
-            update_chat_memory(
-                chat,
-                user_message=content,
-                assistant_message=answer_text,
-                intent_label='DATA_QUERY',
-                current_topic=main_topic,
-                clear_pending=True,
-            )
-            chat.updated_at = timezone.now()
-            chat.save(update_fields=['title', 'conversation_summary', 'current_topic', 'pending_clarification', 'updated_at'])
-            Message.objects.create(
-                chat=chat,
-                role='assistant',
-                content=answer_text,
-                meta={
-                    'response_type': 'answer',
-                    'summary': answer_text,
-                    'result': result,
-                    'truncated': truncated,
-                    'explanation': explanation,
-                    'code': final_code,
-                    'interpretation': plan.get('interpretation', ''),
-                    'candidate_models': decision.candidate_models[:4],
-                },
-            )
-            QueryLog.objects.create(
-                user=request.user,
+            with timer.stage('persist'):
+                update_chat_memory(
+                    chat,
+                    user_message=content,
+                    assistant_message=answer_text,
+                    intent_label='DATA_QUERY',
+                    current_topic=main_topic,
+                    clear_pending=True,
+                )
+                chat.updated_at = timezone.now()
+                chat.save(update_fields=['title', 'conversation_summary', 'current_topic', 'pending_clarification', 'updated_at'])
+                Message.objects.create(
+                    chat=chat,
+                    role='assistant',
+                    content=answer_text,
+                    meta={
+                        'response_type': 'answer',
+                        'summary': answer_text,
+                        'result': result,
+                        'truncated': truncated,
+                        'explanation': explanation,
+                        'code': final_code,
+                        'interpretation': plan.get('interpretation', ''),
+                        'candidate_models': decision.candidate_models[:4],
+                    },
+                )
+            write_query_log(
+                user=user,
+                trace_id=trace_id,
                 chat=chat,
                 route='DATA_QUERY',
                 question=content,
                 orm_code=final_code,
-                query_meta={
-                    'candidate_models': decision.candidate_models[:4],
-                    'interpretation': plan.get('interpretation', ''),
-                    'retry_count': retry_count,
-                },
+                query_meta=_log_meta(
+                    timer,
+                    usage,
+                    speculation,
+                    candidate_models=decision.candidate_models[:4],
+                    interpretation=plan.get('interpretation', ''),
+                    retry_count=retry_count,
+                    candidates=candidate_stats,
+                    coalesced=coalesced or None,
+                    template=outcome.get('template'),
+                    manifest_hash=get_manifest_hash(),
+                ),
                 duration_ms=duration,
                 rows=rows,
                 truncated=truncated,
                 error='',
                 intent_label='DATA_QUERY',
                 intent_confidence=decision.confidence,
+                **usage.totals(),
             )
-            meta = dict(base_meta)
+            meta = _with_timings(base_meta, timer)
             meta['interpretation'] = plan.get('interpretation', '')
+            _observe_turn('DATA_QUERY', timer)
             return Response(
                 build_envelope(
                     'answer',
@@ -459,45 +619,292 @@ class ChatMessageView(APIView):
                 status=status.HTTP_200_OK,
             )
 
+        if error.startswith(CAPACITY_ERROR_PREFIX):
+            busy_text = 'The assistant is busy right now. Please try again in a few seconds.'
+            with timer.stage('persist'):
+                Message.objects.create(
+                    chat=chat,
+                    role='assistant',
+                    content=busy_text,
+                    meta={'response_type': 'error', 'error_code': 'capacity_exhausted'},
+                )
+                update_chat_memory(chat, content, busy_text, 'ERROR', clear_pending=False)
+                chat.updated_at = timezone.now()
+                save_fields = ['conversation_summary', 'updated_at']
+                if title_updated:
+                    save_fields.append('title')
+                chat.save(update_fields=save_fields)
+            write_query_log(
+                user=user,
+                trace_id=trace_id,
+                chat=chat,
+                route='ERROR',
+                question=content,
+                orm_code=prev_code or '',
+                query_meta=_log_meta(
+                    timer,
+                    usage,
+                    speculation,
+                    candidate_models=decision.candidate_models[:4],
+                    retry_count=retry_count,
+                ),
+                duration_ms=duration,
+                error=error,
+                intent_label=decision.label,
+                intent_confidence=decision.confidence,
+                **usage.totals(),
+            )
+            _observe_turn('ERROR', timer, error_code='capacity_exhausted')
+            return _capacity_response(
+                'capacity_exhausted',
+                busy_text,
+                retry_after=get_admission_wait_sec(),
+                meta=_with_timings(base_meta, timer),
+            )
+
         err_msg = error or 'Failed to execute request.'
-        Message.objects.create(
-            chat=chat,
-            role='assistant',
-            content='I could not complete this query after multiple attempts. Please try rephrasing the request.',
-            meta={'response_type': 'error', 'error_code': 'execution_failed', 'retry_count': retry_count + 1},
-        )
-        update_chat_memory(
-            chat,
-            content,
-            'I could not complete this query after multiple attempts.',
-            'ERROR',
-            clear_pending=False,
-        )
-        chat.updated_at = timezone.now()
-        save_fields = ['conversation_summary', 'updated_at']
-        if title_updated:
-            save_fields.append('title')
-        chat.save(update_fields=save_fields)
-        QueryLog.objects.create(
-            user=request.user,
+        with timer.stage('persist'):
+            Message.objects.create(
+                chat=chat,
+                role='assistant',
+                content='I could not complete this query after multiple attempts. Please try rephrasing the request.',
+                meta={'response_type': 'error', 'error_code': 'execution_failed', 'retry_count': retry_count + 1},
+            )
+            update_chat_memory(
+                chat,
+                content,
+                'I could not complete this query after multiple attempts.',
+                'ERROR',
+                clear_pending=False,
+            )
+            chat.updated_at = timezone.now()
+            save_fields = ['conversation_summary', 'updated_at']
+            if title_updated:
+                save_fields.append('title')
+            chat.save(update_fields=save_fields)
+        write_query_log(
+            user=user,
+            trace_id=trace_id,
             chat=chat,
             route='ERROR',
             question=content,
             orm_code=prev_code or '',
-            query_meta={'candidate_models': decision.candidate_models[:4], 'retry_count': retry_count},
+            query_meta=_log_meta(
+                timer,
+                usage,
+                speculation,
+                candidate_models=decision.candidate_models[:4],
+                retry_count=retry_count,
+                candidates=candidate_stats,
+                coalesced=coalesced or None,
+                template=outcome.get('template'),
+            ),
             duration_ms=duration,
             rows=rows,
             truncated=truncated,
             error=err_msg,
             intent_label=decision.label,
             intent_confidence=decision.confidence,
+            **usage.totals(),
         )
+        _observe_turn('ERROR', timer, error_code='execution_failed')
         return Response(
             build_envelope(
                 'error',
                 'I could not complete this query after multiple attempts. Please rephrase the request.',
                 data={'error_code': 'execution_failed', 'retry_count': retry_count + 1},
-                meta=base_meta,
+                meta=_with_timings(base_meta, timer),
             ),
             status=status.HTTP_200_OK,
         )
+
+    def _generate_and_execute(
+        self,
+        content: str,
+        query_text: str,
+        decision,
+        manifest: dict[str, list[str]],
+        context: dict,
+        plan: dict,
+        timer: StageTimer,
+        speculation: SpeculativeGeneration | None,
+        combined_gen: dict | None,
+    ) -> dict:
+        """Generation attempts, execution and summary of a DATA_QUERY turn; the part duplicates can share."""
+        logger = logging.getLogger('app')
+        summary = ''
+        explanation = ''
+        orm_code = ''
+        result = None
+        truncated = False
+        rows = 0
+        error = ''
+        prev_code = None
+        prev_error = None
+        success = False
+        final_code = ''
+        retry_count = 0
+        n_candidates = get_generation_candidates()
+        candidate_stats = None
+        templates = get_query_template_cache()
+        template_state = None
+
+        for attempt in range(3):
+            retry_count = attempt
+            if attempt:
+                GENERATION_RETRIES.inc()
+            try:
+                gen = combined_gen if attempt == 0 else None
+                if gen is None and attempt == 0 and templates is not None:
+                    with timer.stage('template'):
+                        gen = templates.lookup(query_text, decision.candidate_models, manifest)
+                    if gen is not None:
+                        template_state = 'hit'
+                        if speculation is not None and speculation.pending:
+                            speculation.discard('template')
+                if attempt == 0 and speculation is not None and speculation.pending:
+                    with timer.stage('generate_1', attempt=1, speculative=True):
+                        gen = speculation.take()
+                if gen is not None:
+                    gens = [gen]
+                else:
+                    with timer.stage(f'generate_{attempt + 1}', attempt=attempt + 1, candidates=n_candidates):
+                        gens = chat_generate_orm_candidates(
+                            query_text,
+                            n_candidates,
+                            prev_code=prev_code,
+                            prev_error=prev_error,
+                            context=context,
+                            plan=plan,
+                            candidate_models=decision.candidate_models,
+                        )
+                orm_code = gens[0]['code']
+                logger.info('ai_admin code generated')
+
+                with timer.stage(f'autofix_{attempt + 1}'):
+                    fixed = [
+                        dict(item, code=_autofix_generated_code(item['code'], manifest), original_code=item['code'])
+                        for item in gens
+                    ]
+                    ranked, stats = rank_candidates(fixed, manifest, decision.candidate_models)
+                if len(gens) > 1:
+                    candidate_stats = stats
+
+                exec_res = None
+                last_exec_error = None
+                executed_code = orm_code
+                for gen in ranked:
+                    orm_code = gen['original_code']
+                    candidate_codes = [gen['code']] if gen['code'] else []
+                    if orm_code not in candidate_codes:
+                        candidate_codes.append(orm_code)
+                    for code_candidate in candidate_codes:
+                        try:
+                            with timer.stage(f'execute_{attempt + 1}'):
+                                exec_res = execute(code_candidate, max_rows=100, statement_timeout_ms=5000)
+                            executed_code = code_candidate
+                            break
+                        except CapacityExhausted:
+                            # Other candidates would only wait for the same slots again.
+                            raise
+                        except Exception as exec_exc:
+                            last_exec_error = exec_exc
+                            continue
+                    if exec_res is not None:
+                        if candidate_stats is not None:
+                            candidate_stats['chosen'] = gen['index']
+                        break
+                summary = (gen.get('summary') or '').strip()
+                explanation = (gen.get('explanation') or '').strip()
+                if exec_res is None:
+                    raise last_exec_error or RuntimeError('Execution failed')
+
+                result = exec_res['result']
+                truncated = exec_res['truncated']
+                rows = exec_res['rows']
+                if templates is not None and template_state is None:
+                    if templates.learn(query_text, executed_code, decision.candidate_models, summary, explanation):
+                        template_state = 'learned'
+                try:
+                    with timer.stage('summarize'):
+                        final_summary = answer_with_data(content, result, truncated)
+                    if final_summary:
+                        summary = final_summary
+                except Exception:
+                    pass
+                final_code = executed_code
+                success = True
+                break
+            except Exception as exc:
+                error = str(exc)
+                logger.error('ai_admin error: %s', error)
+                if template_state == 'hit' and not isinstance(exc, CapacityExhausted):
+                    # The filled template did not run: drop it and generate as usual, not as a repair of it.
+                    templates.forget(query_text, decision.candidate_models)
+                    template_state = 'failed'
+                    prev_code = prev_error = None
+                    continue
+                prev_code = orm_code or prev_code
+                prev_error = error
+                if attempt >= 2 or not _is_retryable_error(error):
+                    break
+                delay = backoff_delay(attempt + 1, exc)
+                if delay is None:
+                    break
+                if delay:
+                    with timer.stage(f'backoff_{attempt + 1}'):
+                        time.sleep(delay)
+
+        return {
+            'success': success,
+            'summary': summary,
+            'explanation': explanation,
+            'code': final_code,
+            'result': result,
+            'truncated': truncated,
+            'rows': rows,
+            'error': error,
+            'prev_code': prev_code,
+            'retry_count': retry_count,
+            'candidates': candidate_stats,
+            'template': template_state,
+        }
+
+
+class MessageJobView(APIView):
+    permission_classes = [IsStaff]
+
+    def get(self, request, job_id: int):
+        """Long-poll a queued message: waits up to ``?wait=`` seconds (capped by JOB_POLL_TIMEOUT_SEC)."""
+        max_wait = get_job_poll_timeout_sec()
+        try:
+            wait = float(request.query_params.get('wait', max_wait))
+        except (TypeError, ValueError):
+            wait = max_wait
+        job = wait_for_job(job_id, request.user, min(max(0.0, wait), max_wait))
+        if job is None:
+            return Response({'detail': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
+        envelope, status_code = job_envelope(job)
+        return Response(envelope, status=status_code)
+
+
+_chat_message_view = ChatMessageView.as_view()
+
+
+def _render_chat_message(request, chat_id: int):
+    response = _chat_message_view(request, chat_id=chat_id)
+    if hasattr(response, 'render'):
+        response.render()
+    return response
+
+
+async def async_chat_message_view(request, chat_id: int):
+    """
+    ASGI entry point for ``ChatMessageView``. Django would run the sync view on its single
+    thread-sensitive executor, one turn at a time; here turns share the bounded pipeline pool.
+    """
+    return await run_in_pipeline(_render_chat_message, request, chat_id)
+
+
+# Authentication (including the session CSRF check) is done by the wrapped APIView.
+async_chat_message_view.csrf_exempt = True